@@ -0,0 +1,443 @@
+"""
+Python library for GPS Location Sharing - non-blocking connection to the GLS Server.
+
+Many connections (sessions) may share one event loop (and this way one thread). The connections are driven by
+the asyncore loop of the standard library; all requests are answered asynchronously by calling back the
+given functions. The loop has to wait with C{poll()} (see L{loop}) - with C{select()}, it fails as soon as a socket
+number exceeds 1024, so thousands of sessions are only possible this way (besides, the limit of open files of the
+process has to be raised accordingly). Example::
+
+    def gotPositions(positions):
+        print positions
+
+    c = AsyncServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    c.joinGroup("OpenMoko")
+    c.requestPositions(gotPositions)
+    c.closeConnection()
+    loop()
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import asynchat
+import asyncore
+import socket
+import GLSException
+import GLSCommands
+from GLSCodec import defaultCodec, parsePositionLine, parseWaypointLine, parseGroupLine
+
+class AsyncServerConnection(asynchat.async_chat):
+    """
+    An instance of this class maintains one non-blocking connection to the GLS server.
+
+    The interface is the same as the one of L{ServerConnection.ServerConnection} - however, none of the methods
+    is blocking. Instead, each method takes a function, which is called with the result as soon as the reply from
+    the server has been received, and a function, which is called with an L{GLSException.GLSException} in case
+    the request failed. If no error function is given, errors are silently dropped.
+
+    Commands are written to the server as soon as they are issued (without waiting for the replies to the previous
+    commands); the replies are assigned to the commands in order. Connection will be established automatically as soon
+    as the first command is issued; the handshake (V, N, D) is queued in front of this command.
+
+    @ivar _hostName: Hostname or IP address of the GLS server
+    @type _hostName: C{String}
+    @ivar _port: Port, the GLS server is listening on
+    @type _port: C{int}
+    @ivar _version: Version of the GLS protocol to use for the communication to GLS server
+    @type _version: C{String}
+    @ivar _clientName: Name of the client for logging into the GSL server
+    @type _clientName: C{String}
+    @ivar _password: Password for logging into the GLS server
+    @type _password: C{String}
+    @ivar _deviceName: Name of the GPS device
+    @type _deviceName: C{String}
+    @ivar _groupName: Name of the group to be used for this session
+    @type _groupName: C{String}
+    @ivar _serverVersion: Versions of the GLS specification supported by the server
+    @type _serverVersion: C{String}
+    @ivar _connected: Connection state (0 is not connected, 1 is connecting or connected)
+    @type _connected: C{int}
+    @ivar _pending: Commands sent to the server, which are still waiting for their reply (each one as list of command, function for the result, function for errors)
+    @type _pending: C{List} of C{List}
+    @ivar _incoming: Parts of the line currently being received
+    @type _incoming: C{List} of C{String}
+    @ivar _lines: Lines of the multi line reply currently being received
+    @type _lines: C{List} of C{String}
+    @ivar _codec: Codec for encoding positions and waypoints to be sent to the server
+    @type _codec: L{GLSCodec.LineCodec}
+    """
+
+    def __init__(self, hostName, port, version, clientName, password, deviceName, groupName, map = None):
+        """
+        Constructor
+
+        Only stores the given parameters in instance variables. No connection is being established here.
+
+        @param hostName: Hostname or IP address of the GLS server
+        @type hostName: C{String}
+        @param port: Port, the GLS server is listening on
+        @type port: C{int}
+        @param version: Version of the GLS protocol to use for the communication to GLS server
+        @type version: C{String}
+        @param clientName: Name of the client for logging into the GSL server
+        @type clientName: C{String}
+        @param password: Password for logging into the GLS server
+        @type password: C{String}
+        @param deviceName: Name of the GPS device
+        @type deviceName: C{String}
+        @param groupName: Name of the group to be used for this session
+        @type groupName: C{String}
+        @param map: Socket map of the asyncore loop, this connection shall be run in (default is the global map of asyncore)
+        @type map: C{Dict}
+        """
+        asynchat.async_chat.__init__(self, map = map)
+        self.set_terminator("\n")
+        self._hostName = hostName
+        self._port = port
+        self._version = version
+        self._clientName = clientName
+        self._password = password
+        self._deviceName = deviceName
+        self._groupName = groupName
+        self._serverVersion = None
+        self._connected = 0
+        self._pending = []
+        self._incoming = []
+        self._lines = None
+        self._codec = defaultCodec
+
+    def _establishConnection(self):
+        """
+        Starts up the (non-blocking) connection to the GLS server.
+
+        The handshake commands (V, N, D) are queued immediately; they are written to the server as soon as the connection
+        is available. If one of them fails, all the pending commands fail with the corresponding error and the connection is
+        closed.
+        """
+        if self._connected:
+            return
+        self._connected = 1
+        self._serverVersion = None
+        self.discard_buffers()
+        self._incoming = []
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.connect((self._hostName, self._port))
+        except socket.error, e:
+            self._failAll(GLSException.GLSException("Connection to server could not be established.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e)))
+            return
+
+        def versionFailed(e):
+            self._failHandshake(GLSException.GLSException("Requested version of GLS specification not supported by server.", GLSException.EC_VERSION_NOT_SUPPORTED, "Version mismatch - server understands %s; client wants to speak %s" % (self._serverVersion, self._version)))
+        def loginFailed(e):
+            self._failHandshake(GLSException.GLSException("Authentication error when connecting to GLS server.", GLSException.EC_AUTHENTICATION_ERROR, "The client (%s) could not be authenticated on the server." %(self._clientName)))
+        def deviceFailed(e):
+            self._failHandshake(GLSException.GLSException("Device not accepted by server.", GLSException.EC_UNKNOWN_ERROR, "The server did not accept the device (%s) for the connection establishment." %(self._deviceName)))
+
+        if self._password:
+            comm = GLSCommands.CO_LOGIN + self._clientName + "," + self._password
+        else:
+            comm = GLSCommands.CO_LOGIN + self._clientName
+        self._sendCommand(GLSCommands.CO_VERSION + self._version, None, versionFailed, 1)
+        self._sendCommand(comm, None, loginFailed, 1)
+        self._sendCommand(GLSCommands.CO_DEVICE + self._deviceName, None, deviceFailed, 1)
+
+    def _sendCommand(self, command, callback, errback, initMode = 0):
+        """
+        Queues exactly one command for the GLS server.
+
+        The command is extended by a line feed before sending. The reply is passed to the callback function; it has the
+        same format as the return value of L{ServerConnection.ServerConnection._sendCommand}.
+
+        @param command: Command to be sent to the server
+        @type command: C{String}
+        @param callback: Function to be called with the reply (may be C{None})
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the command failed (may be C{None})
+        @type errback: C{Function}
+        @param initMode: When sending this command the connection is in initialisation mode; meaning, it shall no be checked, whether a connection is establised already
+        @type initMode: C{int}
+        """
+        if not self._connected and not initMode:
+            self._establishConnection()
+        self._pending.append([command, callback, errback])
+        self.push(command + "\n")
+
+    def _failHandshake(self, e):
+        """
+        Fails all pending commands and closes the connection because the handshake with the server was not sucessful.
+
+        @param e: Error to be passed to all pending commands
+        @type e: L{GLSException.GLSException}
+        """
+        self._failAll(e)
+        self.close()
+
+    def _failAll(self, e):
+        """
+        Passes the given error to all commands, which are still waiting for a reply.
+
+        @param e: Error to be passed to all pending commands
+        @type e: L{GLSException.GLSException}
+        """
+        self._connected = 0
+        pending = self._pending
+        self._pending = []
+        self._lines = None
+        for command, callback, errback in pending:
+            if errback:
+                errback(e)
+
+    def collect_incoming_data(self, data):
+        """
+        Collects the parts of the current line (called by asynchat).
+        """
+        self._incoming.append(data)
+
+    def found_terminator(self):
+        """
+        Processes one complete line received from the server (called by asynchat).
+
+        The first line on a connection is the list of versions supported by the server. All other lines are assigned to
+        the first pending command. Multi line replies are collected until the "F" line arrives. Replies starting with
+        "C" or "E" are passed as L{GLSException.GLSException} to the error function of the command.
+        """
+        data = "".join(self._incoming)
+        self._incoming = []
+        if self._serverVersion is None:
+            self._serverVersion = data
+            return
+        if not self._pending:
+            return
+        command, callback, errback = self._pending[0]
+
+        if self._lines is not None:
+            self._lines.append(data)
+            if data[:1] == GLSCommands.RE_FINISHED:
+                lines = self._lines
+                self._lines = None
+                del self._pending[0]
+                if callback:
+                    callback(lines)
+            return
+
+        e = None
+        if len(data) < 1:
+            e = GLSException.GLSException("No data from server.", GLSException.EC_VALIDATION_ERROR, "No data was returned from the server for the command " + command)
+        elif data[0] == GLSCommands.RE_CHANGE:
+            e = GLSException.GLSException("Violation of business rules (C) when sending the command.", GLSException.EC_VIOLATION_BUSINESS_RULES, "A business rule was violated when sending the command " + command)
+        elif data[0] == GLSCommands.RE_ERROR:
+            e = GLSException.GLSException("Validation error (E) when sending the command.", GLSException.EC_VALIDATION_ERROR, "A validation error occured when sending the command " + command)
+        if e:
+            del self._pending[0]
+            if errback:
+                errback(e)
+            return
+
+        if data[0] == GLSCommands.RE_POSITION or data[0] == GLSCommands.RE_WAYPOINT or data[0] == GLSCommands.RE_GROUP:
+            self._lines = [data]
+            return
+        if data[0] == GLSCommands.RE_FINISHED:
+            data = [data]
+        del self._pending[0]
+        if callback:
+            callback(data)
+
+    def handle_connect(self):
+        """
+        Connection to the server is available (called by asyncore).
+        """
+        pass
+
+    def handle_close(self):
+        """
+        Connection was closed by the server (called by asyncore).
+
+        All commands still waiting for a reply fail.
+        """
+        self.close()
+        if self._pending:
+            self._failAll(GLSException.GLSException("Connection closed by server.", GLSException.EC_CONNECTION_LOST, "The server closed the connection while the client was waiting for a reply."))
+        self._connected = 0
+
+    def handle_error(self):
+        """
+        An unexpected error occured in the event loop for this connection (called by asyncore).
+
+        The connection is closed and all commands still waiting for a reply fail.
+        """
+        e = GLSException.GLSException("Connection to server failed.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + _describeCurrentError())
+        self.close()
+        self._failAll(e)
+
+    def setCodec(self, codec):
+        """
+        SETTER
+
+        @param codec: Codec for encoding positions and waypoints (for instance with a different precision)
+        @type codec: L{GLSCodec.LineCodec}
+        """
+        self._codec = codec
+
+    def closeConnection(self, callback = None, errback = None):
+        """
+        Closes down the connection to the server after all pending commands have been answered.
+
+        @param callback: Function to be called (without arguments) as soon as the connection has been closed
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if closing was not sucessful
+        @type errback: C{Function}
+        """
+        if not self._connected:
+            if callback:
+                callback()
+            return
+        def closed(res):
+            self.close()
+            self._connected = 0
+            if callback:
+                callback()
+        self._sendCommand(GLSCommands.CO_QUIT, closed, errback)
+
+    def testConnection(self, callback = None, errback = None):
+        """
+        Tests connectivity to the GLS server by requesting the list of available groups.
+
+        @param callback: Function to be called (without arguments) if the test was sucessful
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the test was not sucessful
+        @type errback: C{Function}
+        """
+        def tested(res):
+            if callback:
+                callback()
+        self._sendCommand(GLSCommands.CO_GROUP, tested, errback)
+
+    def requestGroups(self, callback, errback = None):
+        """
+        Requests a list of available groups from the server.
+
+        @param callback: Function to be called with the list of available groups (C{List} of C{String})
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the request failed
+        @type errback: C{Function}
+        """
+        def received(res):
+            ret = []
+            for item in res:
+                if item[0]!= GLSCommands.RE_FINISHED:
+                    ret.append(parseGroupLine(item))
+            callback(ret)
+        self._sendCommand(GLSCommands.CO_GROUP, received, errback)
+
+    def joinGroup(self, groupName, callback = None, errback = None):
+        """
+        Makes an attempt to join a group on the server.
+
+        @param groupName: Name of the group, which shall be joined
+        @type groupName: C{String}
+        @param callback: Function to be called (without arguments) if the group was joined sucessfully
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the attempt was not sucessful
+        @type errback: C{Function}
+        """
+        def joined(res):
+            if callback:
+                callback()
+        self._sendCommand(GLSCommands.CO_GROUP + groupName, joined, errback)
+
+    def sendPosition(self, position, callback = None, errback = None):
+        """
+        Sends a GPS position to the server.
+
+        @param position: GPS position to be sent to the server
+        @type position: L{PythonGLS.Position}
+        @param callback: Function to be called (without arguments) if the position was accepted by the server
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the position was not accepted
+        @type errback: C{Function}
+        """
+        def sent(res):
+            if callback:
+                callback()
+        self._sendCommand(self._codec.formatPosition(position), sent, errback)
+
+    def sendWaypoint(self, waypoint, callback = None, errback = None):
+        """
+        Sends a waypoint to the server.
+
+        @param waypoint: Waypoint to be sent to the server
+        @type waypoint: L{PythonGLS.Waypoint}
+        @param callback: Function to be called (without arguments) if the waypoint was accepted by the server
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the waypoint was not accepted
+        @type errback: C{Function}
+        """
+        def sent(res):
+            if callback:
+                callback()
+        self._sendCommand(self._codec.formatWaypoint(waypoint), sent, errback)
+
+    def requestPositions(self, callback, errback = None):
+        """
+        Requests positions of others from the server.
+
+        @param callback: Function to be called with the positions of others in dictionary format (C{Dict} of C{String} | L{PythonGLS.Position}). The key is the name of the "other", the value is the position.
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the request failed
+        @type errback: C{Function}
+        """
+        def received(res):
+            ret = {}
+            for item in res:
+                if item[0]!= GLSCommands.RE_FINISHED:
+                    name, position = parsePositionLine(item)
+                    ret[name] = position
+            callback(ret)
+        self._sendCommand(GLSCommands.CO_POSITION, received, errback)
+
+    def requestWaypoints(self, callback, errback = None):
+        """
+        Requests waypoints of others from the server.
+
+        @param callback: Function to be called with the waypoints of others in dictionary format (C{Dict} of C{String} | L{PythonGLS.Waypoint}). The key is the name of the "other", the value is the waypoint.
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the request failed
+        @type errback: C{Function}
+        """
+        def received(res):
+            ret = {}
+            for item in res:
+                if item[0]!= GLSCommands.RE_FINISHED:
+                    name, waypoint = parseWaypointLine(item)
+                    ret[name] = waypoint
+            callback(ret)
+        self._sendCommand(GLSCommands.CO_WAYPOINT, received, errback)
+
+
+def loop(timeout = 30.0, map = None, count = None):
+    """
+    Runs the asyncore loop for the connections; the loop waits with C{poll()} (where available) instead of C{select()}.
+
+    @param timeout: Maximum time (in seconds) to wait for events in each pass
+    @type timeout: C{float}
+    @param map: Socket map of the connections (default is the global map of asyncore)
+    @type map: C{Dict}
+    @param count: Number of passes (C{None} for running until all connections have been closed)
+    @type count: C{int}
+    """
+    asyncore.loop(timeout = timeout, use_poll = True, map = map, count = count)
+
+def _describeCurrentError():
+    """
+    Supporting function to describe the exception currently being handled in one line.
+
+    @return: Compact description of the current exception
+    @rtype: C{String}
+    """
+    nil, t, v, tbinfo = asyncore.compact_traceback()
+    return "%s: %s %s" % (t, v, tbinfo)
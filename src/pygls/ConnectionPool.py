@@ -0,0 +1,288 @@
+"""
+Python library for GPS Location Sharing - pool of authenticated connections to GLS servers.
+
+Short-lived users of the library may check out a connection from a pool instead of creating a new
+L{ServerConnection.ServerConnection}; this way, the handshake with the server (V, N, D) and joining the group
+are skipped whenever a matching connection has been used before. Example::
+
+    pool = ConnectionPool(maxSize = 5)
+    s = pool.checkout("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    try:
+        posOthers = s.requestPositions()
+    finally:
+        pool.checkin(s)
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import threading
+import time
+import GLSException
+from ServerConnection import ServerConnection
+
+class ConnectionPool:
+    """
+    Pool of established (authenticated) connections to GLS servers.
+
+    Connections are kept per server and identity - host name, port, protocol version, client name, password and device
+    name make up the key. The number of connections in the pool (idle and checked out) is limited; if the limit is reached,
+    the connection idling for the longest time is closed to make room. Idle connections are closed once they have not
+    been used for a while. Before a connection is handed out, it is checked (without talking to the server) whether it is
+    still usable.
+
+    All methods may be called from several threads.
+
+    @ivar _maxSize: Maximum number of connections (idle and checked out) in the pool
+    @type _maxSize: C{int}
+    @ivar _idleTimeout: Time (in seconds) after which an idle connection is closed
+    @type _idleTimeout: C{float}
+    @ivar _idle: Idle connections per key (each one as list of connection and time of checkin), most recently used last
+    @type _idle: C{Dict} of C{Tuple} | C{List} of C{List}
+    @ivar _size: Number of connections (idle and checked out) in the pool
+    @type _size: C{int}
+    @ivar _checkedOut: Connections currently checked out (the key is the id of the connection)
+    @type _checkedOut: C{Dict} of C{int} | L{ServerConnection.ServerConnection}
+    @ivar _lock: Lock for protecting the state of the pool
+    @type _lock: L{threading.Lock}
+    """
+
+    def __init__(self, maxSize = 10, idleTimeout = 300):
+        """
+        Constructor
+
+        @param maxSize: Maximum number of connections (idle and checked out) in the pool
+        @type maxSize: C{int}
+        @param idleTimeout: Time (in seconds) after which an idle connection is closed
+        @type idleTimeout: C{float}
+        """
+        self._maxSize = maxSize
+        self._idleTimeout = idleTimeout
+        self._idle = {}
+        self._size = 0
+        self._checkedOut = {}
+        self._lock = threading.Lock()
+
+    def _getKey(self, connection):
+        """
+        Computes the key of a connection in the pool.
+
+        @param connection: Connection to compute the key for
+        @type connection: L{ServerConnection.ServerConnection}
+        @return: Key for the connection
+        @rtype: C{Tuple}
+        """
+        return (connection._hostName, connection._port, connection._version, connection._clientName, connection._password, connection._deviceName)
+
+    def _evictIdle(self, now):
+        """
+        Removes all connections from the pool, which have been idle for too long.
+
+        Must be called with the lock held.
+
+        @param now: Current time
+        @type now: C{float}
+        @return: Connections removed from the pool (to be closed by the caller)
+        @rtype: C{List} of L{ServerConnection.ServerConnection}
+        """
+        evicted = []
+        for key in self._idle.keys():
+            entries = self._idle[key]
+            while entries and now - entries[0][1] > self._idleTimeout:
+                evicted.append(entries.pop(0)[0])
+            if not entries:
+                del self._idle[key]
+        self._size -= len(evicted)
+        return evicted
+
+    def _evictOldest(self):
+        """
+        Removes the connection from the pool, which has been idle for the longest time.
+
+        Must be called with the lock held.
+
+        @return: Connection removed from the pool (to be closed by the caller) or C{None} if no connection is idle
+        @rtype: L{ServerConnection.ServerConnection}
+        """
+        oldestKey = None
+        for key in self._idle.keys():
+            if oldestKey is None or self._idle[key][0][1] < self._idle[oldestKey][0][1]:
+                oldestKey = key
+        if oldestKey is None:
+            return None
+        connection = self._idle[oldestKey].pop(0)[0]
+        if not self._idle[oldestKey]:
+            del self._idle[oldestKey]
+        self._size -= 1
+        return connection
+
+    def _close(self, connections):
+        """
+        Closes down the given connections (errors are ignored).
+
+        @param connections: Connections to close
+        @type connections: C{List} of L{ServerConnection.ServerConnection}
+        """
+        for connection in connections:
+            try:
+                connection.closeConnection()
+            except Exception:
+                pass
+
+    def checkout(self, hostName, port, version, clientName, password, deviceName, groupName = None):
+        """
+        Hands out an established connection to a GLS server.
+
+        An idle connection with the same key is reused if available and still alive; otherwise, a new connection is
+        established. If a group name is given, the group is joined - unless the connection has joined this group already.
+        The connection must be returned to the pool with L{checkin} (or removed with L{discard}) after use.
+
+        Raises an L{GLSException.GLSException} if the connection could not be established or the group could not be
+        joined, or if the pool is exhausted (all connections are checked out).
+
+        @param hostName: Hostname or IP address of the GLS server
+        @type hostName: C{String}
+        @param port: Port, the GLS server is listening on
+        @type port: C{int}
+        @param version: Version of the GLS protocol to use for the communication to GLS server
+        @type version: C{String}
+        @param clientName: Name of the client for logging into the GSL server
+        @type clientName: C{String}
+        @param password: Password for logging into the GLS server
+        @type password: C{String}
+        @param deviceName: Name of the GPS device
+        @type deviceName: C{String}
+        @param groupName: Name of the group to be joined (optional)
+        @type groupName: C{String}
+        @return: Established connection
+        @rtype: L{ServerConnection.ServerConnection}
+        """
+        key = (hostName, port, version, clientName, password, deviceName)
+        while 1:
+            self._lock.acquire()
+            try:
+                obsolete = self._evictIdle(time.time())
+                connection = None
+                exhausted = 0
+                if self._idle.has_key(key):
+                    connection = self._idle[key].pop()[0]
+                    if not self._idle[key]:
+                        del self._idle[key]
+                elif self._size >= self._maxSize:
+                    oldest = self._evictOldest()
+                    if oldest is None:
+                        exhausted = 1
+                    else:
+                        obsolete.append(oldest)
+                if connection is None and not exhausted:
+                    self._size += 1
+                if connection is not None:
+                    self._checkedOut[id(connection)] = connection
+            finally:
+                self._lock.release()
+            self._close(obsolete)
+            if exhausted:
+                raise GLSException.GLSException("No connection available in pool.", GLSException.EC_UNKNOWN_ERROR, "All %d connections of the pool are in use." %(self._maxSize))
+
+            if connection is None:
+                connection = ServerConnection(hostName, port, version, clientName, password, deviceName, groupName)
+                self._lock.acquire()
+                self._checkedOut[id(connection)] = connection
+                self._lock.release()
+                break
+            if connection.isAlive():
+                break
+            self.discard(connection)
+
+        try:
+            if groupName and connection.getJoinedGroup() != groupName:
+                connection.joinGroup(groupName)
+            else:
+                connection._establishConnection()
+        except Exception:
+            self.discard(connection)
+            raise
+        return connection
+
+    def _checkOwnership(self, connection):
+        """
+        Takes a connection back from the callers; raises an L{GLSException.GLSException} if it is not checked out.
+
+        Must be called with the lock held.
+
+        @param connection: Connection, which has been checked out from this pool before
+        @type connection: L{ServerConnection.ServerConnection}
+        """
+        if self._checkedOut.pop(id(connection), None) is not connection:
+            raise GLSException.GLSException("Connection not checked out from pool.", GLSException.EC_UNKNOWN_ERROR, "The connection has been returned already or does not belong to this pool.")
+
+    def checkin(self, connection):
+        """
+        Returns a connection to the pool after use.
+
+        Connections, which have been closed in the meantime, are removed from the pool. Raises an
+        L{GLSException.GLSException} if the connection is not checked out from this pool (for instance, if it has been
+        checked in already).
+
+        @param connection: Connection, which has been checked out from this pool before
+        @type connection: L{ServerConnection.ServerConnection}
+        """
+        if not connection.isAlive():
+            self.discard(connection)
+            return
+        key = self._getKey(connection)
+        self._lock.acquire()
+        try:
+            self._checkOwnership(connection)
+            if not self._idle.has_key(key):
+                self._idle[key] = []
+            self._idle[key].append([connection, time.time()])
+        finally:
+            self._lock.release()
+
+    def discard(self, connection):
+        """
+        Removes a checked out connection from the pool and closes it.
+
+        Raises an L{GLSException.GLSException} if the connection is not checked out from this pool.
+
+        @param connection: Connection, which has been checked out from this pool before
+        @type connection: L{ServerConnection.ServerConnection}
+        """
+        self._lock.acquire()
+        try:
+            self._checkOwnership(connection)
+            self._size -= 1
+        finally:
+            self._lock.release()
+        self._close([connection])
+
+    def closeAll(self):
+        """
+        Closes down all idle connections in the pool.
+
+        Connections currently checked out are not affected.
+        """
+        self._lock.acquire()
+        try:
+            obsolete = []
+            for entries in self._idle.values():
+                for connection, lastUsed in entries:
+                    obsolete.append(connection)
+            self._idle = {}
+            self._size -= len(obsolete)
+        finally:
+            self._lock.release()
+        self._close(obsolete)
+
+    def getSize(self):
+        """
+        GETTER
+
+        @return: Number of connections (idle and checked out) in the pool
+        @rtype: C{int}
+        """
+        return self._size
@@ -0,0 +1,250 @@
+"""
+Python library for GPS Location Sharing - dead reckoning for positions sent to the GLS Server.
+
+Most fixes of a device add no information for the others - the device is parked or keeps moving in a straight line at
+the same speed. The policy of this module predicts where the others believe the device to be (the last position sent,
+moved on with its speed and bearing) and lets a fix through only if it drifts away from this prediction by more than a
+tolerance, or if nothing has been sent for too long. Example::
+
+    s = DeadReckoningSender(ServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko"),
+                            DeadReckoningPolicy(tolerance = 25.0, maxSilence = 60.0))
+    for position in GPSDConnection().positions():
+        s.sendPosition(position)
+
+The others see the device at the given accuracy, if they extrapolate the positions received the same way; without
+extrapolation, the error is bounded by the distance travelled within the maximum silence.
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import time
+from Geodesy import distance, destination
+
+class DeadReckoningPolicy:
+    """
+    Decides, which fixes of a device have to be sent to the server.
+
+    A fix is sent, if
+        - no position has been sent yet,
+        - it is further away from the predicted position than the tolerance or
+        - the last position has been sent longer ago than the maximum silence.
+
+    Speeds of positions are converted to metres per second with the speed factor; the default expects metres per second
+    as delivered by L{GPSDConnection.GPSDConnection}.
+
+    @ivar _tolerance: Maximum distance (in metres) between fix and prediction, which is not sent
+    @type _tolerance: C{float}
+    @ivar _maxSilence: Maximum time (in seconds) without sending (C{None} for no limit)
+    @type _maxSilence: C{float}
+    @ivar _speedFactor: Factor converting the speed of a position into metres per second
+    @type _speedFactor: C{float}
+    @ivar _last: Position sent last (C{None} if nothing has been sent yet)
+    @type _last: L{PythonGLS.Position}
+    @ivar _lastTime: Time the last position was sent
+    @type _lastTime: C{float}
+    @ivar _statistics: Number of fixes checked ("fixes"), sent first ("first"), for drifting away ("drift") or for the silence ("silence") and not sent ("suppressed")
+    @type _statistics: C{Dict} of C{String} | C{int}
+    """
+
+    def __init__(self, tolerance = 25.0, maxSilence = 60.0, speedFactor = 1.0):
+        """
+        Constructor
+
+        @param tolerance: Maximum distance (in metres) between fix and prediction, which is not sent
+        @type tolerance: C{float}
+        @param maxSilence: Maximum time (in seconds) without sending (C{None} for no limit)
+        @type maxSilence: C{float}
+        @param speedFactor: Factor converting the speed of a position into metres per second (for instance 1 / 3.6 for km/h)
+        @type speedFactor: C{float}
+        """
+        self._tolerance = tolerance
+        self._maxSilence = maxSilence
+        self._speedFactor = speedFactor
+        self._statistics = {"fixes": 0, "first": 0, "drift": 0, "silence": 0, "suppressed": 0}
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the position sent last (for instance after the connection has been lost); the next fix is sent in any case.
+        """
+        self._last = None
+        self._lastTime = None
+
+    def predict(self, now):
+        """
+        Predicts the position of the device as the others see it: the position sent last moved on with its speed and bearing.
+
+        @param now: Time to predict the position for
+        @type now: C{float}
+        @return: Latitude and longitude of the prediction (C{None} if nothing has been sent yet)
+        @rtype: C{Tuple} of C{float}
+        """
+        if self._last is None:
+            return None
+        meters = self._last.getSpeed() * self._speedFactor * max(0.0, now - self._lastTime)
+        if meters <= 0:
+            return self._last.getLatitude(), self._last.getLongitude()
+        return destination(self._last.getLatitude(), self._last.getLongitude(), self._last.getBearing(), meters)
+
+    def check(self, position, now):
+        """
+        Checks, whether a fix has to be sent; if so, it is remembered as sent (see L{sent}).
+
+        @param position: Current fix of the device
+        @type position: L{PythonGLS.Position}
+        @param now: Time of the fix
+        @type now: C{float}
+        @return: Reason for sending ("first", "drift" or "silence"), C{None} if the fix does not need to be sent
+        @rtype: C{String}
+        """
+        self._statistics["fixes"] += 1
+        if self._last is None:
+            reason = "first"
+        elif self._maxSilence is not None and now - self._lastTime >= self._maxSilence:
+            reason = "silence"
+        else:
+            latitude, longitude = self.predict(now)
+            if distance(latitude, longitude, position.getLatitude(), position.getLongitude()) <= self._tolerance:
+                self._statistics["suppressed"] += 1
+                return None
+            reason = "drift"
+        self._statistics[reason] += 1
+        self.sent(position, now)
+        return reason
+
+    def sent(self, position, now):
+        """
+        Remembers a position as sent to the server (the base for the following predictions).
+
+        @param position: Position sent
+        @type position: L{PythonGLS.Position}
+        @param now: Time the position was sent
+        @type now: C{float}
+        """
+        self._last = position
+        self._lastTime = now
+
+    def getStatistics(self):
+        """
+        GETTER
+
+        @return: Number of fixes checked ("fixes"), sent first ("first"), for drifting away ("drift") or for the silence ("silence") and not sent ("suppressed")
+        @rtype: C{Dict} of C{String} | C{int}
+        """
+        return dict(self._statistics)
+
+
+class DeadReckoningSender:
+    """
+    Sends positions to the server through a connection, unless a dead reckoning policy suppresses them.
+
+    The interface for sending positions is the same as the one of the connection, so the sender may be used in its place
+    - for L{ServerConnection.ServerConnection} as well as for L{AsyncServerConnection.AsyncServerConnection} (callback
+    and errback are passed on, if given). If sending fails, the policy is reset, so the next fix is sent in any case. For
+    the asynchronous connection, this is done when the failure is reported (before the errback given by the caller is
+    called); hence, a callback or an errback has to be given there, otherwise failures are not noticed.
+
+    @ivar _connection: Connection to the GLS server
+    @type _connection: L{ServerConnection.ServerConnection}
+    @ivar _policy: Policy deciding, which fixes are sent
+    @type _policy: L{DeadReckoningPolicy}
+    @ivar _suppressed: Last fix, which has not been sent (C{None} if the last fix has been sent)
+    @type _suppressed: L{PythonGLS.Position}
+    """
+
+    def __init__(self, connection, policy = None):
+        """
+        Constructor
+
+        @param connection: Connection to the GLS server
+        @type connection: L{ServerConnection.ServerConnection}
+        @param policy: Policy deciding, which fixes are sent (default tolerates 25 metres and 60 seconds of silence)
+        @type policy: L{DeadReckoningPolicy}
+        """
+        self._connection = connection
+        if policy is None:
+            policy = DeadReckoningPolicy()
+        self._policy = policy
+        self._suppressed = None
+
+    def sendPosition(self, position, callback = None, errback = None):
+        """
+        Sends a GPS position to the server if the policy requires it.
+
+        Raises an L{GLSException.GLSException} if sending fails (see L{ServerConnection.ServerConnection.sendPosition}).
+
+        @param position: Current fix of the device
+        @type position: L{PythonGLS.Position}
+        @param callback: Function to be called (without arguments) if the position was accepted by the server (only for L{AsyncServerConnection.AsyncServerConnection})
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the position was not accepted (only for L{AsyncServerConnection.AsyncServerConnection})
+        @type errback: C{Function}
+        @return: 1 if the position has been sent; 0 if it has been suppressed
+        @rtype: C{int}
+        """
+        if self._policy.check(position, time.time()) is None:
+            self._suppressed = position
+            return 0
+        self._send(position, callback, errback)
+        return 1
+
+    def flush(self, callback = None, errback = None):
+        """
+        Sends the last fix, which has been suppressed (for instance before shutting down, so the others see the final position).
+
+        @param callback: Function to be called (without arguments) if the position was accepted by the server (only for L{AsyncServerConnection.AsyncServerConnection})
+        @type callback: C{Function}
+        @param errback: Function to be called with an L{GLSException.GLSException} if the position was not accepted (only for L{AsyncServerConnection.AsyncServerConnection})
+        @type errback: C{Function}
+        @return: 1 if a position has been sent; 0 if there was nothing to send
+        @rtype: C{int}
+        """
+        if self._suppressed is None:
+            return 0
+        position = self._suppressed
+        self._policy.sent(position, time.time())
+        self._send(position, callback, errback)
+        return 1
+
+    def _send(self, position, callback, errback):
+        """
+        Supporting function to send a position through the connection.
+
+        Callback and errback are only passed on if one of them is given; the errback is replaced by one, which resets the
+        policy before calling the given errback.
+        """
+        self._suppressed = None
+        try:
+            if callback is None and errback is None:
+                self._connection.sendPosition(position)
+            else:
+                def failed(e):
+                    self._policy.reset()
+                    if errback:
+                        errback(e)
+                self._connection.sendPosition(position, callback, failed)
+        except Exception:
+            self._policy.reset()
+            raise
+
+    def getPolicy(self):
+        """
+        GETTER
+
+        @return: Policy deciding, which fixes are sent
+        @rtype: L{DeadReckoningPolicy}
+        """
+        return self._policy
+
+    def getConnection(self):
+        """
+        GETTER
+
+        @return: Connection to the GLS server
+        @rtype: L{ServerConnection.ServerConnection}
+        """
+        return self._connection
@@ -0,0 +1,146 @@
+"""
+Python library for GPS Location Sharing - encoding and decoding of the lines of the GLS protocol.
+
+The layouts of the lines for positions, waypoints and groups are fixed; hence, each field is converted according
+to its meaning (names remain strings, all other fields are numbers) instead of guessing the type of each token.
+
+Layouts (without line feed)::
+
+    P<latitude>,<longitude>,<altitude>,<speed>,<bearing>            command: send own position
+    W<latitude>,<longitude>,<altitude>,<name>                       command: send own waypoint
+    P<member>,<latitude>,<longitude>,<altitude>,<speed>,<bearing>   reply: position of another member
+    W<member>,<latitude>,<longitude>,<altitude>,<name>              reply: waypoint of another member
+    G<group>                                                        reply: available group
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var COORDINATE_PRECISION: Default number of decimals for latitude and longitude (6 decimals are about 0.1 m)
+@type COORDINATE_PRECISION: C{int}
+@var VALUE_PRECISION: Default number of decimals for altitude, speed and bearing
+@type VALUE_PRECISION: C{int}
+@var defaultCodec: Codec used by the connections unless configured otherwise
+@type defaultCodec: L{LineCodec}
+"""
+import GLSException
+import GLSCommands
+from PythonGLS import Position, Waypoint, internName
+
+COORDINATE_PRECISION = 6
+VALUE_PRECISION = 2
+
+def _numberFormat(precision):
+    """
+    Supporting function to compute the format for a number with the given precision.
+
+    @param precision: Number of decimals (C{None} for the shortest exact representation)
+    @type precision: C{int}
+    @return: Format for the % operator
+    @rtype: C{String}
+    """
+    if precision is None:
+        return "%r"
+    return "%%.%df" % precision
+
+class LineCodec:
+    """
+    Encodes and decodes lines of the GLS protocol.
+
+    Numbers are written with a fixed number of decimals - this keeps the lines short. The formats are computed
+    once when the codec is created; encoding a line is a single formatting operation then.
+
+    @ivar _positionFormat: Format for "P" commands
+    @type _positionFormat: C{String}
+    @ivar _waypointFormat: Format for "W" commands
+    @type _waypointFormat: C{String}
+    """
+
+    def __init__(self, coordinatePrecision = COORDINATE_PRECISION, valuePrecision = VALUE_PRECISION):
+        """
+        Constructor
+
+        @param coordinatePrecision: Number of decimals for latitude and longitude (C{None} for the shortest exact representation)
+        @type coordinatePrecision: C{int}
+        @param valuePrecision: Number of decimals for altitude, speed and bearing (C{None} for the shortest exact representation)
+        @type valuePrecision: C{int}
+        """
+        coordinate = _numberFormat(coordinatePrecision)
+        value = _numberFormat(valuePrecision)
+        self._positionFormat = GLSCommands.CO_POSITION + ",".join([coordinate, coordinate, value, value, value])
+        self._waypointFormat = GLSCommands.CO_WAYPOINT + ",".join([coordinate, coordinate, value, "%s"])
+
+    def formatPosition(self, position):
+        """
+        Encodes a "P" command for sending a position.
+
+        @param position: GPS position to be sent to the server
+        @type position: L{PythonGLS.Position}
+        @return: Command (without line feed)
+        @rtype: C{String}
+        """
+        return self._positionFormat % (position.getLatitude(), position.getLongitude(), position.getAltitude(), position.getSpeed(), position.getBearing())
+
+    def formatWaypoint(self, waypoint):
+        """
+        Encodes a "W" command for sending a waypoint.
+
+        @param waypoint: Waypoint to be sent to the server
+        @type waypoint: L{PythonGLS.Waypoint}
+        @return: Command (without line feed)
+        @rtype: C{String}
+        """
+        return self._waypointFormat % (waypoint.getLatitude(), waypoint.getLongitude(), waypoint.getAltitude(), waypoint.getName())
+
+
+def parsePositionLine(line):
+    """
+    Decodes one line of a "P" reply.
+
+    Raises an L{GLSException.GLSException} if the line does not match the layout.
+
+    @param line: Line of the reply (including the leading "P")
+    @type line: C{String}
+    @return: Name of the other member and its position
+    @rtype: C{Tuple} of C{String} and L{PythonGLS.Position}
+    """
+    try:
+        name, latitude, longitude, altitude, speed, bearing = line[1:].split(",")
+        return internName(name), Position(float(latitude), float(longitude), float(altitude), float(speed), float(bearing))
+    except ValueError:
+        raise GLSException.GLSException("Invalid position from server.", GLSException.EC_VALIDATION_ERROR, "The line '%s' is not a valid position." %(line))
+
+def parseWaypointLine(line):
+    """
+    Decodes one line of a "W" reply.
+
+    The name of the waypoint is the last field - it may contain commas.
+
+    Raises an L{GLSException.GLSException} if the line does not match the layout.
+
+    @param line: Line of the reply (including the leading "W")
+    @type line: C{String}
+    @return: Name of the other member and the waypoint
+    @rtype: C{Tuple} of C{String} and L{PythonGLS.Waypoint}
+    """
+    try:
+        name, latitude, longitude, altitude, waypointName = line[1:].split(",", 4)
+        return internName(name), Waypoint(float(latitude), float(longitude), float(altitude), internName(waypointName))
+    except ValueError:
+        raise GLSException.GLSException("Invalid waypoint from server.", GLSException.EC_VALIDATION_ERROR, "The line '%s' is not a valid waypoint." %(line))
+
+def parseGroupLine(line):
+    """
+    Decodes one line of a "G" reply.
+
+    @param line: Line of the reply (including the leading "G")
+    @type line: C{String}
+    @return: Name of the group
+    @rtype: C{String}
+    """
+    return line[1:]
+
+defaultCodec = LineCodec()
@@ -13,12 +13,19 @@ http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
 @type EC_VERSION_NOT_SUPPORTED: C{int}
 @var EC_AUTHENTICATION_ERROR: Error code - authentication error when connecting to server
 @type EC_AUTHENTICATION_ERROR: C{int}
+@var EC_VIOLATION_BUSINESS_RULES: Error code - server rejected a request because of business rules (C)
+@type EC_VIOLATION_BUSINESS_RULES: C{int}
+@var EC_VALIDATION_ERROR: Error code - server rejected a request because of validation rules (E)
+@type EC_VALIDATION_ERROR: C{int}
+@var EC_CONNECTION_LOST: Error code - connection to the server was closed unexpectedly
+@type EC_CONNECTION_LOST: C{int}
 """
 EC_UNKNOWN_ERROR = 0
 EC_VERSION_NOT_SUPPORTED = 1     
 EC_AUTHENTICATION_ERROR = 2
 EC_VIOLATION_BUSINESS_RULES = 3
 EC_VALIDATION_ERROR = 4
+EC_CONNECTION_LOST = 5
 
 class GLSException(Exception):
     """
@@ -49,7 +56,7 @@ class GLSException(Exception):
         @return: String representation of object content
         @rtype: C{String}
         """
-        return msg
+        return self._msg
 
     def getMsg(self):
         """
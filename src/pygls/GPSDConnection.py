@@ -1,9 +1,473 @@
 """
 Python library for GPS Location Sharing - responsible for the connection to the GPSD.
+
+The connection reads the JSON reports of gpsd (protocol version 3) from a non-blocking socket; the time-position-velocity
+reports (TPV) are turned into positions as soon as their line has been received. Fixes of poor quality and fixes coming
+in more often than needed are dropped (see L{FixFilter}) before they are delivered - as return value of L{GPSDConnection.poll},
+from the generator L{GPSDConnection.positions} or to registered callbacks. Example::
+
+    g = GPSDConnection(fixFilter = FixFilter(minInterval = 5.0, minDistance = 20.0))
+    s = ServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    for position in g.positions():
+        s.sendPosition(position)
+
+Speeds are passed on as reported by gpsd (metres per second); the course over ground becomes the bearing.
+
 http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
 
 @author: Michael Pilgermann
 @contact: mailto:michael.pilgermann@gmx.de
 @contact: http://www.kichkasch.de
 @license: GPL (General Public License)
+
+@var GPSD_PORT: Port, gpsd is listening on by default
+@type GPSD_PORT: C{int}
+@var MODE_NO_FIX: Mode of a TPV report without fix
+@type MODE_NO_FIX: C{int}
+@var MODE_2D: Mode of a TPV report with a two-dimensional fix (no altitude)
+@type MODE_2D: C{int}
+@var MODE_3D: Mode of a TPV report with a three-dimensional fix
+@type MODE_3D: C{int}
+@var WATCH_ENABLE: Command asking gpsd to stream its reports as JSON
+@type WATCH_ENABLE: C{String}
+@var WATCH_DISABLE: Command asking gpsd to stop the stream
+@type WATCH_DISABLE: C{String}
+@var RECV_SIZE: Maximum number of bytes received from the socket at once
+@type RECV_SIZE: C{int}
 """
+import socket
+import select
+import errno
+import time
+import GLSException
+from PythonGLS import Position
+from Geodesy import distance
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+GPSD_PORT = 2947
+MODE_NO_FIX = 1
+MODE_2D = 2
+MODE_3D = 3
+
+WATCH_ENABLE = '?WATCH={"enable":true,"json":true};\n'
+WATCH_DISABLE = '?WATCH={"enable":false};\n'
+RECV_SIZE = 4096
+
+def reportToPosition(report):
+    """
+    Turns a TPV report of gpsd into a position.
+
+    The altitude is taken from "alt" (older versions of gpsd) or "altMSL" / "altHAE" (newer ones); missing values for altitude,
+    speed and course are set to 0.
+
+    @param report: Decoded TPV report
+    @type report: C{Dict}
+    @return: Position of the report (C{None} if the report does not contain latitude and longitude)
+    @rtype: L{PythonGLS.Position}
+    """
+    try:
+        latitude = float(report["lat"])
+        longitude = float(report["lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    altitude = report.get("alt", report.get("altMSL", report.get("altHAE", 0.0)))
+    return Position(latitude, longitude, float(altitude or 0.0), float(report.get("speed") or 0.0), float(report.get("track") or 0.0))
+
+
+class FixFilter:
+    """
+    Decides, which of the fixes reported by gpsd are passed on.
+
+    A fix is dropped, if its quality is too poor (mode below the minimum, estimated horizontal error above the maximum)
+    or if it follows the previous fix passed on too quickly (less than the minimum interval) or too closely (less than the
+    minimum distance). A fix, which did not move far enough, is passed on nevertheless once the maximum interval since
+    the previous one has passed, so the server learns the member is still there.
+
+    @ivar _minMode: Minimum mode of a fix (see L{MODE_2D} and L{MODE_3D})
+    @type _minMode: C{int}
+    @ivar _maxError: Maximum estimated horizontal error of a fix in metres (C{None} for any); fixes without estimation are passed on
+    @type _maxError: C{float}
+    @ivar _minInterval: Minimum time (in seconds) between two fixes passed on
+    @type _minInterval: C{float}
+    @ivar _minDistance: Minimum distance (in metres) to the previous fix passed on
+    @type _minDistance: C{float}
+    @ivar _maxInterval: Time (in seconds) after which a fix is passed on even if it did not move far enough (C{None} for never)
+    @type _maxInterval: C{float}
+    @ivar _last: Previous fix passed on (C{None} if none)
+    @type _last: L{PythonGLS.Position}
+    @ivar _lastTime: Time the previous fix was passed on
+    @type _lastTime: C{float}
+    @ivar _statistics: Number of fixes passed on ("accepted"), dropped for their quality ("poorQuality") and dropped for their rate ("rateLimited")
+    @type _statistics: C{Dict} of C{String} | C{int}
+    """
+
+    def __init__(self, minMode = MODE_2D, maxError = None, minInterval = 0.0, minDistance = 0.0, maxInterval = None):
+        """
+        Constructor
+
+        The defaults pass on every fix with at least a two-dimensional fix.
+
+        @param minMode: Minimum mode of a fix (see L{MODE_2D} and L{MODE_3D})
+        @type minMode: C{int}
+        @param maxError: Maximum estimated horizontal error of a fix in metres (C{None} for any)
+        @type maxError: C{float}
+        @param minInterval: Minimum time (in seconds) between two fixes passed on
+        @type minInterval: C{float}
+        @param minDistance: Minimum distance (in metres) to the previous fix passed on
+        @type minDistance: C{float}
+        @param maxInterval: Time (in seconds) after which a fix is passed on even if it did not move far enough (C{None} for never)
+        @type maxInterval: C{float}
+        """
+        self._minMode = minMode
+        self._maxError = maxError
+        self._minInterval = minInterval
+        self._minDistance = minDistance
+        self._maxInterval = maxInterval
+        self._last = None
+        self._lastTime = None
+        self._statistics = {"accepted": 0, "poorQuality": 0, "rateLimited": 0}
+
+    def _getError(self, report):
+        """
+        Supporting function to look up the estimated horizontal error (in metres) of a report (C{None} if not reported).
+        """
+        if report.get("eph") is not None:
+            return float(report["eph"])
+        if report.get("epx") is not None and report.get("epy") is not None:
+            return max(float(report["epx"]), float(report["epy"]))
+        return None
+
+    def accept(self, report, position, now):
+        """
+        Checks, whether a fix shall be passed on; if so, it is remembered as the previous fix passed on.
+
+        @param report: Decoded TPV report of the fix
+        @type report: C{Dict}
+        @param position: Position of the fix (C{None} if the report does not contain latitude and longitude)
+        @type position: L{PythonGLS.Position}
+        @param now: Time the fix was received
+        @type now: C{float}
+        @return: 1 if the fix shall be passed on; 0 otherwise
+        @rtype: C{int}
+        """
+        if position is None or report.get("mode", MODE_NO_FIX) < self._minMode:
+            self._statistics["poorQuality"] += 1
+            return 0
+        if self._maxError is not None:
+            error = self._getError(report)
+            if error is not None and error > self._maxError:
+                self._statistics["poorQuality"] += 1
+                return 0
+        if self._last is not None:
+            elapsed = now - self._lastTime
+            if elapsed < self._minInterval:
+                self._statistics["rateLimited"] += 1
+                return 0
+            if self._minDistance and (self._maxInterval is None or elapsed < self._maxInterval):
+                if distance(self._last.getLatitude(), self._last.getLongitude(), position.getLatitude(), position.getLongitude()) < self._minDistance:
+                    self._statistics["rateLimited"] += 1
+                    return 0
+        self._last = position
+        self._lastTime = now
+        self._statistics["accepted"] += 1
+        return 1
+
+    def reset(self):
+        """
+        Forgets the previous fix passed on; the next fix of sufficient quality is passed on in any case.
+        """
+        self._last = None
+        self._lastTime = None
+
+    def getStatistics(self):
+        """
+        GETTER
+
+        @return: Number of fixes passed on ("accepted"), dropped for their quality ("poorQuality") and dropped for their rate ("rateLimited")
+        @rtype: C{Dict} of C{String} | C{int}
+        """
+        return dict(self._statistics)
+
+
+class GPSDConnection:
+    """
+    An instance of this class maintains one connection to gpsd.
+
+    The socket is non-blocking; the connection may be integrated into an existing select loop (see L{fileno}) and polled
+    whenever data is available. Connection will be established automatically with the first poll.
+
+    @ivar _hostName: Hostname or IP address of gpsd
+    @type _hostName: C{String}
+    @ivar _port: Port, gpsd is listening on
+    @type _port: C{int}
+    @ivar _filter: Filter for the fixes passed on
+    @type _filter: L{FixFilter}
+    @ivar _s: Socket for the connection to gpsd (C{None} if not connected)
+    @type _s: L{socket.socket}
+    @ivar _incoming: Data received, which does not make up a complete line yet
+    @type _incoming: C{String}
+    @ivar _callbacks: Functions called with each position passed on (and its report)
+    @type _callbacks: C{List} of C{Function}
+    @ivar _version: VERSION report of gpsd (C{None} if not received yet)
+    @type _version: C{Dict}
+    @ivar _lastReport: Last TPV report received (whether passed on or not)
+    @type _lastReport: C{Dict}
+    @ivar _reports: Number of TPV reports received
+    @type _reports: C{int}
+    @ivar _invalid: Number of lines received, which could not be decoded
+    @type _invalid: C{int}
+    """
+
+    def __init__(self, hostName = "localhost", port = GPSD_PORT, fixFilter = None):
+        """
+        Constructor
+
+        Only stores the given parameters in instance variables. No connection is being established here.
+
+        @param hostName: Hostname or IP address of gpsd
+        @type hostName: C{String}
+        @param port: Port, gpsd is listening on
+        @type port: C{int}
+        @param fixFilter: Filter for the fixes passed on (default passes on every fix with at least a two-dimensional fix)
+        @type fixFilter: L{FixFilter}
+        """
+        self._hostName = hostName
+        self._port = port
+        if fixFilter is None:
+            fixFilter = FixFilter()
+        self._filter = fixFilter
+        self._s = None
+        self._incoming = ""
+        self._callbacks = []
+        self._version = None
+        self._lastReport = None
+        self._reports = 0
+        self._invalid = 0
+
+    def connect(self):
+        """
+        Connects to gpsd and asks it to stream its reports as JSON.
+
+        Raises an L{GLSException.GLSException} if gpsd is not reachable.
+        """
+        if self._s is not None:
+            return
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.connect((self._hostName, self._port))
+            s.sendall(WATCH_ENABLE)
+            s.setblocking(0)
+        except socket.error, e:
+            raise GLSException.GLSException("Connection to gpsd could not be established.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+        self._s = s
+        self._incoming = ""
+        self._filter.reset()
+
+    def close(self):
+        """
+        Stops the stream of reports and closes the connection to gpsd.
+        """
+        if self._s is None:
+            return
+        try:
+            self._s.setblocking(1)
+            self._s.sendall(WATCH_DISABLE)
+            self._s.close()
+        except socket.error:
+            pass
+        self._s = None
+
+    def fileno(self):
+        """
+        Delivers the file descriptor of the socket for waiting on it in a select loop.
+
+        @return: File descriptor (the connection is established if required)
+        @rtype: C{int}
+        """
+        self.connect()
+        return self._s.fileno()
+
+    def addCallback(self, callback):
+        """
+        Registers a function, which is called with each position passed on and the TPV report it was taken from.
+
+        @param callback: Function to be called with the position (L{PythonGLS.Position}) and the report (C{Dict})
+        @type callback: C{Function}
+        """
+        self._callbacks.append(callback)
+
+    def removeCallback(self, callback):
+        """
+        Unregisters a function, which has been registered with L{addCallback} before.
+
+        @param callback: Function, which shall not be called anymore
+        @type callback: C{Function}
+        """
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def poll(self, timeout = 0.0):
+        """
+        Processes all data available from gpsd.
+
+        Waits at most for the given time for data to arrive. Raises an L{GLSException.GLSException} if the connection has
+        been lost; the next poll connects again.
+
+        @param timeout: Maximum time (in seconds) to wait for data (C{None} for waiting until data arrives)
+        @type timeout: C{float}
+        @return: Positions passed on by the filter (in the order of their reports)
+        @rtype: C{List} of L{PythonGLS.Position}
+        """
+        self.connect()
+        try:
+            readable, writable, failed = select.select([self._s], [], [], timeout)
+        except select.error, e:
+            if e.args[0] == errno.EINTR:
+                return []
+            raise
+        if not readable:
+            return []
+        chunks = []
+        while 1:
+            try:
+                data = self._s.recv(RECV_SIZE)
+            except socket.error, e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                self._dropConnection()
+                raise GLSException.GLSException("Connection to gpsd lost.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+            if not data:
+                if chunks:
+                    break
+                self._dropConnection()
+                raise GLSException.GLSException("Connection closed by gpsd.", GLSException.EC_CONNECTION_LOST, "gpsd closed the connection.")
+            chunks.append(data)
+            if len(data) < RECV_SIZE:
+                break
+        return self._processData("".join(chunks), time.time())
+
+    def positions(self, timeout = None):
+        """
+        Delivers the positions passed on by the filter one by one as they arrive.
+
+        The generator ends, if no data has arrived within the given time or if the connection is closed (see L{close}).
+
+        @param timeout: Maximum time (in seconds) to wait for the next data (C{None} for waiting forever)
+        @type timeout: C{float}
+        @return: Generator for the positions passed on
+        @rtype: C{Generator} of L{PythonGLS.Position}
+        """
+        while 1:
+            self.connect()
+            fileno = self._s.fileno()
+            readable, writable, failed = select.select([fileno], [], [], timeout)
+            if not readable:
+                return
+            for position in self.poll():
+                yield position
+            if self._s is None:
+                return
+
+    def _dropConnection(self):
+        """
+        Closes the socket to gpsd without notifying gpsd.
+        """
+        try:
+            self._s.close()
+        except socket.error:
+            pass
+        self._s = None
+        self._incoming = ""
+
+    def _processData(self, data, now):
+        """
+        Supporting function to process data received from gpsd line by line; an incomplete line at the end is kept.
+
+        @param data: Data received
+        @type data: C{String}
+        @param now: Time the data was received
+        @type now: C{float}
+        @return: Positions passed on by the filter
+        @rtype: C{List} of L{PythonGLS.Position}
+        """
+        lines = (self._incoming + data).split("\n")
+        self._incoming = lines.pop()
+        ret = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                report = json.loads(line)
+            except ValueError:
+                self._invalid += 1
+                continue
+            if not isinstance(report, dict):
+                self._invalid += 1
+                continue
+            kind = report.get("class")
+            if kind == "TPV":
+                position = self._processReport(report, now)
+                if position is not None:
+                    ret.append(position)
+            elif kind == "VERSION":
+                self._version = report
+        return ret
+
+    def _processReport(self, report, now):
+        """
+        Supporting function to turn a TPV report into a position and to pass it through the filter.
+
+        @return: Position passed on by the filter (C{None} if dropped)
+        @rtype: L{PythonGLS.Position}
+        """
+        self._reports += 1
+        self._lastReport = report
+        position = reportToPosition(report)
+        if not self._filter.accept(report, position, now):
+            return None
+        for callback in self._callbacks:
+            callback(position, report)
+        return position
+
+    def getFilter(self):
+        """
+        GETTER
+
+        @return: Filter for the fixes passed on
+        @rtype: L{FixFilter}
+        """
+        return self._filter
+
+    def getVersion(self):
+        """
+        GETTER
+
+        @return: VERSION report of gpsd (C{None} if not received yet)
+        @rtype: C{Dict}
+        """
+        return self._version
+
+    def getLastReport(self):
+        """
+        GETTER
+
+        @return: Last TPV report received, whether passed on or not (C{None} if none received yet)
+        @rtype: C{Dict}
+        """
+        return self._lastReport
+
+    def getStatistics(self):
+        """
+        GETTER
+
+        @return: Number of TPV reports received ("reports"), of lines not understood ("invalid") and the figures of the filter (see L{FixFilter.getStatistics})
+        @rtype: C{Dict} of C{String} | C{int}
+        """
+        ret = self._filter.getStatistics()
+        ret["reports"] = self._reports
+        ret["invalid"] = self._invalid
+        return ret
@@ -0,0 +1,214 @@
+"""
+Python library for GPS Location Sharing - distances, bearings and destinations on the earth.
+
+The earth is treated as a sphere with the mean radius (see L{EARTH_RADIUS}); compared to the ellipsoid, distances
+are off by at most 0.5 percent, which is good enough for navigating between members of a group.
+
+Besides the functions for single points, there are batch functions for one-to-many (from one point to many
+members) and many-to-many (matrix) computations. Batches take positions or waypoints as list, as dictionary (in the
+order of C{keys()}) or as L{PositionTable.PositionTable}. If NumPy is installed, batches are computed vectorized and
+delivered as NumPy arrays; otherwise, they are computed point by point and delivered as arrays of the standard
+library (C{array.array}).
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var EARTH_RADIUS: Mean radius of the earth in metres
+@type EARTH_RADIUS: C{float}
+"""
+import math
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS = 6371008.8
+
+def distance(latitude1, longitude1, latitude2, longitude2):
+    """
+    Computes the great circle distance between two points (haversine formula).
+
+    @return: Distance in metres
+    @rtype: C{float}
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+def bearing(latitude1, longitude1, latitude2, longitude2):
+    """
+    Computes the initial bearing on the great circle from the first to the second point.
+
+    @return: Bearing in degrees (0 is north, 90 is east)
+    @rtype: C{float}
+    """
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    deltaLambda = math.radians(longitude2 - longitude1)
+    theta = math.atan2(math.sin(deltaLambda) * math.cos(phi2), math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(deltaLambda))
+    return (math.degrees(theta) + 360) % 360
+
+def destination(latitude, longitude, bearing, distance):
+    """
+    Computes the point reached when travelling on the great circle from a point with the given initial bearing.
+
+    @param bearing: Initial bearing in degrees (0 is north, 90 is east)
+    @type bearing: C{float}
+    @param distance: Distance in metres
+    @type distance: C{float}
+    @return: Latitude and longitude of the destination
+    @rtype: C{Tuple} of C{float}
+    """
+    phi1 = math.radians(latitude)
+    delta = distance / EARTH_RADIUS
+    theta = math.radians(bearing)
+    sinPhi2 = math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    phi2 = math.asin(max(-1.0, min(1.0, sinPhi2)))
+    deltaLambda = math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi1), math.cos(delta) - math.sin(phi1) * sinPhi2)
+    return math.degrees(phi2), (longitude + math.degrees(deltaLambda) + 540) % 360 - 180
+
+def coordinates(items):
+    """
+    Delivers latitudes and longitudes of a batch of positions or waypoints.
+
+    @param items: Positions or waypoints
+    @type items: C{List} or C{Dict} of L{PythonGLS.Position} or L{PythonGLS.Waypoint}, or L{PositionTable.PositionTable}
+    @return: Latitudes and longitudes (NumPy arrays if NumPy is installed)
+    @rtype: C{Tuple} of C{numpy.ndarray} or C{array.array}
+    """
+    if hasattr(items, "getLatitudes"):
+        latitudes, longitudes = items.getLatitudes(), items.getLongitudes()
+    else:
+        if hasattr(items, "values"):
+            items = items.values()
+        latitudes = array.array("d", [item.getLatitude() for item in items])
+        longitudes = array.array("d", [item.getLongitude() for item in items])
+    if numpy is not None:
+        return numpy.asarray(latitudes, dtype = numpy.float64), numpy.asarray(longitudes, dtype = numpy.float64)
+    return latitudes, longitudes
+
+def distancesFrom(origin, items):
+    """
+    Computes the distances from one point to many positions or waypoints.
+
+    @param origin: Point to start from
+    @type origin: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+    @param items: Positions or waypoints (see L{coordinates})
+    @return: Distance in metres for each item
+    @rtype: C{numpy.ndarray} or C{array.array}
+    """
+    latitudes, longitudes = coordinates(items)
+    latitude, longitude = origin.getLatitude(), origin.getLongitude()
+    if numpy is not None:
+        return _distances(numpy.radians(latitude), numpy.radians(longitude), numpy.radians(latitudes), numpy.radians(longitudes))
+    return array.array("d", [distance(latitude, longitude, latitudes[i], longitudes[i]) for i in range(len(latitudes))])
+
+def bearingsFrom(origin, items):
+    """
+    Computes the initial bearings from one point to many positions or waypoints.
+
+    @param origin: Point to start from
+    @type origin: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+    @param items: Positions or waypoints (see L{coordinates})
+    @return: Bearing in degrees for each item
+    @rtype: C{numpy.ndarray} or C{array.array}
+    """
+    latitudes, longitudes = coordinates(items)
+    latitude, longitude = origin.getLatitude(), origin.getLongitude()
+    if numpy is not None:
+        return _bearings(numpy.radians(latitude), numpy.radians(longitude), numpy.radians(latitudes), numpy.radians(longitudes))
+    return array.array("d", [bearing(latitude, longitude, latitudes[i], longitudes[i]) for i in range(len(latitudes))])
+
+def distanceMatrix(sources, targets):
+    """
+    Computes the distances from each of many points to each of many other points.
+
+    @param sources: Positions or waypoints to start from (see L{coordinates})
+    @param targets: Positions or waypoints to go to (see L{coordinates})
+    @return: Distances in metres; one row per source, one column per target
+    @rtype: C{numpy.ndarray} (two dimensional) or C{List} of C{array.array}
+    """
+    sourceLatitudes, sourceLongitudes = coordinates(sources)
+    targetLatitudes, targetLongitudes = coordinates(targets)
+    if numpy is not None:
+        return _distances(numpy.radians(sourceLatitudes)[:, numpy.newaxis], numpy.radians(sourceLongitudes)[:, numpy.newaxis],
+                          numpy.radians(targetLatitudes)[numpy.newaxis, :], numpy.radians(targetLongitudes)[numpy.newaxis, :])
+    ret = []
+    for i in range(len(sourceLatitudes)):
+        ret.append(array.array("d", [distance(sourceLatitudes[i], sourceLongitudes[i], targetLatitudes[j], targetLongitudes[j]) for j in range(len(targetLatitudes))]))
+    return ret
+
+def bearingMatrix(sources, targets):
+    """
+    Computes the initial bearings from each of many points to each of many other points.
+
+    @param sources: Positions or waypoints to start from (see L{coordinates})
+    @param targets: Positions or waypoints to go to (see L{coordinates})
+    @return: Bearings in degrees; one row per source, one column per target
+    @rtype: C{numpy.ndarray} (two dimensional) or C{List} of C{array.array}
+    """
+    sourceLatitudes, sourceLongitudes = coordinates(sources)
+    targetLatitudes, targetLongitudes = coordinates(targets)
+    if numpy is not None:
+        return _bearings(numpy.radians(sourceLatitudes)[:, numpy.newaxis], numpy.radians(sourceLongitudes)[:, numpy.newaxis],
+                         numpy.radians(targetLatitudes)[numpy.newaxis, :], numpy.radians(targetLongitudes)[numpy.newaxis, :])
+    ret = []
+    for i in range(len(sourceLatitudes)):
+        ret.append(array.array("d", [bearing(sourceLatitudes[i], sourceLongitudes[i], targetLatitudes[j], targetLongitudes[j]) for j in range(len(targetLatitudes))]))
+    return ret
+
+def destinations(items, bearings, distances):
+    """
+    Computes the points reached when travelling from many positions or waypoints, each with its own bearing and
+    distance.
+
+    @param items: Positions or waypoints to start from (see L{coordinates})
+    @param bearings: Initial bearing in degrees for each item (or one bearing for all)
+    @type bearings: C{Sequence} of C{float} or C{float}
+    @param distances: Distance in metres for each item (or one distance for all)
+    @type distances: C{Sequence} of C{float} or C{float}
+    @return: Latitudes and longitudes of the destinations
+    @rtype: C{Tuple} of C{numpy.ndarray} or C{array.array}
+    """
+    latitudes, longitudes = coordinates(items)
+    if numpy is not None:
+        phi1 = numpy.radians(latitudes)
+        delta = numpy.asarray(distances, dtype = numpy.float64) / EARTH_RADIUS
+        theta = numpy.radians(numpy.asarray(bearings, dtype = numpy.float64))
+        sinPhi2 = numpy.sin(phi1) * numpy.cos(delta) + numpy.cos(phi1) * numpy.sin(delta) * numpy.cos(theta)
+        phi2 = numpy.arcsin(numpy.clip(sinPhi2, -1.0, 1.0))
+        deltaLambda = numpy.arctan2(numpy.sin(theta) * numpy.sin(delta) * numpy.cos(phi1), numpy.cos(delta) - numpy.sin(phi1) * sinPhi2)
+        return numpy.degrees(phi2), (longitudes + numpy.degrees(deltaLambda) + 540) % 360 - 180
+    if not hasattr(bearings, "__len__"):
+        bearings = [bearings] * len(latitudes)
+    if not hasattr(distances, "__len__"):
+        distances = [distances] * len(latitudes)
+    retLatitudes = array.array("d")
+    retLongitudes = array.array("d")
+    for i in range(len(latitudes)):
+        latitude, longitude = destination(latitudes[i], longitudes[i], bearings[i], distances[i])
+        retLatitudes.append(latitude)
+        retLongitudes.append(longitude)
+    return retLatitudes, retLongitudes
+
+def _distances(phi1, lambda1, phi2, lambda2):
+    """
+    Supporting function to compute distances with NumPy (haversine formula); arguments in radians, broadcasted.
+    """
+    a = numpy.sin((phi2 - phi1) / 2) ** 2 + numpy.cos(phi1) * numpy.cos(phi2) * numpy.sin((lambda2 - lambda1) / 2) ** 2
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
+
+def _bearings(phi1, lambda1, phi2, lambda2):
+    """
+    Supporting function to compute initial bearings with NumPy; arguments in radians, broadcasted.
+    """
+    deltaLambda = lambda2 - lambda1
+    theta = numpy.arctan2(numpy.sin(deltaLambda) * numpy.cos(phi2), numpy.cos(phi1) * numpy.sin(phi2) - numpy.sin(phi1) * numpy.cos(phi2) * numpy.cos(deltaLambda))
+    return (numpy.degrees(theta) + 360) % 360
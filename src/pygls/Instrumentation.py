@@ -0,0 +1,325 @@
+"""
+Python library for GPS Location Sharing - instrumentation of the connection to the GLS Server.
+
+Hooks are registered with a connection (L{ServerConnection.ServerConnection.addHook}); the connection calls them
+before each command is written to the server and after its reply has been received. As long as no hook is
+registered, the connection does not take any measurements. Example::
+
+    metrics = ConnectionMetrics()
+    s = ServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    s.addHook(metrics)
+    s.requestPositions("OpenMoko")
+    print metrics.snapshot()["commands"]["P"]["count"]
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var HISTOGRAM_BOUNDS: Upper bounds (in milliseconds) of the buckets of the latency histograms; the last bucket has no upper bound
+@type HISTOGRAM_BOUNDS: C{Tuple} of C{float}
+"""
+import threading
+import bisect
+
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class ConnectionHook:
+    """
+    Interface for hooks of a connection; all methods do nothing. Subclasses override the ones they are interested in.
+
+    Hooks are called in the thread using the connection; they must not send commands on the connection themselves.
+    """
+
+    def beforeCommand(self, connection, command):
+        """
+        A command is about to be written to the server.
+
+        Pipelined commands are written in one go; this method is called for all of them before writing.
+
+        @param connection: Connection the command is sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        """
+        pass
+
+    def afterCommand(self, connection, command, error, lines, received, duration, wait):
+        """
+        The reply for a command has been received completely (or the command failed).
+
+        The duration is measured from the start of receiving the reply until its last line has been read; for pipelined
+        commands, this is the time after the reply to the previous command. For replies delivered line by line
+        (L{ServerConnection.ServerConnection.iterPositions} and alike), it includes the time spent by the caller
+        processing the lines.
+
+        @param connection: Connection the command was sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        @param error: Error for the command (C{None} if the command was sucessful)
+        @type error: L{GLSException.GLSException}
+        @param lines: Number of lines of the reply
+        @type lines: C{int}
+        @param received: Number of bytes of the reply (including line feeds)
+        @type received: C{int}
+        @param duration: Time (in seconds) for receiving the reply
+        @type duration: C{float}
+        @param wait: Part of the duration (in seconds) spent waiting for data from the network
+        @type wait: C{float}
+        """
+        pass
+
+    def afterParse(self, connection, command, duration):
+        """
+        A reply has been decoded into positions, waypoints or groups after it had been received completely.
+
+        @param connection: Connection the command was sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        @param duration: Time (in seconds) for decoding the reply
+        @type duration: C{float}
+        """
+        pass
+
+    def connected(self, connection, duration, reconnect):
+        """
+        The connection to the server has been established (including the handshake).
+
+        @param connection: Connection, which has been established
+        @type connection: L{ServerConnection.ServerConnection}
+        @param duration: Time (in seconds) for connecting and the handshake
+        @type duration: C{float}
+        @param reconnect: 1 if the connection had been established before (and was closed or lost since); 0 otherwise
+        @type reconnect: C{int}
+        """
+        pass
+
+
+class _CommandStatistics:
+    """
+    Counters and latency histogram for one command letter.
+
+    @ivar count: Number of commands answered (or failed)
+    @type count: C{int}
+    @ivar errors: Number of commands failed
+    @type errors: C{int}
+    @ivar sent: Number of bytes sent (including line feeds)
+    @type sent: C{int}
+    @ivar received: Number of bytes received (including line feeds)
+    @type received: C{int}
+    @ivar lines: Number of lines received
+    @type lines: C{int}
+    @ivar duration: Time (in seconds) for receiving the replies
+    @type duration: C{float}
+    @ivar wait: Part of the duration (in seconds) spent waiting for data from the network
+    @type wait: C{float}
+    @ivar parse: Time (in seconds) for decoding the replies after they had been received
+    @type parse: C{float}
+    @ivar histogram: Number of commands per latency bucket (see L{HISTOGRAM_BOUNDS}); the last bucket counts the commands above the highest bound
+    @type histogram: C{List} of C{int}
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.count = 0
+        self.errors = 0
+        self.sent = 0
+        self.received = 0
+        self.lines = 0
+        self.duration = 0.0
+        self.wait = 0.0
+        self.parse = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def snapshot(self):
+        """
+        Delivers the current figures of the command letter.
+
+        @return: Counters, times in milliseconds ("timeMs", "waitMs", "parseMs") and the latency histogram ("histogram"; the keys name the bounds of the buckets)
+        @rtype: C{Dict}
+        """
+        histogram = {}
+        for i in range(len(HISTOGRAM_BOUNDS)):
+            histogram["<=%gms" %(HISTOGRAM_BOUNDS[i])] = self.histogram[i]
+        histogram[">%gms" %(HISTOGRAM_BOUNDS[-1])] = self.histogram[-1]
+        return {"count": self.count,
+                "errors": self.errors,
+                "bytesSent": self.sent,
+                "bytesReceived": self.received,
+                "lines": self.lines,
+                "timeMs": self.duration * 1000,
+                "waitMs": self.wait * 1000,
+                "parseMs": (self.duration - self.wait + self.parse) * 1000,
+                "histogram": histogram}
+
+
+class ConnectionMetrics(ConnectionHook):
+    """
+    Hook collecting counters and latency histograms per command letter (V, N, D, G, P, W, Q).
+
+    One instance may be registered with several connections (for instance all connections of a
+    L{ConnectionPool.ConnectionPool}); the figures are summed up. All methods may be called from several threads.
+
+    The time for a command is split into the time spent waiting for the network and the time spent by the client for
+    parsing the reply (splitting it into lines, checking it and decoding it into positions, waypoints or groups).
+
+    @ivar _commands: Statistics per command letter
+    @type _commands: C{Dict} of C{String} | L{_CommandStatistics}
+    @ivar _connects: Number of connections established
+    @type _connects: C{int}
+    @ivar _reconnects: Number of connections established again after having been closed or lost
+    @type _reconnects: C{int}
+    @ivar _connectTime: Time (in seconds) spent for connecting and the handshakes
+    @type _connectTime: C{float}
+    @ivar _lock: Lock for protecting the figures
+    @type _lock: L{threading.Lock}
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all figures back to zero.
+        """
+        self._lock.acquire()
+        try:
+            self._commands = {}
+            self._connects = 0
+            self._reconnects = 0
+            self._connectTime = 0.0
+        finally:
+            self._lock.release()
+
+    def _getStatistics(self, command):
+        """
+        Supporting function to look up (or create) the statistics for the letter of a command; the lock must be held.
+        """
+        letter = command[:1]
+        statistics = self._commands.get(letter)
+        if statistics is None:
+            statistics = self._commands[letter] = _CommandStatistics()
+        return statistics
+
+    def beforeCommand(self, connection, command):
+        """
+        Counts the bytes sent for the command.
+
+        @param connection: Connection the command is sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        """
+        self._lock.acquire()
+        try:
+            self._getStatistics(command).sent += len(command) + 1
+        finally:
+            self._lock.release()
+
+    def afterCommand(self, connection, command, error, lines, received, duration, wait):
+        """
+        Counts the command and its reply and puts the duration into the latency histogram.
+
+        @param connection: Connection the command was sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        @param error: Error for the command (C{None} if the command was sucessful)
+        @type error: L{GLSException.GLSException}
+        @param lines: Number of lines of the reply
+        @type lines: C{int}
+        @param received: Number of bytes of the reply (including line feeds)
+        @type received: C{int}
+        @param duration: Time (in seconds) for receiving the reply
+        @type duration: C{float}
+        @param wait: Part of the duration (in seconds) spent waiting for data from the network
+        @type wait: C{float}
+        """
+        self._lock.acquire()
+        try:
+            statistics = self._getStatistics(command)
+            statistics.count += 1
+            if error is not None:
+                statistics.errors += 1
+            statistics.lines += lines
+            statistics.received += received
+            statistics.duration += duration
+            statistics.wait += wait
+            statistics.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS, duration * 1000)] += 1
+        finally:
+            self._lock.release()
+
+    def afterParse(self, connection, command, duration):
+        """
+        Adds the time for decoding the reply to the parse time of the command.
+
+        @param connection: Connection the command was sent on
+        @type connection: L{ServerConnection.ServerConnection}
+        @param command: Command (without line feed)
+        @type command: C{String}
+        @param duration: Time (in seconds) for decoding the reply
+        @type duration: C{float}
+        """
+        self._lock.acquire()
+        try:
+            self._getStatistics(command).parse += duration
+        finally:
+            self._lock.release()
+
+    def connected(self, connection, duration, reconnect):
+        """
+        Counts the connection (and the reconnect) and adds the time for connecting.
+
+        @param connection: Connection, which has been established
+        @type connection: L{ServerConnection.ServerConnection}
+        @param duration: Time (in seconds) for connecting and the handshake
+        @type duration: C{float}
+        @param reconnect: 1 if the connection had been established before (and was closed or lost since); 0 otherwise
+        @type reconnect: C{int}
+        """
+        self._lock.acquire()
+        try:
+            self._connects += 1
+            if reconnect:
+                self._reconnects += 1
+            self._connectTime += duration
+        finally:
+            self._lock.release()
+
+    def snapshot(self):
+        """
+        Delivers the current figures.
+
+        Times are given in milliseconds. The latency histogram of a command counts the commands per bucket; the keys name
+        the upper bound of the bucket (see L{HISTOGRAM_BOUNDS}).
+
+        @return: Figures per command letter (key "commands") and in total (all other keys)
+        @rtype: C{Dict}
+        """
+        self._lock.acquire()
+        try:
+            commands = {}
+            for letter, statistics in self._commands.items():
+                commands[letter] = statistics.snapshot()
+            connects = self._connects
+            reconnects = self._reconnects
+            connectTime = self._connectTime
+        finally:
+            self._lock.release()
+        ret = {"commands": commands,
+               "connects": connects,
+               "reconnects": reconnects,
+               "connectMs": connectTime * 1000}
+        for key in ("count", "errors", "bytesSent", "bytesReceived", "lines", "timeMs", "waitMs", "parseMs"):
+            ret[key] = sum([statistics[key] for statistics in commands.values()])
+        return ret
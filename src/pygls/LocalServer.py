@@ -0,0 +1,473 @@
+"""
+Python library for GPS Location Sharing - local stand-in for the GLS server.
+
+The local server speaks version 2 of the GLS protocol as used by L{ServerConnection.ServerConnection}: the
+greeting, the handshake (V, N, D), listing and joining groups (G), sending and requesting positions and waypoints
+(P, W, replies terminated by F) and quitting (Q). Each group contains a configurable number of simulated members
+(with a configurable number of waypoints each) besides the clients connected to the group; hence, the size of the
+replies may be chosen freely.
+
+Many clients are served concurrently by one asyncore loop running in a background thread, so the server may be
+started and stopped from within a test program. The loop waits with C{poll()} (where available), so the number of
+clients is not limited by C{select()} (1024 sockets) but only by the limit of open files of the process::
+
+    server = LocalServer(members = 1000)
+    server.start()
+    s = ServerConnection("127.0.0.1", server.getPort(), "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    print len(s.requestPositions("OpenMoko"))
+    s.closeConnection()
+    server.stop()
+
+Started from the command line, the server listens on the port of the test programs (47757)::
+
+    python LocalServer.py [PORT] [MEMBERS]
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var DEFAULT_PORT: Port of the GLS server used by the test programs
+@type DEFAULT_PORT: C{int}
+@var DEFAULT_GROUPS: Groups available on the local server by default
+@type DEFAULT_GROUPS: C{Tuple} of C{String}
+"""
+import asynchat
+import asyncore
+import socket
+import threading
+import random
+import GLSCommands
+import GLSException
+
+DEFAULT_PORT = 47757
+DEFAULT_GROUPS = ("OpenMoko", "Other")
+BACKLOG = 1024      # connections waiting to be accepted; with a full queue, the kernel may fall back to SYN cookies and lose data
+
+class LocalServer(asyncore.dispatcher):
+    """
+    Local stand-in for the GLS server.
+
+    Replies for the simulated members are assembled once per group; requests only add the positions and waypoints
+    of the connected clients.
+
+    @ivar _address: Host name and port, the server is listening on (the port is assigned on start if 0 is given)
+    @type _address: C{Tuple} of C{String} and C{int}
+    @ivar _versions: Versions of the GLS specification accepted by the server
+    @type _versions: C{List} of C{String}
+    @ivar _accounts: Passwords by client name (C{None} for accepting any client)
+    @type _accounts: C{Dict} of C{String} | C{String}
+    @ivar _groups: State of each group (see L{_Group})
+    @type _groups: C{Dict} of C{String} | L{_Group}
+    @ivar _map: Socket map of the asyncore loop of this server (separate from the global map of asyncore)
+    @type _map: C{Dict}
+    @ivar _thread: Thread running the asyncore loop (C{None} if not started)
+    @type _thread: C{threading.Thread}
+    @ivar _running: State of the loop (1 while the server shall keep on running)
+    @type _running: C{int}
+    @ivar _started: Set as soon as the server is listening
+    @type _started: C{threading.Event}
+    @ivar _error: Error, which has stopped the loop (C{None} while running or if stopped by L{stop})
+    @type _error: L{GLSException.GLSException}
+    """
+
+    def __init__(self, host = "127.0.0.1", port = 0, members = 10, waypoints = 1, groups = DEFAULT_GROUPS, versions = ("2",), accounts = None, seed = 0):
+        """
+        Constructor
+
+        Only stores the given parameters and generates the simulated members; the server starts listening with L{start}.
+
+        @param host: Host name or IP address to listen on
+        @type host: C{String}
+        @param port: Port to listen on (0 for any free port; see L{getPort})
+        @type port: C{int}
+        @param members: Number of simulated members in each group
+        @type members: C{int}
+        @param waypoints: Number of waypoints of each simulated member
+        @type waypoints: C{int}
+        @param groups: Names of the available groups
+        @type groups: C{List} of C{String}
+        @param versions: Versions of the GLS specification accepted by the server
+        @type versions: C{List} of C{String}
+        @param accounts: Passwords by client name (C{None} for accepting any client)
+        @type accounts: C{Dict} of C{String} | C{String}
+        @param seed: Seed for the positions of the simulated members (same seed, same positions)
+        @type seed: C{int}
+        """
+        self._map = {}
+        asyncore.dispatcher.__init__(self, map = self._map)
+        self._address = (host, port)
+        self._versions = list(versions)
+        self._accounts = accounts
+        self._groups = {}
+        generator = random.Random(seed)
+        for name in groups:
+            self._groups[name] = _Group(generator, members, waypoints)
+        self._thread = None
+        self._running = 0
+        self._started = threading.Event()
+        self._error = None
+
+    def start(self):
+        """
+        Starts listening and serving clients in a background thread.
+
+        Returns as soon as the server accepts connections. If the server has died (see L{getError}), it is started again.
+        """
+        if self.isRunning():
+            return
+        if self._thread is not None:
+            self.stop()
+        self._error = None
+        self._listen()
+        self._running = 1
+        self._thread = threading.Thread(target = self._run, name = "LocalServer")
+        self._thread.setDaemon(1)
+        self._thread.start()
+        self._started.wait()
+
+    def _listen(self):
+        """
+        Supporting function to open the listening socket.
+        """
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind(self._address)
+        self.listen(BACKLOG)
+        self._address = self.socket.getsockname()
+
+    def _run(self):
+        """
+        Supporting function running the asyncore loop until the server is stopped.
+
+        If the loop fails, the error is kept (see L{getError}) and the server stops serving.
+        """
+        self._started.set()
+        try:
+            try:
+                while self._running:
+                    asyncore.loop(timeout = 0.05, map = self._map, count = 1, use_poll = True)
+            except Exception, e:
+                self._error = GLSException.GLSException("Local server died.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+                self._running = 0
+        finally:
+            asyncore.close_all(map = self._map)
+
+    def stop(self):
+        """
+        Stops the server; all client connections are closed.
+        """
+        if self._thread is None:
+            return
+        self._running = 0
+        self._thread.join()
+        self._thread = None
+        self._started.clear()
+
+    def serveForever(self):
+        """
+        Starts listening and serves clients in the current thread (until interrupted).
+        """
+        self._listen()
+        try:
+            asyncore.loop(timeout = 1.0, map = self._map, use_poll = True)
+        finally:
+            asyncore.close_all(map = self._map)
+
+    def isRunning(self):
+        """
+        Checks, whether the server is serving clients.
+
+        @return: 1 if the server has been started and neither stopped nor died since; 0 otherwise
+        @rtype: C{int}
+        """
+        return self._thread is not None and self._running
+
+    def getError(self):
+        """
+        GETTER
+
+        @return: Error, which has stopped the loop (C{None} while running or if stopped by L{stop})
+        @rtype: L{GLSException.GLSException}
+        """
+        return self._error
+
+    def getHost(self):
+        """
+        GETTER
+        """
+        return self._address[0]
+
+    def getPort(self):
+        """
+        GETTER
+
+        @return: Port, the server is listening on (assigned when started if 0 was given)
+        @rtype: C{int}
+        """
+        return self._address[1]
+
+    def getClientCount(self):
+        """
+        Delivers the number of connected clients.
+
+        @rtype: C{int}
+        """
+        return len([d for d in self._map.values() if isinstance(d, _ClientSession)])
+
+    def handle_accept(self):
+        """
+        Accepts a new client and sends the greeting (the versions supported).
+        """
+        pair = self.accept()
+        if pair is not None:
+            _ClientSession(self, pair[0], self._map)
+
+    def handle_error(self):
+        """
+        Errors while accepting are not fatal for the server.
+        """
+        pass
+
+    def _checkVersion(self, version):
+        """
+        Supporting function to check a requested version.
+        """
+        return version in self._versions
+
+    def _checkLogin(self, clientName, password):
+        """
+        Supporting function to check the login of a client.
+        """
+        if self._accounts is None:
+            return 1
+        return self._accounts.has_key(clientName) and self._accounts[clientName] == password
+
+
+class _Group:
+    """
+    State of one group of the local server.
+
+    @ivar _staticPositions: Reply lines for the positions of the simulated members (joined, with line feeds)
+    @type _staticPositions: C{String}
+    @ivar _staticWaypoints: Reply lines for the waypoints of the simulated members (joined, with line feeds)
+    @type _staticWaypoints: C{String}
+    @ivar _positions: Reply line for the last position of each connected client
+    @type _positions: C{Dict} of C{String} | C{String}
+    @ivar _waypoints: Reply lines for the waypoints of each connected client
+    @type _waypoints: C{Dict} of C{String} | C{List} of C{String}
+    """
+
+    def __init__(self, generator, members, waypoints):
+        """
+        Constructor
+
+        Generates the simulated members around a random center.
+        """
+        latitude = generator.uniform(-60, 60)
+        longitude = generator.uniform(-180, 180)
+        positions = []
+        waypointLines = []
+        for i in range(members):
+            name = "member%05d" %(i)
+            positions.append("%s%s,%.6f,%.6f,%.2f,%.2f,%.2f\n" %(GLSCommands.RE_POSITION, name, latitude + generator.gauss(0, 0.05), longitude + generator.gauss(0, 0.05), generator.uniform(0, 500), generator.uniform(0, 30), generator.uniform(0, 360)))
+            for j in range(waypoints):
+                waypointLines.append("%s%s,%.6f,%.6f,%.2f,waypoint %d of %s\n" %(GLSCommands.RE_WAYPOINT, name, latitude + generator.gauss(0, 0.05), longitude + generator.gauss(0, 0.05), generator.uniform(0, 500), j, name))
+        self._staticPositions = "".join(positions)
+        self._staticWaypoints = "".join(waypointLines)
+        self._positions = {}
+        self._waypoints = {}
+
+    def positionsFor(self, clientName):
+        """
+        Assembles the "P" reply for a client (positions of all others).
+        """
+        others = [line for name, line in self._positions.iteritems() if name != clientName]
+        return self._staticPositions + "".join(others) + GLSCommands.RE_FINISHED + "\n"
+
+    def waypointsFor(self, clientName):
+        """
+        Assembles the "W" reply for a client (waypoints of all others).
+        """
+        others = ["".join(lines) for name, lines in self._waypoints.iteritems() if name != clientName]
+        return self._staticWaypoints + "".join(others) + GLSCommands.RE_FINISHED + "\n"
+
+    def setPosition(self, clientName, values):
+        """
+        Stores the position of a connected client.
+        """
+        self._positions[clientName] = "%s%s,%s\n" %(GLSCommands.RE_POSITION, clientName, values)
+
+    def addWaypoint(self, clientName, values):
+        """
+        Stores a waypoint of a connected client.
+        """
+        self._waypoints.setdefault(clientName, []).append("%s%s,%s\n" %(GLSCommands.RE_WAYPOINT, clientName, values))
+
+
+class _ClientSession(asynchat.async_chat):
+    """
+    Session of one client on the local server.
+
+    @ivar _server: Server, this session belongs to
+    @type _server: L{LocalServer}
+    @ivar _incoming: Parts of the line currently being received
+    @type _incoming: C{List} of C{String}
+    @ivar _clientName: Name of the client (C{None} until logged in)
+    @type _clientName: C{String}
+    @ivar _group: Group joined by the client (C{None} until joined)
+    @type _group: L{_Group}
+    @ivar _replies: Replies to the commands received with the current read (written in one go afterwards)
+    @type _replies: C{List} of C{String}
+    @ivar _quitting: Set after the client has quit; further commands are ignored
+    @type _quitting: C{int}
+    """
+
+    ac_out_buffer_size = 65536
+
+    def __init__(self, server, sock, map):
+        """
+        Constructor
+
+        Sends the greeting with the versions supported by the server.
+        """
+        asynchat.async_chat.__init__(self, sock, map = map)
+        self.set_terminator("\n")
+        self._server = server
+        self._incoming = []
+        self._clientName = None
+        self._group = None
+        self._replies = []
+        self._quitting = 0
+        try:
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except socket.error:
+            pass
+        self.push(GLSCommands.CO_VERSION + ",".join(server._versions) + "\n")
+
+    def collect_incoming_data(self, data):
+        """
+        Collects the parts of a line.
+        """
+        self._incoming.append(data)
+
+    def handle_read(self):
+        """
+        Processes all commands received with one read; the replies are written in one go (pipelined commands are
+        answered without one packet per reply).
+        """
+        asynchat.async_chat.handle_read(self)
+        if self._replies:
+            replies = "".join(self._replies)
+            self._replies = []
+            self.push(replies)
+            if self._quitting:
+                self.close_when_done()
+
+    def found_terminator(self):
+        """
+        Processes one command and queues the reply.
+        """
+        line = "".join(self._incoming)
+        self._incoming = []
+        if self._quitting:
+            return
+        if line.endswith("\r"):
+            line = line[:-1]
+        command, argument = line[:1], line[1:]
+        if command == GLSCommands.CO_QUIT:
+            self._replies.append(GLSCommands.RE_QUIT + "\n")
+            self._quitting = 1
+            return
+        self._replies.append(self._process(command, argument))
+
+    def _process(self, command, argument):
+        """
+        Supporting function to compute the reply to a command.
+
+        @return: Reply (including line feeds)
+        @rtype: C{String}
+        """
+        server = self._server
+        if command == GLSCommands.CO_VERSION:
+            return self._status(server._checkVersion(argument))
+        if command == GLSCommands.CO_LOGIN:
+            tokens = argument.split(",", 1)
+            if not tokens[0] or not server._checkLogin(tokens[0], len(tokens) > 1 and tokens[1] or None):
+                return GLSCommands.RE_ERROR + "\n"
+            self._clientName = tokens[0]
+            return GLSCommands.RE_OK + "\n"
+        if command == GLSCommands.CO_DEVICE:
+            return self._status(argument)
+        if self._clientName is None:
+            return GLSCommands.RE_CHANGE + "\n"
+        if command == GLSCommands.CO_GROUP:
+            if not argument:
+                names = server._groups.keys()
+                names.sort()
+                return "".join([GLSCommands.RE_GROUP + name + "\n" for name in names]) + GLSCommands.RE_FINISHED + "\n"
+            group = server._groups.get(argument)
+            if group is None:
+                return GLSCommands.RE_ERROR + "\n"
+            self._group = group
+            return GLSCommands.RE_OK + "\n"
+        if command == GLSCommands.CO_POSITION or command == GLSCommands.CO_WAYPOINT:
+            if self._group is None:
+                return GLSCommands.RE_CHANGE + "\n"
+            if not argument:
+                if command == GLSCommands.CO_POSITION:
+                    return self._group.positionsFor(self._clientName)
+                return self._group.waypointsFor(self._clientName)
+            if command == GLSCommands.CO_POSITION:
+                if not _checkNumbers(argument.split(","), 5):
+                    return GLSCommands.RE_ERROR + "\n"
+                self._group.setPosition(self._clientName, argument)
+            else:
+                tokens = argument.split(",", 3)
+                if len(tokens) != 4 or not _checkNumbers(tokens[:3], 3):
+                    return GLSCommands.RE_ERROR + "\n"
+                self._group.addWaypoint(self._clientName, argument)
+            return GLSCommands.RE_OK + "\n"
+        return GLSCommands.RE_ERROR + "\n"
+
+    def _status(self, ok):
+        """
+        Supporting function to compute a status reply (K or E).
+        """
+        if ok:
+            return GLSCommands.RE_OK + "\n"
+        return GLSCommands.RE_ERROR + "\n"
+
+    def handle_error(self):
+        """
+        A failing client only closes its own session.
+        """
+        self.close()
+
+
+def _checkNumbers(tokens, count):
+    """
+    Supporting function to validate the numbers of a command.
+    """
+    if len(tokens) != count:
+        return 0
+    try:
+        for token in tokens:
+            float(token)
+    except ValueError:
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    import sys
+    port = DEFAULT_PORT
+    members = 10
+    if len(sys.argv) > 1:
+        port = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        members = int(sys.argv[2])
+    print "Local GLS server listening on port %d with %d simulated members per group" %(port, members)
+    LocalServer("", port, members).serveForever()
@@ -0,0 +1,205 @@
+"""
+Python library for GPS Location Sharing - extrapolating the positions of others between two requests.
+
+Positions received from the server carry speed and bearing. Between two requests, the predictor moves each member on
+from its last fix along its bearing with its speed, so markers on a map move smoothly instead of jumping with each
+request; this way, the server may be polled less often at the same perceived freshness. Example::
+
+    predictor = MotionPredictor(maxHorizon = 30.0, blendTime = 2.0)
+    predictor.update(s.requestPositions(), time.time())
+    ...
+    for name, position in predictor.predict(time.time()).items():
+        drawMarker(name, position)
+
+Extrapolation stops after the maximum horizon (the member stays at the position reached). When a new fix arrives, the
+member does not jump to it: the difference between the position shown so far and the new fix fades out over the
+blend time.
+
+All members are extrapolated in one batch (see L{Geodesy.destinations}; vectorized if NumPy is installed).
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import array
+from PythonGLS import Position
+from Geodesy import destinations, numpy
+
+class MotionPredictor:
+    """
+    Extrapolates the positions of the members of a group from their last fixes.
+
+    Speeds of positions are converted to metres per second with the speed factor; the default expects metres per second
+    (see L{DeadReckoning.DeadReckoningPolicy}, which predicts the same way on the sending side).
+
+    @ivar _maxHorizon: Maximum time (in seconds) a fix is extrapolated for
+    @type _maxHorizon: C{float}
+    @ivar _blendTime: Time (in seconds) for fading from the position shown so far to a new fix
+    @type _blendTime: C{float}
+    @ivar _speedFactor: Factor converting the speed of a position into metres per second
+    @type _speedFactor: C{float}
+    @ivar _names: Names of the members (in the order of the columns)
+    @type _names: C{List} of C{String}
+    @ivar _fixes: Last fix of each member (in the order of the columns)
+    @type _fixes: C{List} of L{PythonGLS.Position}
+    @ivar _times: Time of the last fix of each member
+    @type _times: C{array.array}
+    @ivar _speeds: Speed of each member in metres per second
+    @type _speeds: C{array.array}
+    @ivar _bearings: Bearing of each member
+    @type _bearings: C{array.array}
+    @ivar _offsetLatitudes: Latitude of the position shown when the last fix arrived minus the latitude of the fix
+    @type _offsetLatitudes: C{array.array}
+    @ivar _offsetLongitudes: Longitude of the position shown when the last fix arrived minus the longitude of the fix
+    @type _offsetLongitudes: C{array.array}
+    """
+
+    def __init__(self, maxHorizon = 30.0, blendTime = 2.0, speedFactor = 1.0):
+        """
+        Constructor
+
+        @param maxHorizon: Maximum time (in seconds) a fix is extrapolated for
+        @type maxHorizon: C{float}
+        @param blendTime: Time (in seconds) for fading from the position shown so far to a new fix (0 for jumping)
+        @type blendTime: C{float}
+        @param speedFactor: Factor converting the speed of a position into metres per second (for instance 1 / 3.6 for km/h)
+        @type speedFactor: C{float}
+        """
+        self._maxHorizon = maxHorizon
+        self._blendTime = blendTime
+        self._speedFactor = speedFactor
+        self._setMembers([], [], array.array("d"), array.array("d"), array.array("d"))
+
+    def _setMembers(self, names, fixes, times, offsetLatitudes, offsetLongitudes):
+        """
+        Supporting function to store the members and to compute the columns used for extrapolating.
+        """
+        self._names = names
+        self._fixes = fixes
+        self._times = times
+        self._speeds = array.array("d", [fix.getSpeed() * self._speedFactor for fix in fixes])
+        self._bearings = array.array("d", [fix.getBearing() for fix in fixes])
+        self._offsetLatitudes = offsetLatitudes
+        self._offsetLongitudes = offsetLongitudes
+
+    def update(self, positions, now):
+        """
+        Takes over the positions received from the server.
+
+        Members missing in the given positions are dropped. A member, whose fix has not changed since the last update, is
+        extrapolated further from the time the fix was received first.
+
+        @param positions: Positions of the members; the key is the name, the value is the position
+        @type positions: C{Dict} of C{String} | L{PythonGLS.Position}
+        @param now: Time the positions were received
+        @type now: C{float}
+        """
+        shown = self._predictColumns(now)
+        previous = {}
+        for i in range(len(self._names)):
+            previous[self._names[i]] = i
+        names = []
+        fixes = []
+        times = array.array("d")
+        offsetLatitudes = array.array("d")
+        offsetLongitudes = array.array("d")
+        for name, fix in positions.items():
+            i = previous.get(name)
+            names.append(name)
+            fixes.append(fix)
+            if i is None:
+                times.append(now)
+                offsetLatitudes.append(0.0)
+                offsetLongitudes.append(0.0)
+            elif fix == self._fixes[i]:
+                times.append(self._times[i])
+                offsetLatitudes.append(self._offsetLatitudes[i])
+                offsetLongitudes.append(self._offsetLongitudes[i])
+            else:
+                times.append(now)
+                if self._blendTime > 0:
+                    offsetLatitudes.append(shown[0][i] - fix.getLatitude())
+                    offsetLongitudes.append((shown[1][i] - fix.getLongitude() + 540) % 360 - 180)
+                else:
+                    offsetLatitudes.append(0.0)
+                    offsetLongitudes.append(0.0)
+        self._setMembers(names, fixes, times, offsetLatitudes, offsetLongitudes)
+
+    def _predictColumns(self, now):
+        """
+        Supporting function to extrapolate all members to the given time.
+
+        @return: Latitudes and longitudes in the order of the members
+        @rtype: C{Tuple} of C{numpy.ndarray} or C{array.array}
+        """
+        if not self._names:
+            return array.array("d"), array.array("d")
+        if numpy is not None:
+            elapsed = now - numpy.asarray(self._times)
+            horizons = numpy.clip(elapsed, 0.0, self._maxHorizon)
+            latitudes, longitudes = destinations(self._fixes, self._bearings, numpy.asarray(self._speeds) * horizons)
+            if self._blendTime > 0:
+                weights = numpy.clip(1.0 - elapsed / self._blendTime, 0.0, 1.0)
+                latitudes = latitudes + numpy.asarray(self._offsetLatitudes) * weights
+                longitudes = (longitudes + numpy.asarray(self._offsetLongitudes) * weights + 540) % 360 - 180
+            return latitudes, longitudes
+        distances = array.array("d")
+        for i in range(len(self._names)):
+            distances.append(self._speeds[i] * min(self._maxHorizon, max(0.0, now - self._times[i])))
+        latitudes, longitudes = destinations(self._fixes, self._bearings, distances)
+        if self._blendTime > 0:
+            for i in range(len(self._names)):
+                weight = min(1.0, max(0.0, 1.0 - (now - self._times[i]) / self._blendTime))
+                if weight > 0:
+                    latitudes[i] += self._offsetLatitudes[i] * weight
+                    longitudes[i] = (longitudes[i] + self._offsetLongitudes[i] * weight + 540) % 360 - 180
+        return latitudes, longitudes
+
+    def predictColumns(self, now):
+        """
+        Extrapolates all members to the given time and delivers the result column by column.
+
+        @param now: Time to extrapolate to
+        @type now: C{float}
+        @return: Names, latitudes and longitudes of the members (latitudes and longitudes as NumPy arrays if NumPy is installed)
+        @rtype: C{Tuple} of C{List} of C{String}, C{numpy.ndarray} or C{array.array} and C{numpy.ndarray} or C{array.array}
+        """
+        latitudes, longitudes = self._predictColumns(now)
+        return list(self._names), latitudes, longitudes
+
+    def predict(self, now):
+        """
+        Extrapolates all members to the given time.
+
+        @param now: Time to extrapolate to
+        @type now: C{float}
+        @return: Extrapolated positions (altitude, speed and bearing are taken from the last fix); the key is the name of the member
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
+        """
+        latitudes, longitudes = self._predictColumns(now)
+        ret = {}
+        for i in range(len(self._names)):
+            fix = self._fixes[i]
+            ret[self._names[i]] = Position(float(latitudes[i]), float(longitudes[i]), fix.getAltitude(), fix.getSpeed(), fix.getBearing())
+        return ret
+
+    def getFixes(self):
+        """
+        GETTER
+
+        @return: Last fixes received; the key is the name of the member
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
+        """
+        ret = {}
+        for i in range(len(self._names)):
+            ret[self._names[i]] = self._fixes[i]
+        return ret
+
+    def __len__(self):
+        """
+        Number of members known.
+        """
+        return len(self._names)
@@ -0,0 +1,441 @@
+"""
+Python library for GPS Location Sharing - watching the positions of several groups at once.
+
+A session with the GLS server is bound to the group it has joined, so watching several groups with one connection
+means joining and requesting group by group - the time for a refresh grows with the number of groups. The monitor
+keeps one authenticated session per group instead and refreshes all of them concurrently with a bounded number of
+worker threads; a full refresh costs about one round trip (as long as there are enough workers). Example::
+
+    monitor = MultiGroupMonitor("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", ["OpenMoko", "Taxi"])
+    errors = monitor.refresh(timeout = 10.0)
+    for (groupName, name), position in monitor.getPositions().items():
+        print groupName, name, position, monitor.getFreshness()[groupName]
+    monitor.close()
+
+If the refresh of a group fails, the positions received last are kept (see L{MultiGroupMonitor.getFreshness} for
+their age) and the error is reported; the session is established again with the next refresh. A session, which does
+not get an answer from the server within the timeout, is dropped; a stalled server does not block its worker.
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import threading
+import Queue
+import socket
+import time
+import GLSException
+from ServerConnection import ServerConnection
+
+class _Refresh:
+    """
+    Supporting class for waiting until all groups of one refresh are done.
+
+    @ivar _pending: Number of groups not done yet
+    @type _pending: C{int}
+    @ivar _errors: Error of each group done (C{None} if successful)
+    @type _errors: C{Dict} of C{String} | L{GLSException.GLSException}
+    @ivar _condition: Condition for waiting for the groups
+    @type _condition: L{threading.Condition}
+    """
+
+    def __init__(self, count):
+        """
+        Constructor
+
+        @param count: Number of groups to wait for
+        @type count: C{int}
+        """
+        self._pending = count
+        self._errors = {}
+        self._condition = threading.Condition()
+
+    def done(self, groupName, error):
+        """
+        Records the result of one group; the waiting thread is woken up when all groups are done.
+
+        @param groupName: Name of the group
+        @type groupName: C{String}
+        @param error: Error of the request (C{None} if successful)
+        @type error: L{GLSException.GLSException}
+        """
+        self._condition.acquire()
+        try:
+            self._errors[groupName] = error
+            self._pending -= 1
+            if self._pending <= 0:
+                self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+    def wait(self, timeout):
+        """
+        Waits until all groups are done or the timeout has passed.
+
+        @param timeout: Maximum time (in seconds) to wait (C{None} for waiting until all groups are done)
+        @type timeout: C{float}
+        @return: Errors of the groups done so far
+        @rtype: C{Dict} of C{String} | L{GLSException.GLSException}
+        """
+        self._condition.acquire()
+        try:
+            if timeout is None:
+                while self._pending > 0:
+                    self._condition.wait()
+            else:
+                end = time.time() + timeout
+                while self._pending > 0 and time.time() < end:
+                    self._condition.wait(end - time.time())
+            return dict(self._errors)
+        finally:
+            self._condition.release()
+
+
+class MultiGroupMonitor:
+    """
+    Watches the positions of several groups with one session per group.
+
+    The sessions are established lazily with the first refresh and kept open between refreshes. Worker threads are
+    started as needed up to the given maximum and wait for work between refreshes. All methods may be called from
+    several threads; a session is only used by one worker at a time.
+
+    @ivar _connectionParameters: Host name, port, protocol version, client name, password and device name for the sessions
+    @type _connectionParameters: C{Tuple}
+    @ivar _maxWorkers: Maximum number of worker threads
+    @type _maxWorkers: C{int}
+    @ivar _timeout: Time (in seconds) each session waits for connecting, sending or receiving before it is dropped
+    @type _timeout: C{float}
+    @ivar _sessions: Session of each group
+    @type _sessions: C{Dict} of C{String} | L{ServerConnection.ServerConnection}
+    @ivar _sessionLocks: Lock of each session (held while the session is used)
+    @type _sessionLocks: C{Dict} of C{String} | L{threading.Lock}
+    @ivar _positions: Positions received last for each group; the key of the inner dictionary is the name of the member
+    @type _positions: C{Dict} of C{String} | C{Dict} of C{String} | L{PythonGLS.Position}
+    @ivar _refreshed: Time of the last successful refresh of each group (C{None} if never refreshed)
+    @type _refreshed: C{Dict} of C{String} | C{float}
+    @ivar _errors: Error of the last refresh of each group (C{None} if successful)
+    @type _errors: C{Dict} of C{String} | L{GLSException.GLSException}
+    @ivar _durations: Time (in seconds) the last refresh of each group took
+    @type _durations: C{Dict} of C{String} | C{float}
+    @ivar _tasks: Queue of names of the groups to refresh
+    @type _tasks: L{Queue.Queue}
+    @ivar _running: Refreshes waiting for each group queued or being refreshed (a group is only queued once at a time)
+    @type _running: C{Dict} of C{String} | C{List} of L{_Refresh}
+    @ivar _workers: Worker threads started
+    @type _workers: C{List} of L{threading.Thread}
+    @ivar _lock: Lock for protecting the state of the monitor
+    @type _lock: L{threading.Lock}
+    """
+
+    def __init__(self, hostName, port, version, clientName, password, deviceName, groupNames = [], maxWorkers = 16, timeout = 30.0):
+        """
+        Constructor
+
+        Only stores the given parameters; no connection is established here.
+
+        @param hostName: Hostname or IP address of the GLS server
+        @type hostName: C{String}
+        @param port: Port, the GLS server is listening on
+        @type port: C{int}
+        @param version: Version of the GLS protocol to use for the communication to GLS server
+        @type version: C{String}
+        @param clientName: Name of the client for logging into the GSL server
+        @type clientName: C{String}
+        @param password: Password for logging into the GLS server
+        @type password: C{String}
+        @param deviceName: Name of the GPS device
+        @type deviceName: C{String}
+        @param groupNames: Names of the groups to watch
+        @type groupNames: C{List} of C{String}
+        @param maxWorkers: Maximum number of worker threads (groups are refreshed this many at a time)
+        @type maxWorkers: C{int}
+        @param timeout: Time (in seconds) each session waits for connecting, sending or receiving before it is dropped (C{None} for waiting without limit)
+        @type timeout: C{float}
+        """
+        self._connectionParameters = (hostName, port, version, clientName, password, deviceName)
+        self._maxWorkers = max(1, maxWorkers)
+        self._timeout = timeout
+        self._sessions = {}
+        self._sessionLocks = {}
+        self._positions = {}
+        self._refreshed = {}
+        self._errors = {}
+        self._durations = {}
+        self._tasks = Queue.Queue()
+        self._running = {}
+        self._workers = []
+        self._lock = threading.Lock()
+        for groupName in groupNames:
+            self.addGroup(groupName)
+
+    def addGroup(self, groupName):
+        """
+        Starts watching a group (its positions are requested with the next refresh).
+
+        @param groupName: Name of the group
+        @type groupName: C{String}
+        """
+        self._lock.acquire()
+        try:
+            if self._sessions.has_key(groupName):
+                return
+            hostName, port, version, clientName, password, deviceName = self._connectionParameters
+            self._sessions[groupName] = ServerConnection(hostName, port, version, clientName, password, deviceName, groupName, self._timeout)
+            self._sessionLocks[groupName] = threading.Lock()
+            self._positions[groupName] = {}
+            self._refreshed[groupName] = None
+            self._errors[groupName] = None
+            self._durations[groupName] = None
+        finally:
+            self._lock.release()
+
+    def removeGroup(self, groupName):
+        """
+        Stops watching a group and closes its session.
+
+        @param groupName: Name of the group
+        @type groupName: C{String}
+        """
+        self._lock.acquire()
+        try:
+            session = self._sessions.pop(groupName, None)
+            sessionLock = self._sessionLocks.pop(groupName, None)
+            for values in (self._positions, self._refreshed, self._errors, self._durations):
+                values.pop(groupName, None)
+        finally:
+            self._lock.release()
+        if session is not None:
+            self._closeSession(session, sessionLock)
+
+    def _closeSession(self, session, sessionLock):
+        """
+        Supporting function to close down a session (errors are ignored).
+
+        If a worker is using the session, its socket is shut down first, so the worker does not keep the session
+        (waiting for the server) while the session is being closed.
+        """
+        if not sessionLock.acquire(0):
+            session.shutdownConnection()
+            sessionLock.acquire()
+        try:
+            session.closeConnection()
+        except Exception:
+            pass
+        sessionLock.release()
+
+    def getGroupNames(self):
+        """
+        GETTER
+
+        @return: Names of the groups watched
+        @rtype: C{List} of C{String}
+        """
+        self._lock.acquire()
+        try:
+            return self._sessions.keys()
+        finally:
+            self._lock.release()
+
+    def _startWorkers(self, count):
+        """
+        Supporting function to start worker threads until the given number (limited by the maximum) is running.
+
+        Must be called with the lock held.
+        """
+        while len(self._workers) < min(count, self._maxWorkers):
+            worker = threading.Thread(target = self._work)
+            worker.setDaemon(1)
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        """
+        Supporting function run by the worker threads: refreshes groups taken from the queue until C{None} is taken.
+
+        The result is passed to all refreshes waiting for the group.
+        """
+        while 1:
+            groupName = self._tasks.get()
+            if groupName is None:
+                return
+            error = self._refreshGroup(groupName)
+            self._lock.acquire()
+            try:
+                refreshes = self._running.pop(groupName, [])
+            finally:
+                self._lock.release()
+            for refresh in refreshes:
+                refresh.done(groupName, error)
+
+    def _refreshGroup(self, groupName):
+        """
+        Supporting function to request the positions of one group through its session and to store them.
+
+        If the session has joined the group already, only the positions are requested; otherwise, the handshake (if
+        needed), joining and requesting are sent at once. Either way, it costs one round trip.
+
+        @return: Error of the request (C{None} if successful)
+        @rtype: L{GLSException.GLSException}
+        """
+        self._lock.acquire()
+        session = self._sessions.get(groupName)
+        sessionLock = self._sessionLocks.get(groupName)
+        self._lock.release()
+        if session is None:
+            return None
+        sessionLock.acquire()
+        started = time.time()
+        try:
+            try:
+                if session.isAlive() and session.getJoinedGroup() == groupName:
+                    positions = session.requestPositions()
+                else:
+                    positions = session.requestPositions(groupName)
+                error = None
+            except GLSException.GLSException, e:
+                error = e
+            except socket.error, e:
+                session._dropConnection()
+                error = GLSException.GLSException("Connection to server lost.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+            except Exception, e:
+                error = GLSException.GLSException("Could not refresh group %s." %(groupName), GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+        finally:
+            sessionLock.release()
+        now = time.time()
+        self._lock.acquire()
+        try:
+            if self._sessions.get(groupName) is session:
+                if error is None:
+                    self._positions[groupName] = positions
+                    self._refreshed[groupName] = now
+                self._errors[groupName] = error
+                self._durations[groupName] = now - started
+        finally:
+            self._lock.release()
+        return error
+
+    def refresh(self, groupNames = None, timeout = None):
+        """
+        Requests the positions of the groups concurrently and waits until they have been received.
+
+        Groups not done within the timeout keep being refreshed in the background; their results are stored when they
+        arrive. A group, which is still queued or being refreshed (for instance by an earlier refresh, which has timed
+        out), is not queued again; the result of the refresh under way is reported for it.
+
+        @param groupNames: Names of the groups to refresh (C{None} for all groups watched)
+        @type groupNames: C{List} of C{String}
+        @param timeout: Maximum time (in seconds) to wait (C{None} for waiting until all groups are done)
+        @type timeout: C{float}
+        @return: Error of each group done (C{None} if successful); groups not done within the timeout are missing
+        @rtype: C{Dict} of C{String} | L{GLSException.GLSException}
+        """
+        self._lock.acquire()
+        try:
+            if groupNames is None:
+                groupNames = self._sessions.keys()
+            else:
+                groupNames = [groupName for groupName in groupNames if self._sessions.has_key(groupName)]
+            refresh = _Refresh(len(groupNames))
+            queued = []
+            for groupName in groupNames:
+                if self._running.has_key(groupName):
+                    self._running[groupName].append(refresh)
+                else:
+                    self._running[groupName] = [refresh]
+                    queued.append(groupName)
+            self._startWorkers(len(queued))
+        finally:
+            self._lock.release()
+        for groupName in queued:
+            self._tasks.put(groupName)
+        return refresh.wait(timeout)
+
+    def getPositions(self):
+        """
+        Delivers the positions received last of all groups in one view.
+
+        @return: Positions of the members of all groups; the key is made up by the name of the group and the name of the member
+        @rtype: C{Dict} of C{Tuple} of C{String} and C{String} | L{PythonGLS.Position}
+        """
+        self._lock.acquire()
+        try:
+            ret = {}
+            for groupName, positions in self._positions.items():
+                for name, position in positions.items():
+                    ret[(groupName, name)] = position
+            return ret
+        finally:
+            self._lock.release()
+
+    def getGroupPositions(self, groupName):
+        """
+        GETTER
+
+        @param groupName: Name of the group
+        @type groupName: C{String}
+        @return: Positions received last for the group; the key is the name of the member
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._positions.get(groupName, {}))
+        finally:
+            self._lock.release()
+
+    def getFreshness(self):
+        """
+        GETTER
+
+        @return: Time of the last successful refresh of each group (C{None} if never refreshed)
+        @rtype: C{Dict} of C{String} | C{float}
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._refreshed)
+        finally:
+            self._lock.release()
+
+    def getErrors(self):
+        """
+        GETTER
+
+        @return: Error of the last refresh of each group (C{None} if successful or never refreshed)
+        @rtype: C{Dict} of C{String} | L{GLSException.GLSException}
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._errors)
+        finally:
+            self._lock.release()
+
+    def getDurations(self):
+        """
+        GETTER
+
+        @return: Time (in seconds) the last refresh of each group took (C{None} if never refreshed)
+        @rtype: C{Dict} of C{String} | C{float}
+        """
+        self._lock.acquire()
+        try:
+            return dict(self._durations)
+        finally:
+            self._lock.release()
+
+    def close(self):
+        """
+        Stops the worker threads and closes down all sessions; the monitor may be used again afterwards.
+        """
+        self._lock.acquire()
+        try:
+            workers = self._workers
+            self._workers = []
+            sessions = [(self._sessions[groupName], self._sessionLocks[groupName]) for groupName in self._sessions.keys()]
+        finally:
+            self._lock.release()
+        for worker in workers:
+            self._tasks.put(None)
+        for session, sessionLock in sessions:
+            self._closeSession(session, sessionLock)
@@ -0,0 +1,271 @@
+"""
+Python library for GPS Location Sharing - adaptive scheduling of requests for the positions of others.
+
+Instead of requesting the positions of the group at a fixed interval, the scheduler chooses the time of the next
+request from the reply of the last one:
+    - If members near the visible part of the map move fast, the interval shortens, so the fastest of them moves at
+      most a given distance between two requests (but the interval never falls below the minimum).
+    - If members move, but not fast or not near the map, the base interval is used.
+    - If nobody has moved since the last request (or the map is not visible), the interval grows step by step up to
+      the maximum.
+    - If a request fails, the next attempt is delayed exponentially (up to the maximum backoff).
+Each interval is varied randomly and the first request is delayed randomly, so many devices do not poll the server at
+the same time. Example::
+
+    scheduler = PollScheduler(minInterval = 5.0, maxInterval = 60.0, baseInterval = 30.0)
+    scheduler.start(time.time())
+    while 1:
+        time.sleep(max(0, scheduler.getNextPoll() - time.time()))
+        try:
+            scheduler.succeeded(s.requestPositions(), time.time(), viewport)
+        except GLSException.GLSException:
+            scheduler.failed(time.time())
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import random
+
+class PollScheduler:
+    """
+    Chooses the time of the next request for positions.
+
+    Speeds of positions are converted to metres per second with the speed factor; the default expects metres per second.
+
+    @ivar _minInterval: Minimum time (in seconds) between two requests
+    @type _minInterval: C{float}
+    @ivar _maxInterval: Maximum time (in seconds) between two successful requests
+    @type _maxInterval: C{float}
+    @ivar _baseInterval: Time (in seconds) between two requests while members move
+    @type _baseInterval: C{float}
+    @ivar _maxDistance: Distance (in metres) the fastest member near the map may move between two requests
+    @type _maxDistance: C{float}
+    @ivar _idleSpeed: Speed (in metres per second) up to which a member is considered to stand still
+    @type _idleSpeed: C{float}
+    @ivar _idleFactor: Factor the interval grows by with each request without movement
+    @type _idleFactor: C{float}
+    @ivar _jitter: Relative amount each interval is varied by randomly
+    @type _jitter: C{float}
+    @ivar _backoffMin: Time (in seconds) to wait after the first failed request
+    @type _backoffMin: C{float}
+    @ivar _backoffMax: Maximum time (in seconds) to wait after failed requests
+    @type _backoffMax: C{float}
+    @ivar _speedFactor: Factor converting the speed of a position into metres per second
+    @type _speedFactor: C{float}
+    @ivar _margin: Part of the width and height of the map, which is considered near the map on each side
+    @type _margin: C{float}
+    @ivar _random: Random generator for the jitter
+    @type _random: C{random.Random}
+    @ivar _positions: Positions received with the last successful request
+    @type _positions: C{Dict} of C{String} | L{PythonGLS.Position}
+    @ivar _idleInterval: Interval used while nobody moves (grows with each request without movement)
+    @type _idleInterval: C{float}
+    @ivar _failures: Number of failed requests in a row
+    @type _failures: C{int}
+    @ivar _interval: Interval chosen last
+    @type _interval: C{float}
+    @ivar _nextPoll: Time of the next request
+    @type _nextPoll: C{float}
+    @ivar _started: Time the scheduler was started
+    @type _started: C{float}
+    @ivar _statistics: Number of requests ("polls"), of failed ones ("failures") and of intervals chosen for fast movement ("fast"), for movement ("moving") and for standing still ("idle")
+    @type _statistics: C{Dict} of C{String} | C{int}
+    """
+
+    def __init__(self, minInterval = 5.0, maxInterval = 60.0, baseInterval = 30.0, maxDistance = 150.0, idleSpeed = 0.5,
+                 idleFactor = 1.5, jitter = 0.1, backoffMin = 5.0, backoffMax = 300.0, speedFactor = 1.0, margin = 0.5, seed = None):
+        """
+        Constructor
+
+        @param minInterval: Minimum time (in seconds) between two requests
+        @type minInterval: C{float}
+        @param maxInterval: Maximum time (in seconds) between two successful requests
+        @type maxInterval: C{float}
+        @param baseInterval: Time (in seconds) between two requests while members move
+        @type baseInterval: C{float}
+        @param maxDistance: Distance (in metres) the fastest member near the map may move between two requests
+        @type maxDistance: C{float}
+        @param idleSpeed: Speed (in metres per second) up to which a member is considered to stand still
+        @type idleSpeed: C{float}
+        @param idleFactor: Factor the interval grows by with each request without movement
+        @type idleFactor: C{float}
+        @param jitter: Relative amount each interval is varied by randomly (0.1 for +/- 10 percent)
+        @type jitter: C{float}
+        @param backoffMin: Time (in seconds) to wait after the first failed request
+        @type backoffMin: C{float}
+        @param backoffMax: Maximum time (in seconds) to wait after failed requests
+        @type backoffMax: C{float}
+        @param speedFactor: Factor converting the speed of a position into metres per second (for instance 1 / 3.6 for km/h)
+        @type speedFactor: C{float}
+        @param margin: Part of the width and height of the map, which is considered near the map on each side
+        @type margin: C{float}
+        @param seed: Seed for the random generator (C{None} for seeding from the system)
+        """
+        self._minInterval = minInterval
+        self._maxInterval = max(minInterval, maxInterval)
+        self._baseInterval = min(self._maxInterval, max(minInterval, baseInterval))
+        self._maxDistance = maxDistance
+        self._idleSpeed = idleSpeed
+        self._idleFactor = idleFactor
+        self._jitter = jitter
+        self._backoffMin = backoffMin
+        self._backoffMax = backoffMax
+        self._speedFactor = speedFactor
+        self._margin = margin
+        self._random = random.Random(seed)
+        self._positions = {}
+        self._idleInterval = self._baseInterval
+        self._failures = 0
+        self._interval = self._baseInterval
+        self._statistics = {"polls": 0, "failures": 0, "fast": 0, "moving": 0, "idle": 0}
+        self.start(0)
+
+    def start(self, now):
+        """
+        Starts the scheduling; the first request is delayed randomly by up to the minimum interval.
+
+        @param now: Current time
+        @type now: C{float}
+        """
+        self._started = now
+        self._nextPoll = now + self._random.random() * self._minInterval
+
+    def _isNear(self, position, viewport):
+        """
+        Supporting function to check, whether a position lies on or near the visible part of the map.
+        """
+        south, west, north, east = viewport
+        latitudeMargin = (north - south) * self._margin
+        longitudeMargin = ((east - west) % 360) * self._margin
+        if not south - latitudeMargin <= position.getLatitude() <= north + latitudeMargin:
+            return 0
+        return (position.getLongitude() - west + longitudeMargin) % 360 <= (east - west) % 360 + 2 * longitudeMargin
+
+    def _chooseInterval(self, positions, viewport, visible):
+        """
+        Supporting function to choose the interval after a successful request (without jitter).
+        """
+        moving = len(self._positions) > 0 and set(positions.keys()) != set(self._positions.keys())
+        fastest = 0.0
+        for name, position in positions.items():
+            speed = position.getSpeed() * self._speedFactor
+            if speed <= self._idleSpeed and position == self._positions.get(name, position):
+                continue
+            moving = 1
+            if visible and (viewport is None or self._isNear(position, viewport)):
+                fastest = max(fastest, speed)
+        if not visible or not moving:
+            self._statistics["idle"] += 1
+            interval = self._idleInterval
+            self._idleInterval = min(self._maxInterval, self._idleInterval * self._idleFactor)
+            return interval
+        self._idleInterval = self._baseInterval
+        if fastest > 0 and self._maxDistance / fastest < self._baseInterval:
+            self._statistics["fast"] += 1
+            return max(self._minInterval, self._maxDistance / fastest)
+        self._statistics["moving"] += 1
+        return self._baseInterval
+
+    def succeeded(self, positions, now, viewport = None, visible = 1):
+        """
+        Chooses the time of the next request after a successful one.
+
+        @param positions: Positions received; the key is the name of the member
+        @type positions: C{Dict} of C{String} | L{PythonGLS.Position}
+        @param now: Time the request has finished
+        @type now: C{float}
+        @param viewport: Visible part of the map as southern and northern latitude, western and eastern longitude (C{None} if unknown; all members are considered near then)
+        @type viewport: C{Tuple} of C{float} (south, west, north, east)
+        @param visible: Whether the map is visible at all
+        @type visible: C{int}
+        @return: Time of the next request
+        @rtype: C{float}
+        """
+        self._statistics["polls"] += 1
+        self._failures = 0
+        interval = self._chooseInterval(positions, viewport, visible)
+        self._positions = dict(positions)
+        interval *= 1 + self._jitter * (2 * self._random.random() - 1)
+        self._interval = min(self._maxInterval, max(self._minInterval, interval))
+        self._nextPoll = now + self._interval
+        return self._nextPoll
+
+    def failed(self, now):
+        """
+        Chooses the time of the next attempt after a failed request.
+
+        The waiting time doubles with each failure in a row (starting at the minimum backoff, limited by the maximum
+        backoff); the actual waiting time is chosen randomly between half of it and all of it.
+
+        @param now: Time the request has failed
+        @type now: C{float}
+        @return: Time of the next attempt
+        @rtype: C{float}
+        """
+        self._statistics["polls"] += 1
+        self._statistics["failures"] += 1
+        self._failures += 1
+        backoff = min(self._backoffMax, self._backoffMin * 2 ** (self._failures - 1))
+        self._interval = backoff / 2.0 + self._random.random() * backoff / 2.0
+        self._nextPoll = now + self._interval
+        return self._nextPoll
+
+    def isDue(self, now):
+        """
+        Checks, whether the next request is due.
+
+        @param now: Current time
+        @type now: C{float}
+        @return: 1 if the next request is due; otherwise 0
+        @rtype: C{int}
+        """
+        return now >= self._nextPoll
+
+    def getNextPoll(self):
+        """
+        GETTER
+
+        @return: Time of the next request
+        @rtype: C{float}
+        """
+        return self._nextPoll
+
+    def getInterval(self):
+        """
+        GETTER
+
+        @return: Interval chosen last (in seconds)
+        @rtype: C{float}
+        """
+        return self._interval
+
+    def getPollsPerHour(self, now):
+        """
+        Computes the average number of requests per hour since the start.
+
+        @param now: Current time
+        @type now: C{float}
+        @return: Requests per hour (0 if no time has passed yet)
+        @rtype: C{float}
+        """
+        if now <= self._started:
+            return 0.0
+        return self._statistics["polls"] * 3600.0 / (now - self._started)
+
+    def getStatistics(self, now):
+        """
+        GETTER
+
+        @param now: Current time
+        @type now: C{float}
+        @return: Number of requests ("polls"), of failed ones ("failures") and of intervals chosen for fast movement ("fast"), for movement ("moving") and for standing still ("idle"); requests per hour ("pollsPerHour") and requests per hour at the base interval ("basePollsPerHour") for comparison
+        @rtype: C{Dict} of C{String} | C{int} or C{float}
+        """
+        ret = dict(self._statistics)
+        ret["pollsPerHour"] = self.getPollsPerHour(now)
+        ret["basePollsPerHour"] = 3600.0 / self._baseInterval
+        return ret
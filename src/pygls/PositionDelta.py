@@ -0,0 +1,195 @@
+"""
+Python library for GPS Location Sharing - changes of the positions of others between two requests.
+
+A snapshot keeps the last known position of each member of a group. Each new reply from the server is
+compared with it; only members, which have been added, moved or removed, are reported.
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+import time
+
+class PositionDelta:
+    """
+    Changes of the positions of others between two requests.
+
+    @ivar _added: Members, which were not known before, with their positions
+    @type _added: C{Dict} of C{String} | L{PythonGLS.Position}
+    @ivar _moved: Members, which have moved, with their new positions
+    @type _moved: C{Dict} of C{String} | L{PythonGLS.Position}
+    @ivar _removed: Members, which are not known any more
+    @type _removed: C{List} of C{String}
+    @ivar _timestamp: Time, the reply was received
+    @type _timestamp: C{float}
+    """
+
+    def __init__(self, added, moved, removed, timestamp):
+        """
+        Constructor
+        """
+        self._added = added
+        self._moved = moved
+        self._removed = removed
+        self._timestamp = timestamp
+
+    def __str__(self):
+        """
+        Computes a string representation of the content of this delta instance.
+
+        This representation is made up by the number of added, moved and removed members.
+
+        @return: String representation of object content
+        @rtype: C{String}
+        """
+        return "Delta: %d added, %d moved, %d removed" %(len(self._added), len(self._moved), len(self._removed))
+
+    def isEmpty(self):
+        """
+        Checks, whether anything has changed.
+
+        @return: 1 if no member was added, moved or removed; 0 otherwise
+        @rtype: C{int}
+        """
+        return not (self._added or self._moved or self._removed)
+
+    def getAdded(self):
+        """
+        GETTER
+        """
+        return self._added
+
+    def getMoved(self):
+        """
+        GETTER
+        """
+        return self._moved
+
+    def getRemoved(self):
+        """
+        GETTER
+        """
+        return self._removed
+
+    def getTimestamp(self):
+        """
+        GETTER
+        """
+        return self._timestamp
+
+
+class PositionSnapshot:
+    """
+    Last known positions of the members of a group.
+
+    A member counts as moved if its latitude or its longitude has changed by more than the given tolerance (epsilon).
+    Members missing in a reply are kept until they have not been received for the given time to live (TTL); then they
+    are reported as removed. Without a TTL, members are removed as soon as they are missing in a reply.
+
+    @ivar _epsilon: Tolerance (in degrees) for changes of latitude and longitude, which are not reported as move
+    @type _epsilon: C{float}
+    @ivar _ttl: Time (in seconds) a member is kept after it has been received for the last time (C{None} for removing missing members immediately)
+    @type _ttl: C{float}
+    @ivar _positions: Last reported position per member
+    @type _positions: C{Dict} of C{String} | L{PythonGLS.Position}
+    @ivar _received: Time, each member was received for the last time
+    @type _received: C{Dict} of C{String} | C{float}
+    """
+
+    def __init__(self, epsilon = 0.0, ttl = None):
+        """
+        Constructor
+
+        @param epsilon: Tolerance (in degrees) for changes of latitude and longitude, which are not reported as move
+        @type epsilon: C{float}
+        @param ttl: Time (in seconds) a member is kept after it has been received for the last time (C{None} for removing missing members immediately)
+        @type ttl: C{float}
+        """
+        self._epsilon = epsilon
+        self._ttl = ttl
+        self._positions = {}
+        self._received = {}
+
+    def update(self, positions, timestamp = None):
+        """
+        Compares a new reply from the server with the snapshot and takes it over.
+
+        The snapshot is only changed after the positions have been consumed completely; if consuming them fails (for
+        instance because the connection is lost in the middle of the reply), the snapshot stays as it was.
+
+        @param positions: Positions of others from the server; each item made up by the name of the "other" and its position
+        @type positions: C{Iterable} of C{Tuple} of C{String} and L{PythonGLS.Position}
+        @param timestamp: Time, the reply was received (default is now)
+        @type timestamp: C{float}
+        @return: Changes in comparison to the snapshot
+        @rtype: L{PositionDelta}
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        epsilon = self._epsilon
+        known = self._positions
+        received = self._received
+        added = {}
+        moved = {}
+        seen = {}
+        for name, position in positions:
+            seen[name] = 1
+            old = known.get(name)
+            if old is None:
+                added[name] = position
+            elif abs(position.getLatitude() - old.getLatitude()) > epsilon or abs(position.getLongitude() - old.getLongitude()) > epsilon:
+                moved[name] = position
+
+        # the reply is complete - take it over
+        for name in seen:
+            received[name] = timestamp
+        known.update(added)
+        known.update(moved)
+        removed = []
+        if len(seen) < len(known):
+            for name in known.keys():
+                if not seen.has_key(name) and (self._ttl is None or timestamp - received[name] > self._ttl):
+                    removed.append(name)
+                    del known[name]
+                    del received[name]
+        return PositionDelta(added, moved, removed, timestamp)
+
+    def clear(self):
+        """
+        Forgets all members; with the next update, all members will be reported as added.
+        """
+        self._positions = {}
+        self._received = {}
+
+    def setEpsilon(self, epsilon):
+        """
+        SETTER
+        """
+        self._epsilon = epsilon
+
+    def setTtl(self, ttl):
+        """
+        SETTER
+        """
+        self._ttl = ttl
+
+    def getPositions(self):
+        """
+        GETTER
+
+        @return: Last reported position per member
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
+        """
+        return self._positions
+
+    def getReceived(self):
+        """
+        GETTER
+
+        @return: Time, each member was received for the last time
+        @rtype: C{Dict} of C{String} | C{float}
+        """
+        return self._received
@@ -0,0 +1,195 @@
+"""
+Python library for GPS Location Sharing - positions of others in columns.
+
+For computations over all members of a group, the positions of others are stored column by column (one column
+for each of latitude, longitude, altitude, speed and bearing) instead of one L{PythonGLS.Position} per member.
+If NumPy is installed, the columns are NumPy arrays (views on one structured array) and the reply is parsed in
+one vectorized step; otherwise, the columns are arrays of the standard library (C{array.array}).
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var COLUMNS: Names of the columns of a position table (in the order of the values in a "P" reply)
+@type COLUMNS: C{Tuple} of C{String}
+@var POSITION_DTYPE: Data type of the records of a position table (C{None} if NumPy is not installed)
+@type POSITION_DTYPE: C{numpy.dtype}
+"""
+import array
+import GLSException
+import GLSCommands
+from PythonGLS import Position, internName
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMNS = ("latitude", "longitude", "altitude", "speed", "bearing")
+if numpy is not None:
+    POSITION_DTYPE = numpy.dtype([(column, numpy.float64) for column in COLUMNS])
+else:
+    POSITION_DTYPE = None
+
+class PositionTable:
+    """
+    Positions of others stored column by column.
+
+    @ivar _names: Names of the members (in the order of the rows)
+    @type _names: C{List} of C{String}
+    @ivar _index: Row of each member
+    @type _index: C{Dict} of C{String} | C{int}
+    @ivar _records: Structured array with one record per member (C{None} if NumPy is not installed)
+    @type _records: C{numpy.ndarray}
+    @ivar _columns: Values per column name
+    @type _columns: C{Dict} of C{String} | C{numpy.ndarray} or C{array.array}
+    """
+
+    def __init__(self, names, columns, records = None):
+        """
+        Constructor
+
+        @param names: Names of the members (in the order of the rows)
+        @type names: C{List} of C{String}
+        @param columns: Values for each column (in the order of L{COLUMNS})
+        @type columns: C{List} of C{numpy.ndarray} or C{array.array}
+        @param records: Structured array the columns are taken from (optional)
+        @type records: C{numpy.ndarray}
+        """
+        self._names = names
+        self._index = dict([(names[i], i) for i in range(len(names))])
+        self._records = records
+        self._columns = dict(zip(COLUMNS, columns))
+
+    def __len__(self):
+        """
+        Number of members in the table.
+        """
+        return len(self._names)
+
+    def getNames(self):
+        """
+        GETTER
+        """
+        return self._names
+
+    def getIndex(self):
+        """
+        GETTER
+
+        @return: Row of each member
+        @rtype: C{Dict} of C{String} | C{int}
+        """
+        return self._index
+
+    def getRecords(self):
+        """
+        GETTER
+
+        @return: Structured array with one record per member (see L{POSITION_DTYPE}); C{None} if NumPy is not installed
+        @rtype: C{numpy.ndarray}
+        """
+        return self._records
+
+    def getColumn(self, name):
+        """
+        Delivers all values of one column.
+
+        @param name: Name of the column (see L{COLUMNS})
+        @type name: C{String}
+        @return: Values of the column in the order of the rows
+        @rtype: C{numpy.ndarray} or C{array.array}
+        """
+        return self._columns[name]
+
+    def getLatitudes(self):
+        """
+        GETTER
+        """
+        return self._columns["latitude"]
+
+    def getLongitudes(self):
+        """
+        GETTER
+        """
+        return self._columns["longitude"]
+
+    def getAltitudes(self):
+        """
+        GETTER
+        """
+        return self._columns["altitude"]
+
+    def getSpeeds(self):
+        """
+        GETTER
+        """
+        return self._columns["speed"]
+
+    def getBearings(self):
+        """
+        GETTER
+        """
+        return self._columns["bearing"]
+
+    def getPosition(self, name):
+        """
+        Delivers the position of one member as L{PythonGLS.Position}.
+
+        @param name: Name of the member
+        @type name: C{String}
+        @return: Position of the member
+        @rtype: L{PythonGLS.Position}
+        """
+        row = self._index[name]
+        values = [float(self._columns[column][row]) for column in COLUMNS]
+        return Position(values[0], values[1], values[2], values[3], values[4])
+
+
+def parsePositionLines(lines):
+    """
+    Parses the lines of a "P" reply into a position table.
+
+    The name of the member is split off each line; the remaining values are converted to floats without creating
+    an object per member. With NumPy, all values are converted in one step.
+
+    Raises an L{GLSException.GLSException} if a line does not contain exactly five values besides the name.
+
+    @param lines: Lines of the reply (with leading "P"; a terminating "F" line is ignored)
+    @type lines: C{Iterable} of C{String}
+    @return: Positions of others
+    @rtype: L{PositionTable}
+    """
+    names = []
+    values = []
+    for line in lines:
+        if line[:1] == GLSCommands.RE_FINISHED:
+            continue
+        pos = line.find(",")
+        if pos < 0 or line.count(",", pos) != len(COLUMNS):
+            raise GLSException.GLSException("Invalid positions from server.", GLSException.EC_VALIDATION_ERROR, "Each position must be made up by a name and %d values." %(len(COLUMNS)))
+        names.append(internName(line[1:pos]))
+        values.append(line[pos + 1:])
+
+    if numpy is not None:
+        if names:
+            flat = numpy.fromstring(",".join(values), dtype = numpy.float64, sep = ",")
+        else:
+            flat = numpy.zeros(0, dtype = numpy.float64)
+        if len(flat) != len(COLUMNS) * len(names):
+            raise GLSException.GLSException("Invalid positions from server.", GLSException.EC_VALIDATION_ERROR, "Each position must be made up by a name and %d values." %(len(COLUMNS)))
+        records = flat.view(POSITION_DTYPE)
+        return PositionTable(names, [records[column] for column in COLUMNS], records)
+
+    columns = [array.array("d") for column in COLUMNS]
+    try:
+        for item in values:
+            tokens = item.split(",")
+            for i in range(len(COLUMNS)):
+                columns[i].append(float(tokens[i]))
+    except ValueError:
+        raise GLSException.GLSException("Invalid positions from server.", GLSException.EC_VALIDATION_ERROR, "Each position must be made up by a name and %d values." %(len(COLUMNS)))
+    return PositionTable(names, columns)
@@ -9,10 +9,29 @@ http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
 @license: GPL (General Public License)
 """
 
-class Position:
+def internName(name):
+    """
+    Supporting function to share the strings of names among all positions and waypoints.
+    
+    Names of members and waypoints are repeated in every reply from the server; interning them avoids keeping a copy
+    of the same name for each reply.
+    
+    @param name: Name of a member or a waypoint
+    @type name: C{String}
+    @return: The interned name (or the given name if it cannot be interned)
+    @rtype: C{String}
+    """
+    if type(name) is str:
+        return intern(name)
+    return name
+
+class Position(object):
     """
     GPS Position
     
+    Instances are immutable; they may be compared and used as keys in dictionaries. Attributes are kept in slots
+    (no dictionary per instance) to keep the memory footprint small.
+    
     @ivar _latitude: Latitude of the GPS position
     @type _latitude: C{float}
     @ivar _longitude: Longitude of the GPS position
@@ -25,15 +44,27 @@ class Position:
     @type _bearing: C{float}
     """
 
+    __slots__ = ("_latitude", "_longitude", "_altitude", "_speed", "_bearing")
+
     def __init__(self, latitude, longitude, altitude, speed, bearing):
         """
         Constructor
         """
-        self._latitude = latitude
-        self._longitude = longitude
-        self._altitude = altitude
-        self._speed = speed
-        self._bearing = bearing
+        init = object.__setattr__
+        init(self, "_latitude", latitude)
+        init(self, "_longitude", longitude)
+        init(self, "_altitude", altitude)
+        init(self, "_speed", speed)
+        init(self, "_bearing", bearing)
+
+    def _getKey(self):
+        """
+        Supporting function for comparing and hashing positions.
+        
+        @return: All values of the position
+        @rtype: C{Tuple}
+        """
+        return (self._latitude, self._longitude, self._altitude, self._speed, self._bearing)
         
     def __str__(self):
         """
@@ -45,6 +76,72 @@ class Position:
         @rtype: C{String}        
         """
         return "Position: " + str(self._latitude) + "," + str(self._longitude) + "," + str(self._altitude)
+
+    def __setattr__(self, name, value):
+        """
+        Prevents changing the position (instances are immutable).
+        """
+        raise AttributeError("Position instances are immutable")
+
+    def __delattr__(self, name):
+        """
+        Prevents changing the position (instances are immutable).
+        """
+        raise AttributeError("Position instances are immutable")
+
+    def __reduce__(self):
+        """
+        Supports pickling and copying (state is passed to the constructor).
+        """
+        return (Position, self._getKey())
+
+    def __hash__(self):
+        """
+        Computes a hash value from all values of the position.
+        """
+        return hash(self._getKey())
+
+    def __eq__(self, other):
+        """
+        Checks for equality - all values of the position must be equal.
+        """
+        return isinstance(other, Position) and self._getKey() == other._getKey()
+
+    def __ne__(self, other):
+        """
+        Checks for inequality (see L{__eq__}).
+        """
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        """
+        Compares all values of the position in order (see L{_getKey}).
+        """
+        return self._getKey() < other._getKey()
+
+    def __le__(self, other):
+        """
+        Compares all values of the position in order (see L{_getKey}).
+        """
+        return self._getKey() <= other._getKey()
+
+    def __gt__(self, other):
+        """
+        Compares all values of the position in order (see L{_getKey}).
+        """
+        return self._getKey() > other._getKey()
+
+    def __ge__(self, other):
+        """
+        Compares all values of the position in order (see L{_getKey}).
+        """
+        return self._getKey() >= other._getKey()
+
+    def __repr__(self):
+        """
+        Computes a representation of the position, which may be evaluated to an equal instance.
+        """
+        return "Position%r" % (self._getKey(),)
         
     def getLatitude(self):
         """
@@ -77,10 +174,12 @@ class Position:
         return self._bearing
 
     
-class Waypoint:
+class Waypoint(object):
     """
     GPS Waypoint
     
+    Instances are immutable; they may be compared and used as keys in dictionaries (see L{Position}).
+    
     @ivar _latitude: Latitude of the waypoint
     @type _latitude: C{float}
     @ivar _longitude: Longitude of the waypoint
@@ -91,14 +190,26 @@ class Waypoint:
     @type _name: C{String}
     """
 
+    __slots__ = ("_latitude", "_longitude", "_altitude", "_name")
+
     def __init__(self, latitude, longitude, altitude, name):
         """
         Constructor
         """
-        self._latitude = latitude
-        self._longitude = longitude
-        self._altitude = altitude
-        self._name = name
+        init = object.__setattr__
+        init(self, "_latitude", latitude)
+        init(self, "_longitude", longitude)
+        init(self, "_altitude", altitude)
+        init(self, "_name", name)
+
+    def _getKey(self):
+        """
+        Supporting function for comparing and hashing waypoints.
+        
+        @return: All values of the waypoint
+        @rtype: C{Tuple}
+        """
+        return (self._latitude, self._longitude, self._altitude, self._name)
 
     def __str__(self):
         """
@@ -110,6 +221,72 @@ class Waypoint:
         @rtype: C{String}        
         """
         return "Waypoint "  + self._name + ": " + str(self._latitude) + "," + str(self._longitude) + "," + str(self._altitude)
+
+    def __setattr__(self, name, value):
+        """
+        Prevents changing the waypoint (instances are immutable).
+        """
+        raise AttributeError("Waypoint instances are immutable")
+
+    def __delattr__(self, name):
+        """
+        Prevents changing the waypoint (instances are immutable).
+        """
+        raise AttributeError("Waypoint instances are immutable")
+
+    def __reduce__(self):
+        """
+        Supports pickling and copying (state is passed to the constructor).
+        """
+        return (Waypoint, self._getKey())
+
+    def __hash__(self):
+        """
+        Computes a hash value from all values of the waypoint.
+        """
+        return hash(self._getKey())
+
+    def __eq__(self, other):
+        """
+        Checks for equality - all values of the waypoint must be equal.
+        """
+        return isinstance(other, Waypoint) and self._getKey() == other._getKey()
+
+    def __ne__(self, other):
+        """
+        Checks for inequality (see L{__eq__}).
+        """
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        """
+        Compares all values of the waypoint in order (see L{_getKey}).
+        """
+        return self._getKey() < other._getKey()
+
+    def __le__(self, other):
+        """
+        Compares all values of the waypoint in order (see L{_getKey}).
+        """
+        return self._getKey() <= other._getKey()
+
+    def __gt__(self, other):
+        """
+        Compares all values of the waypoint in order (see L{_getKey}).
+        """
+        return self._getKey() > other._getKey()
+
+    def __ge__(self, other):
+        """
+        Compares all values of the waypoint in order (see L{_getKey}).
+        """
+        return self._getKey() >= other._getKey()
+
+    def __repr__(self):
+        """
+        Computes a representation of the waypoint, which may be evaluated to an equal instance.
+        """
+        return "Waypoint%r" % (self._getKey(),)
         
     def getLatitude(self):
         """
@@ -7,11 +7,24 @@ http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
 @contact: mailto:michael.pilgermann@gmx.de
 @contact: http://www.kichkasch.de
 @license: GPL (General Public License)
+
+@var RECV_BUFFER_SIZE: Initial size of the receive buffer of a connection (in bytes); it grows if a single line does not fit
+@type RECV_BUFFER_SIZE: C{int}
+@var BULK_CHUNK_SIZE: Default number of commands written to the server at once when sending many positions
+@type BULK_CHUNK_SIZE: C{int}
 """
 import socket
+import select
+import time
 import GLSException
 import GLSCommands
 from PythonGLS import Position, Waypoint
+from GLSCodec import defaultCodec, parsePositionLine, parseWaypointLine, parseGroupLine
+from PositionDelta import PositionSnapshot
+from PositionTable import parsePositionLines
+
+RECV_BUFFER_SIZE = 8192
+BULK_CHUNK_SIZE = 256
 
 class ServerConnection:
     """
@@ -34,7 +47,7 @@ class ServerConnection:
     @type _password: C{String}
     @ivar _deviceName: Name of the GPS device
     @type _deviceName: C{String}
-    @ivar _groupName: Name of the group to be used for this session
+    @ivar _groupName: Name of the group to be used for this session (the group joined last); it is joined again before sending positions and waypoints on a new connection
     @type _groupName: C{String}
     @ivar _serverVersion: Versions of the GLS specification supported by the server
     @type _serverVersion: C{String}
@@ -42,9 +55,33 @@ class ServerConnection:
     @type _connected: C{int}
     @ivar _s: Socket for the connection to GLS server
     @type _s: L{socket.socket}
+    @ivar _joinedGroup: Name of the group joined in the current session (C{None} if no group has been joined)
+    @type _joinedGroup: C{String}
+    @ivar _snapshot: Positions of others from the last request for changes (see L{requestPositionsDelta})
+    @type _snapshot: L{PositionDelta.PositionSnapshot}
+    @ivar _codec: Codec for encoding positions and waypoints to be sent to the server
+    @type _codec: L{GLSCodec.LineCodec}
+    @ivar _buffer: Receive buffer for replies from the GLS server; bytes not yet consumed are kept for the next command
+    @type _buffer: C{bytearray}
+    @ivar _view: Memory view on the receive buffer (used for receiving and slicing without copies)
+    @type _view: C{memoryview}
+    @ivar _bufferStart: Position of the first byte in the receive buffer, which has not been consumed yet
+    @type _bufferStart: C{int}
+    @ivar _bufferEnd: Position behind the last byte received into the receive buffer
+    @type _bufferEnd: C{int}
+    @ivar _hooks: Hooks called before and after each command (see L{Instrumentation.ConnectionHook}); no measurements are taken if empty
+    @type _hooks: C{List} of L{Instrumentation.ConnectionHook}
+    @ivar _waitTime: Time (in seconds) spent waiting for data from the server (only measured while hooks are registered)
+    @type _waitTime: C{float}
+    @ivar _connectCount: Number of times the connection has been established
+    @type _connectCount: C{int}
+    @ivar _recorder: Recorder for the data sent and received on the socket (C{None} for not recording)
+    @type _recorder: L{SessionCapture.SessionRecorder}
+    @ivar _timeout: Time (in seconds) to wait for connecting, sending or receiving before the connection is given up (C{None} for waiting without limit)
+    @type _timeout: C{float}
     """
     
-    def __init__(self, hostName, port, version, clientName, password, deviceName, groupName):
+    def __init__(self, hostName, port, version, clientName, password, deviceName, groupName, timeout = None):
         """
         Constructor
         
@@ -66,6 +103,8 @@ class ServerConnection:
         @type deviceName: C{String}
         @param groupName: Name of the group to be used for this session
         @type groupName: C{String}
+        @param timeout: Time (in seconds) to wait for connecting, sending or receiving before the connection is given up (C{None} for waiting without limit)
+        @type timeout: C{float}
         """
         self._hostName = hostName
         self._port = port
@@ -77,6 +116,18 @@ class ServerConnection:
         self._serverVersion = None
         self._connected = 0
         self._s = None
+        self._joinedGroup = None
+        self._snapshot = None
+        self._codec = defaultCodec
+        self._buffer = bytearray(RECV_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._bufferStart = 0
+        self._bufferEnd = 0
+        self._hooks = []
+        self._waitTime = 0.0
+        self._connectCount = 0
+        self._recorder = None
+        self._timeout = timeout
         
     def __del__(self):
         """
@@ -86,6 +137,67 @@ class ServerConnection:
         """
         self.closeConnection()
         
+    def _fillBuffer(self):
+        """
+        Receives the next chunk of data from the socket into the receive buffer.
+        
+        Bytes, which have already been consumed, are discarded by moving the remaining bytes to the front of the buffer.
+        If the buffer is completely filled with one incomplete line, its size is doubled. The data is read directly
+        into the buffer (via a memory view) - no intermediate strings are created.
+        
+        An L{GLSException.GLSException} is raised if the server has closed the connection.
+        """
+        pending = self._bufferEnd - self._bufferStart
+        if self._bufferStart > 0:
+            self._buffer[0:pending] = self._buffer[self._bufferStart:self._bufferEnd]
+            self._bufferStart = 0
+            self._bufferEnd = pending
+        if self._bufferEnd == len(self._buffer):
+            buffer = bytearray(2 * len(self._buffer))
+            buffer[0:pending] = self._buffer[0:pending]
+            self._buffer = buffer
+            self._view = memoryview(self._buffer)
+        try:
+            if self._hooks:
+                started = time.time()
+                count = self._s.recv_into(self._view[self._bufferEnd:])
+                self._waitTime += time.time() - started
+            else:
+                count = self._s.recv_into(self._view[self._bufferEnd:])
+        except socket.error, e:
+            self._dropConnection()
+            raise GLSException.GLSException("Connection to server lost.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+        if count == 0:
+            self._dropConnection()
+            raise GLSException.GLSException("Connection closed by server.", GLSException.EC_CONNECTION_LOST, "The server closed the connection while the client was waiting for a reply.")
+        self._bufferEnd += count
+
+    def _readLine(self):
+        """
+        Reads exactly one line from the connection to the GLS server.
+        
+        Lines are taken from the receive buffer of this connection; if the buffer does not contain a complete line,
+        more data is received from the socket. Bytes following the line remain in the buffer for the next call,
+        so replies may be split across TCP segments arbitrarily.
+        
+        @return: The line without the terminating line feed
+        @rtype: C{String}
+        """
+        while 1:
+            pos = self._buffer.find("\n", self._bufferStart, self._bufferEnd)
+            if pos >= 0:
+                line = self._view[self._bufferStart:pos].tobytes()
+                self._bufferStart = pos + 1
+                return line
+            self._fillBuffer()
+
+    def _resetBuffer(self):
+        """
+        Discards all the content of the receive buffer.
+        """
+        self._bufferStart = 0
+        self._bufferEnd = 0
+
     def _sendCommand(self, command, initMode = 0):
         """
         Sends exactly one command to the GLS server.
@@ -101,6 +213,9 @@ class ServerConnection:
         The replies are checked for error messages. If the reply is either a "C" or an "E" an L{GLSException.GLSException}
         will be raised.
         
+        If the connection is not established yet, the command is sent together with the handshake (see
+        L{_establishConnection}).
+        
         @param command: Command to be sent to the server
         @type command: C{String}
         @param initMode: When sending this command the connection is in initialisation mode; meaning, it shall no be checked, whether a connection is establised already
@@ -110,11 +225,75 @@ class ServerConnection:
         """
 ##        print "Sending %s" %command
         if not self._connected and not initMode:
-            self._establishConnection()
-        self._s.send(command +'\n')
-        data, tmp = self._s.recvfrom(1024)
-        data = data[:len(data)-1]   # remove line feed
+            result = self._establishConnection([command])[0]
+            if isinstance(result, GLSException.GLSException):
+                raise result
+            return result
+        self._writeCommands([command])
+        return self._receiveReply(command)
 
+    def _receiveReply(self, command):
+        """
+        Receives the complete reply for one command from the GLS server.
+        
+        See L{_sendCommand} for the format of the reply and the checks applied to it. The reply is always read up to
+        its end - even if an exception is raised - so the next reply on the connection can be read afterwards.
+        
+        If hooks are registered, they are called as soon as the reply has been received (see L{addHook}).
+        
+        @param command: Command, the reply belongs to (used for error messages only)
+        @type command: C{String}
+        @return: Received reply from the server. A String in case of a single line reply; an array of strings in case of multi line reply.
+        @rtype: C{String} or C{List} of C{String}
+        """
+        if not self._hooks:
+            return self._readReply(command)
+        started = time.time()
+        waited = self._waitTime
+        try:
+            data = self._readReply(command)
+        except GLSException.GLSException, e:
+            if e.getErrorCode() == GLSException.EC_CONNECTION_LOST:
+                self._commandDone(command, e, 0, 0, started, waited)
+            else:
+                self._commandDone(command, e, 1, 2, started, waited)
+            raise
+        if isinstance(data, list):
+            self._commandDone(command, None, len(data), sum([len(line) for line in data]) + len(data), started, waited)
+        else:
+            self._commandDone(command, None, 1, len(data) + 1, started, waited)
+        return data
+
+    def _readReply(self, command):
+        """
+        Supporting function to read the lines of one reply and to check them (see L{_receiveReply}).
+        """
+        data = self._readLine()
+        self._checkReply(data, command)
+        
+##        print "\t\treceived (1st):" + data
+        
+        if self._isMultiLineReply(data):
+            ret = [data]
+            while data[:1] != GLSCommands.RE_FINISHED:   # fill up return list until the FINISH line comes in
+                data = self._readLine()
+##                print "\t\treceived (next):" + data
+                ret.append(data)
+            data = ret
+##        print "\tReceived %s" %data
+        return data
+
+    def _checkReply(self, data, command):
+        """
+        Checks the first line of a reply for error messages.
+        
+        An L{GLSException.GLSException} is raised if the line is empty or if it is either a "C" or an "E".
+        
+        @param data: First line of the reply (without line feed)
+        @type data: C{String}
+        @param command: Command, the reply belongs to (used for error messages only)
+        @type command: C{String}
+        """
         if len(data) < 1:
             raise GLSException.GLSException("No data from server.", GLSException.EC_VALIDATION_ERROR, "No data was returned from the server for the command " + command)
 
@@ -122,33 +301,140 @@ class ServerConnection:
             raise GLSException.GLSException("Violation of business rules (C) when sending the command.", GLSException.EC_VIOLATION_BUSINESS_RULES, "A business rule was violated when sending the command " + command)
         if data[0] == GLSCommands.RE_ERROR:
             raise GLSException.GLSException("Validation error (E) when sending the command.", GLSException.EC_VALIDATION_ERROR, "A validation error occured when sending the command " + command)
+
+    def _isMultiLineReply(self, data):
+        """
+        Checks, whether the given first line of a reply starts a multi line reply (terminated by an "F" line).
         
-##        print "\t\treceived (1st):" + data
+        @param data: First line of the reply (without line feed)
+        @type data: C{String}
+        @return: 1 if more lines belong to the reply; 0 otherwise
+        @rtype: C{int}
+        """
+        return data[0] == GLSCommands.RE_POSITION or data[0] == GLSCommands.RE_WAYPOINT or data[0] == GLSCommands.RE_GROUP or data[0] == GLSCommands.RE_FINISHED
+
+    def _iterReply(self, command):
+        """
+        Sends one command to the GLS server and delivers the lines of the (multi line) reply one by one as they arrive.
         
-        if data[0] == GLSCommands.RE_POSITION or data[0] == GLSCommands.RE_WAYPOINT or data[0] == GLSCommands.RE_GROUP or data[0] == GLSCommands.RE_FINISHED:
-            ret = []
-            tokens = data.split("\n")
-            for t in tokens:
-                ret.append(t)
-                data = t
-            while data[0] != GLSCommands.RE_FINISHED:   # fill up return list until the FINISH line comes in
-                data = self._s.recv(1024)
-##                print "\t\treceived (next):" + data
-                data = data[:len(data)-1]   # remove line feed
-                tokens = data.split("\n")
-                for t in tokens:
-                    ret.append(t)
-                    data = t
-            data = ret
-##        print "\tReceived %s" %data
-        return data
-    
-    def _sendCommands(self, commands, initMode = 0):
+        The reply is checked for errors the same way as in L{_sendCommand}. The terminating "F" line is not delivered.
+        If the generator is closed before the end of the reply has been reached, the remaining lines are read and
+        discarded, so the connection may be used for the next command afterwards. Hence, the generator must be consumed
+        completely or closed before the next command is sent on this connection.
+        
+        If hooks are registered, they are called as soon as the generator is finished (see L{addHook}).
+        
+        @param command: Command to be sent to the server
+        @type command: C{String}
+        @return: Generator for the lines of the reply (without line feeds)
+        @rtype: C{Generator} of C{String}
+        """
+        if self._hooks:
+            return self._iterReplyMeasured(command)
+        return self._iterLines(command)
+
+    def _iterReplyMeasured(self, command):
+        """
+        Supporting function to deliver the lines of a reply (see L{_iterReply}) and to call the hooks afterwards.
+        """
+        started = time.time()
+        waited = self._waitTime
+        lines = 0
+        received = 0
+        error = None
+        try:
+            try:
+                for line in self._iterLines(command):
+                    lines += 1
+                    received += len(line) + 1
+                    yield line
+                lines += 1
+                received += 2
+            except GLSException.GLSException, e:
+                error = e
+                raise
+        finally:
+            self._commandDone(command, error, lines, received, started, waited)
+
+    def _iterLines(self, command):
+        """
+        Supporting function to send one command and to deliver the lines of the reply (see L{_iterReply}).
+        """
+        if not self._connected:
+            self._establishConnection()
+        self._writeCommands([command])
+        data = self._readLine()
+        self._checkReply(data, command)
+        if not self._isMultiLineReply(data) or data[0] == GLSCommands.RE_FINISHED:
+            return
+        finished = 0
+        try:
+            while 1:
+                yield data
+                data = self._readLine()
+                if data[:1] == GLSCommands.RE_FINISHED:
+                    finished = 1
+                    return
+        finally:
+            if not finished and self._connected:
+                try:
+                    while self._readLine()[:1] != GLSCommands.RE_FINISHED:
+                        pass
+                except GLSException.GLSException:
+                    pass
+
+    def _writeCommands(self, commands):
+        """
+        Writes a batch of commands to the GLS server at once without waiting for any reply.
+        
+        @param commands: Commands to be sent to the GLS server. They must not contain the line feed.
+        @type commands: C{List} of C{String}
+        """
+        for hook in self._hooks:
+            for command in commands:
+                hook.beforeCommand(self, command)
+        try:
+            self._s.sendall("\n".join(commands) + "\n")
+        except socket.error, e:
+            self._dropConnection()
+            raise GLSException.GLSException("Connection to server lost.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+
+    def _receiveReplies(self, commands):
+        """
+        Receives the replies for a batch of commands, which has been written to the server beforehand.
+        
+        Replies are assigned to the commands in order - the end of each reply is determined the same way as
+        in L{_receiveReply}. Replies, which indicate an error on the server, do not stop the processing; the
+        corresponding L{GLSException.GLSException} is put in the result list instead of the reply. If the connection
+        is lost, the exception is put in the result list for this command and all the remaining ones.
+        
+        @param commands: Commands, which have been sent to the GLS server
+        @type commands: C{List} of C{String}
+        @return: Replies (or exceptions) for the commands in the order of the commands
+        @rtype: C{List} of C{String} | C{List} | L{GLSException.GLSException}
+        """
+        results = []
+        for command in commands:
+            try:
+                results.append(self._receiveReply(command))
+            except GLSException.GLSException, e:
+                if e.getErrorCode() == GLSException.EC_CONNECTION_LOST:
+                    results.extend([e] * (len(commands) - len(results)))
+                    break
+                results.append(e)
+        return results
+
+    def _sendCommands(self, commands, initMode = 0, pipelined = 0):
         """
         Sends an array of commands to the GLS server (line by line).
         
         Each item in the lists is sent to the GLS server. Before sending, a line feed is appended.
         
+        In pipelined mode, all commands are written to the server at once and the replies are assigned to the commands
+        afterwards (in order). This way, the whole batch costs only one round trip to the server. All replies are received
+        before the first error (if any) is raised as L{GLSException.GLSException}. If the connection has not been established
+        yet, the commands are sent together with the handshake.
+        
         Received results are stored in a dictionary - the list of commands makes up the keys in the dictionary,
         the received results are the values. (Values might either be a simple string or a list of strings in case of
         several lines are sent back by the server for a command.
@@ -157,16 +443,30 @@ class ServerConnection:
         @type commands: C{List}
         @param initMode: When sending this command the connection is in initialisation mode; meaning, it shall no be checked, whether a connection is establised already
         @type initMode: C{int}
+        @param pipelined: Write all commands at once before receiving the replies (1) or send them one by one (0)
+        @type pipelined: C{int}
         @return: Received results for all command
         @rtype: C{Dict} of C{String} and C{String} | C{List}
         """
         results = {}
+        if pipelined:
+            if not self._connected and not initMode:
+                replies = self._establishConnection(commands)
+            else:
+                self._writeCommands(commands)
+                replies = self._receiveReplies(commands)
+            for reply in replies:
+                if isinstance(reply, GLSException.GLSException):
+                    raise reply
+            for i in range(len(commands)):
+                results[commands[i]] = replies[i]
+            return results
         for item in commands:
             result = self._sendCommand(item, initMode)
             results[item] = result
         return results
         
-    def _establishConnection(self):
+    def _establishConnection(self, commands = []):
         """
         Starts up the connection to the GLS server.
         
@@ -174,54 +474,272 @@ class ServerConnection:
         is available for this connection, it is used - if no password is available, the connection is being established
         without providing one.
         
+        The handshake commands are pipelined - they are written to the server in one go together with the given
+        additional commands; this way, connecting and sending the first commands costs only one round trip.
+        
         The socket is stored in the 
         instance reference (L{_s}) and the state of the connection (L{_connected}) is set to 1. The reply of the
         server with the supported versions is stored in the instance reference (L{_serverVersion}).
+        
+        @param commands: Additional commands to be sent to the server right after the handshake
+        @type commands: C{List} of C{String}
+        @return: Replies (or exceptions) for the additional commands; see L{_receiveReplies}
+        @rtype: C{List} of C{String} | C{List} | L{GLSException.GLSException}
         """
         if self._connected:
-            return
+            if not commands:
+                return []
+            self._writeCommands(commands)
+            return self._receiveReplies(commands)
 ##        print "Connection attempt for %s." %self._hostName
-        self._s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._s.connect((self._hostName, self._port))
-        data, tmp = self._s.recvfrom(1024)
-        self._serverVersion = data[:len(data)-1]
-        
-        try:
-            res = self._sendCommand(GLSCommands.CO_VERSION +self._version, 1)
-        except GLSException.GLSException:
-            raise GLSException.GLSException("Requested version of GLS specification not supported by server.", GLSException.EC_VERSION_NOT_SUPPORTED, "Version mismatch - server understands %s; client wants to speak %s" % (self._serverVersion, self._version))
-        
         if self._password:
             comm = GLSCommands.CO_LOGIN + self._clientName + "," + self._password
         else:
             comm = GLSCommands.CO_LOGIN + self._clientName
+        handshake = [GLSCommands.CO_VERSION +self._version, comm, GLSCommands.CO_DEVICE + self._deviceName]
 
+        started = time.time()
+        self._s = self._createSocket()
         try:
-            res = self._sendCommand(comm, 1)
-        except GLSException.GLSException:
-            raise GLSException.GLSException("Authentication error when connecting to GLS server.", GLSException.EC_AUTHENTICATION_ERROR, "The client (%s) could not be authenticated on the server." %(self._clientName))
-        
+            self._s.connect((self._hostName, self._port))
+        except socket.error, e:
+            self._s.close()
+            raise GLSException.GLSException("Could not connect to server.", GLSException.EC_CONNECTION_LOST, "Underlaying error: " + str(e))
+        self._resetBuffer()
         try:
-            res = self._sendCommand(GLSCommands.CO_DEVICE + self._deviceName, 1)  
-        except GLSException.GLSException:
-            raise GLSException.GLSException("Device not accepted by server.", GLSException.EC_UNKNOWN_ERROR, "The server did not accept the device (%s) for the connection establishment." %(self._deviceName))
+            self._writeCommands(handshake + list(commands))
+            self._serverVersion = self._readLine()
+            results = self._receiveReplies(handshake + list(commands))
+        except Exception:
+            self._s.close()
+            raise
+        
+        failures = [
+            GLSException.GLSException("Requested version of GLS specification not supported by server.", GLSException.EC_VERSION_NOT_SUPPORTED, "Version mismatch - server understands %s; client wants to speak %s" % (self._serverVersion, self._version)),
+            GLSException.GLSException("Authentication error when connecting to GLS server.", GLSException.EC_AUTHENTICATION_ERROR, "The client (%s) could not be authenticated on the server." %(self._clientName)),
+            GLSException.GLSException("Device not accepted by server.", GLSException.EC_UNKNOWN_ERROR, "The server did not accept the device (%s) for the connection establishment." %(self._deviceName))]
+        for i in range(len(handshake)):
+            if isinstance(results[i], GLSException.GLSException):
+                self._s.close()
+                raise failures[i]
 
         self._connected = 1
+        self._joinedGroup = None
+        self._connectCount += 1
+        if self._hooks:
+            duration = time.time() - started
+            for hook in self._hooks:
+                hook.connected(self, duration, self._connectCount > 1)
 ##        print "Connected to %s " %self._hostName
+        return results[len(handshake):]
+        
         
+    def _createSocket(self):
+        """
+        Creates the socket for a new connection to the server (not connected yet).
+        
+        The timeout of the connection (see L{setTimeout}) is applied to the socket and TCP keepalive is switched on, so a
+        connection, which has silently gone away (for instance behind NAT or on a mobile network), does not block forever;
+        running into the timeout is reported as a lost connection. If a recorder is set (see L{setRecorder}), the socket is
+        wrapped, so all data sent and received is recorded. Subclasses may override this method to talk to something else
+        than a real server.
         
+        @return: Socket for the connection
+        @rtype: L{socket.socket}
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self._timeout)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if self._recorder is not None:
+            return self._recorder.wrapSocket(sock)
+        return sock
+
     def closeConnection(self):
         """
         Closes down the socket to the server.
+        
+        The server is notified (Q) before the socket is closed. If the connection has been lost already, the socket is
+        closed silently.
         """
         if not self._connected:
             return
 ##        print "Closing connection to GLS server"
-        self._sendCommand(GLSCommands.CO_QUIT)
-        self._s.close()
-        self._connected = 0
+        try:
+            self._sendCommand(GLSCommands.CO_QUIT)
+        except GLSException.GLSException:
+            pass
+        self._dropConnection()
 ##        print "\tConnection closed"
 
+    def shutdownConnection(self):
+        """
+        Shuts down the socket to the server without waiting for a command in progress.
+        
+        May be called from another thread than the one using the connection: a command in progress fails at once with
+        C{EC_CONNECTION_LOST} (and the connection is dropped by the thread using it). Afterwards, the connection may be
+        closed down as usual.
+        """
+        s = self._s
+        if s is not None:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def _dropConnection(self):
+        """
+        Closes the socket to the server without notifying the server.
+        
+        Used if the connection is in an unknown state (for instance after a network error); the connection will be
+        established again with the next command.
+        """
+        if self._s:
+            try:
+                self._s.close()
+            except socket.error:
+                pass
+        self._connected = 0
+        self._joinedGroup = None
+        self._resetBuffer()
+
+    def addHook(self, hook):
+        """
+        Registers a hook, which is called before and after each command sent on this connection.
+        
+        As long as no hook is registered, no measurements are taken on the connection.
+        
+        @param hook: Hook to be called
+        @type hook: L{Instrumentation.ConnectionHook}
+        """
+        self._hooks.append(hook)
+
+    def removeHook(self, hook):
+        """
+        Unregisters a hook, which has been registered with L{addHook} before.
+        
+        @param hook: Hook, which shall not be called anymore
+        @type hook: L{Instrumentation.ConnectionHook}
+        """
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def getHooks(self):
+        """
+        GETTER
+        
+        @return: Hooks registered for this connection
+        @rtype: C{List} of L{Instrumentation.ConnectionHook}
+        """
+        return list(self._hooks)
+
+    def _commandDone(self, command, error, lines, received, started, waited):
+        """
+        Supporting function to call the hooks after the reply for a command has been received.
+        
+        @param started: Time, receiving the reply was started
+        @type started: C{float}
+        @param waited: Time spent waiting for the network (L{_waitTime}) when receiving the reply was started
+        @type waited: C{float}
+        """
+        duration = time.time() - started
+        wait = self._waitTime - waited
+        for hook in self._hooks:
+            hook.afterCommand(self, command, error, lines, received, duration, wait)
+
+    def _parseDone(self, command, started):
+        """
+        Supporting function to call the hooks after a reply has been decoded.
+        
+        @param started: Time, decoding the reply was started
+        @type started: C{float}
+        """
+        duration = time.time() - started
+        for hook in self._hooks:
+            hook.afterParse(self, command, duration)
+
+    def isAlive(self):
+        """
+        Checks cheaply, whether the connection to the server is still usable.
+        
+        Nothing is sent to the server - the socket is only checked (without blocking) for having been closed by the server
+        or by the network stack. Use L{testConnection} for a full round trip to the server. A dead connection is closed; it
+        will be established again with the next command.
+        
+        @return: 1 if the connection is established and has not been closed; 0 otherwise
+        @rtype: C{int}
+        """
+        if not self._connected:
+            return 0
+        try:
+            readable, writable, failed = select.select([self._s], [], [], 0)
+            if readable and not self._s.recv(1, socket.MSG_PEEK):
+                self._dropConnection()
+                return 0
+        except (socket.error, select.error):
+            self._dropConnection()
+            return 0
+        return 1
+
+    def setTimeout(self, timeout):
+        """
+        SETTER
+        
+        Applies to the current connection as well as to connections established later.
+        
+        @param timeout: Time (in seconds) to wait for connecting, sending or receiving before the connection is given up (C{None} for waiting without limit)
+        @type timeout: C{float}
+        """
+        self._timeout = timeout
+        if self._connected:
+            self._s.settimeout(timeout)
+
+    def getTimeout(self):
+        """
+        GETTER
+        
+        @return: Time (in seconds) to wait for connecting, sending or receiving before the connection is given up (C{None} for waiting without limit)
+        @rtype: C{float}
+        """
+        return self._timeout
+
+    def setCodec(self, codec):
+        """
+        SETTER
+        
+        @param codec: Codec for encoding positions and waypoints (for instance with a different precision)
+        @type codec: L{GLSCodec.LineCodec}
+        """
+        self._codec = codec
+
+    def setRecorder(self, recorder):
+        """
+        SETTER
+        
+        Recording starts with the next connection to the server; a connection already established is not recorded.
+        
+        @param recorder: Recorder for the data sent and received (C{None} for not recording)
+        @type recorder: L{SessionCapture.SessionRecorder}
+        """
+        self._recorder = recorder
+
+    def getRecorder(self):
+        """
+        GETTER
+        
+        @return: Recorder for the data sent and received (C{None} if not recording)
+        @rtype: L{SessionCapture.SessionRecorder}
+        """
+        return self._recorder
+
+    def getJoinedGroup(self):
+        """
+        GETTER
+        
+        @return: Name of the group joined in the current session (C{None} if no group has been joined or the connection is closed)
+        @rtype: C{String}
+        """
+        return self._joinedGroup
+
         
     def testConnection(self):
         """
@@ -248,16 +766,32 @@ class ServerConnection:
         """
         try:
             res = self._sendCommand(GLSCommands.CO_GROUP)    
-            ret = []
-            for item in res:
-                if item[0]!= GLSCommands.RE_FINISHED:
-                    ret.append(item[1:])
+            if self._hooks:
+                started = time.time()
+            ret = self._decodeGroups(res)
+            if self._hooks:
+                self._parseDone(GLSCommands.CO_GROUP, started)
             return ret
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
             raise GLSException.GLSException("Could not request groups from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
         
+    def _decodeGroups(self, res):
+        """
+        Supporting function to decode the reply to a "G" request.
+        
+        @param res: Lines of the reply (including the "F" line)
+        @type res: C{List} of C{String}
+        @return: Names of the groups
+        @rtype: C{List} of C{String}
+        """
+        ret = []
+        for item in res:
+            if item[0]!= GLSCommands.RE_FINISHED:
+                ret.append(parseGroupLine(item))
+        return ret
+
     def joinGroup(self, groupName):
         """
         Makes an attempt to join a group on the server.
@@ -269,66 +803,142 @@ class ServerConnection:
         """
         try:
             res = self._sendCommand(GLSCommands.CO_GROUP + groupName) 
+            self._joinedGroup = self._groupName = groupName
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
             raise GLSException.GLSException("Could not join group on server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
 
-    def _packFloatsInString(self, floats, separator = ","):
+    def sendPosition(self, position):
+        """
+        Sends a GPS position to the server.
+        
+        @param position: GPS position to be sent to the server
+        @type position: L{PythonGLS.Position}
+        """
+        try:
+            res = self._sendInGroup(self._formatPosition(position)) 
+        except Exception, e:
+            if isinstance(e, GLSException.GLSException):
+                raise e
+            raise GLSException.GLSException("Could not send position to server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def _formatPosition(self, position):
         """
-        Supporting function to pack together a bunch of floats in a string.
+        Supporting function to pack a position into a "P" command.
         
-        @param floats: Numbers to be packed
-        @type floats: C{List} of C{Float}
-        @param separator: Character to put between two numbers
-        @type separator: C{String}
-        @return: String containing all the given numbers
+        @param position: GPS position to be sent to the server
+        @type position: L{PythonGLS.Position}
+        @return: Command for sending the position (without line feed)
         @rtype: C{String}
         """
-        st = ""
-        for nr in floats:
-            st += str(nr) + separator
-        st = st[:len(st) - len(separator)]
-        return st
+        return self._codec.formatPosition(position)
+
+    def _needsJoin(self):
+        """
+        Supporting function to check, whether the group of the session has to be joined (again) before sending.
         
-    def _extractFloatsFromString(self, st, separator = ","):
+        The server forgets the group with the connection; after reconnecting, positions and waypoints would be rejected
+        until the group is joined again.
+        
+        @return: 1 if the group of the session has not been joined on the current connection; otherwise 0
+        @rtype: C{int}
+        """
+        return self._groupName is not None and self._joinedGroup != self._groupName
+
+    def _sendInGroup(self, command):
         """
-        Supporting function to unpack a bunch of floats from a string.
+        Supporting function to send a command, which requires a joined group (such as "P" or "W").
         
-        All items from the list, which cannot be transformed into floats, will be returned as strings within the list.
+        If the group of the session has not been joined on the current connection, the join is written to the server
+        together with the command, so it costs no additional round trip.
         
-        @param st: String containing the numbers
-        @type st: C{String}
-        @param separator: Character to put between two numbers
-        @type separator: C{String}
-        @return: List containing the unpacked numbers
-        @rtype: C{List} of C{Float}
+        @param command: Command to be sent to the server (without line feed)
+        @type command: C{String}
+        @return: Reply of the server for the command
+        @rtype: C{String}
         """
-        items = st.split(separator)
-        ret = []
-        for item in items:
-            try:
-                ret.append(float(item))
-            except ValueError:
-                ret.append(item)
-        return ret
+        if not self._needsJoin():
+            return self._sendCommand(command)
+        groupName = self._groupName
+        res = self._sendCommands([GLSCommands.CO_GROUP + groupName, command], pipelined = 1)[command]
+        self._joinedGroup = groupName
+        return res
+
+    def _sendBulk(self, commands, offset = 0):
+        """
+        Writes a batch of commands to the server at once and checks the single line replies ("K", "C" or "E").
+        
+        If the group of the session has not been joined on the current connection (for instance after reconnecting), the
+        join is written in front of the batch. Raises an L{GLSException.GLSException} if the group cannot be joined (none
+        of the commands has been accepted then) or if the connection is lost while waiting for the replies.
         
+        @param commands: Commands to be sent to the server
+        @type commands: C{List} of C{String}
+        @param offset: Number to be added to the position of a command in the batch when reporting rejected commands
+        @type offset: C{int}
+        @return: Rejected commands; each one as position in the batch (plus offset) and the error reported by the server
+        @rtype: C{List} of C{Tuple} of C{int} and L{GLSException.GLSException}
+        """
+        groupName = None
+        if self._needsJoin():
+            groupName = self._groupName
+            commands = [GLSCommands.CO_GROUP + groupName] + list(commands)
+        if not self._connected:
+            replies = self._establishConnection(commands)
+        else:
+            self._writeCommands(commands)
+            replies = self._receiveReplies(commands)
+        if groupName is not None:
+            joined = replies.pop(0)
+            if isinstance(joined, GLSException.GLSException):
+                if joined.getErrorCode() == GLSException.EC_CONNECTION_LOST:
+                    raise GLSException.GLSException("Connection lost while sending to the server.", GLSException.EC_CONNECTION_LOST, "Connection was lost before the group had been joined.")
+                raise GLSException.GLSException("Could not join group on server.", joined.getErrorCode(), "Group %s could not be joined before sending; none of the commands has been accepted. Underlaying error: %s" %(groupName, str(joined)))
+            self._joinedGroup = groupName
+        rejected = []
+        for i in range(len(replies)):
+            if isinstance(replies[i], GLSException.GLSException):
+                if replies[i].getErrorCode() == GLSException.EC_CONNECTION_LOST:
+                    raise GLSException.GLSException("Connection lost while sending to the server.", GLSException.EC_CONNECTION_LOST, "Connection was lost after %d commands had been answered by the server." %(offset + i))
+                rejected.append((offset + i, replies[i]))
+        return rejected
 
-    def sendPosition(self, position):
+    def sendPositions(self, positions, chunkSize = BULK_CHUNK_SIZE):
         """
-        Sends a GPS position to the server.
+        Sends many GPS positions to the server (for instance a track recorded while the server was not reachable).
         
-        @param position: GPS position to be sent to the server
-        @type position: L{PythonGLS.Position}
+        The positions are written to the server in chunks without waiting for the replies in between; this way,
+        each chunk costs only one round trip. All replies are checked - positions rejected by the server do not stop
+        the sending; they are reported in the returned list instead.
+        
+        Raises an L{GLSException.GLSException} if the connection fails. In this case, it is unknown, which of the positions of the
+        current chunk have been processed by the server.
+        
+        @param positions: GPS positions to be sent to the server (in this order)
+        @type positions: C{Iterable} of L{PythonGLS.Position}
+        @param chunkSize: Maximum number of positions written to the server at once
+        @type chunkSize: C{int}
+        @return: Rejected positions; each one as index in the given positions and the error reported by the server (empty if all positions were accepted)
+        @rtype: C{List} of C{Tuple} of C{int} and L{GLSException.GLSException}
         """
-        numbers = [position.getLatitude(), position.getLongitude(), position.getAltitude(), position.getSpeed(), position.getBearing()]
-        posStr = self._packFloatsInString(numbers)
+        rejected = []
+        chunk = []
+        sent = 0
         try:
-            res = self._sendCommand(GLSCommands.CO_POSITION + posStr) 
+            for position in positions:
+                chunk.append(self._formatPosition(position))
+                if len(chunk) >= chunkSize:
+                    rejected.extend(self._sendBulk(chunk, sent))
+                    sent += len(chunk)
+                    chunk = []
+            if chunk:
+                rejected.extend(self._sendBulk(chunk, sent))
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
-            raise GLSException.GLSException("Could not send position to server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+            raise GLSException.GLSException("Could not send positions to server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+        return rejected
 
     def sendWaypoint(self, waypoint):
         """
@@ -337,55 +947,209 @@ class ServerConnection:
         @param waypoint: Waypoint to be sent to the server
         @type waypoint: L[PythonGLS.Waypoint}
         """
-        numbers = [waypoint.getLatitude(), waypoint.getLongitude(), waypoint.getAltitude()]
-        wpStr = self._packFloatsInString(numbers)
         try:
-            res = self._sendCommand(GLSCommands.CO_WAYPOINT + wpStr + "," + waypoint.getName()) 
+            res = self._sendInGroup(self._formatWaypoint(waypoint)) 
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
             raise GLSException.GLSException("Could not send waypoint to server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def _formatWaypoint(self, waypoint):
+        """
+        Supporting function to pack a waypoint into a "W" command.
+        
+        @param waypoint: Waypoint to be sent to the server
+        @type waypoint: L{PythonGLS.Waypoint}
+        @return: Command for sending the waypoint (without line feed)
+        @rtype: C{String}
+        """
+        return self._codec.formatWaypoint(waypoint)
         
-    def requestPositions(self):
+    def requestPositions(self, groupName = None):
         """
         Requests positions of others from the server.
         
+        If a group name is given, the group is joined first. Both commands are sent to the server at once, so
+        joining and requesting costs only one round trip (together with the handshake, if the connection has not been
+        established yet).
+        
+        @param groupName: Name of the group to join before requesting the positions (optional)
+        @type groupName: C{String}
         @return: List of position of others received from the server in dictionary format. The key is the name of the "other", the value is the position.
         @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
         """
         try:
-            res = self._sendCommand(GLSCommands.CO_POSITION)    
-            ret = {}
-            for item in res:
-                if item[0]!= GLSCommands.RE_FINISHED:
-                    line = item[1:]
-                    tokens = self._extractFloatsFromString(line)
-                    ret[tokens[0]] = Position(tokens[1],tokens[2],tokens[3],tokens[4],tokens[5])
+            if groupName:
+                res = self._sendCommands([GLSCommands.CO_GROUP + groupName, GLSCommands.CO_POSITION], pipelined = 1)[GLSCommands.CO_POSITION]
+                self._joinedGroup = self._groupName = groupName
+            else:
+                res = self._sendCommand(GLSCommands.CO_POSITION)    
+            if self._hooks:
+                started = time.time()
+            ret = self._decodePositions(res)
+            if self._hooks:
+                self._parseDone(GLSCommands.CO_POSITION, started)
             return ret
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
             raise GLSException.GLSException("Could not request positions of others from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
         
-    def requestWaypoints(self):
+    def _decodePositions(self, res):
+        """
+        Supporting function to decode the reply to a "P" request.
+        
+        @param res: Lines of the reply (including the "F" line)
+        @type res: C{List} of C{String}
+        @return: Positions of others; the key is the name of the "other", the value is the position
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position}
+        """
+        ret = {}
+        for item in res:
+            if item[0]!= GLSCommands.RE_FINISHED:
+                name, position = parsePositionLine(item)
+                ret[name] = position
+        return ret
+
+    def requestWaypoints(self, groupName = None):
         """
         Requests waypoints of others from the server.
 
+        If a group name is given, the group is joined first within the same round trip (see L{requestPositions}).
+
+        @param groupName: Name of the group to join before requesting the waypoints (optional)
+        @type groupName: C{String}
         @return: List of waypoints of others received from the server in dictionary format. The key is the name of the "other", the value is the waypoint.
         @rtype: C{Dict} of C{String} | L{PythonGLS.Waypoint}
         """
         try:
-            res = self._sendCommand(GLSCommands.CO_WAYPOINT)    
-            ret = {}
-            for item in res:
-                if item[0]!= GLSCommands.RE_FINISHED:
-                    line = item[1:]
-                    tokens = self._extractFloatsFromString(line)
-                    ret[tokens[0]] = Waypoint(tokens[1],tokens[2],tokens[3],tokens[4])
+            if groupName:
+                res = self._sendCommands([GLSCommands.CO_GROUP + groupName, GLSCommands.CO_WAYPOINT], pipelined = 1)[GLSCommands.CO_WAYPOINT]
+                self._joinedGroup = self._groupName = groupName
+            else:
+                res = self._sendCommand(GLSCommands.CO_WAYPOINT)    
+            if self._hooks:
+                started = time.time()
+            ret = self._decodeWaypoints(res)
+            if self._hooks:
+                self._parseDone(GLSCommands.CO_WAYPOINT, started)
             return ret
         except Exception, e:
             if isinstance(e, GLSException.GLSException):
                 raise e
             raise GLSException.GLSException("Could not request positions of others from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def _decodeWaypoints(self, res):
+        """
+        Supporting function to decode the reply to a "W" request.
+        
+        @param res: Lines of the reply (including the "F" line)
+        @type res: C{List} of C{String}
+        @return: Waypoints of others; the key is the name of the "other", the value is the waypoint
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Waypoint}
+        """
+        ret = {}
+        for item in res:
+            if item[0]!= GLSCommands.RE_FINISHED:
+                name, waypoint = parseWaypointLine(item)
+                ret[name] = waypoint
+        return ret
+
+    def iterGroups(self):
+        """
+        Requests the available groups from the server and delivers them one by one as they arrive.
+        
+        See L{_iterReply} for the rules for consuming the generator.
+        
+        @return: Generator for the names of the available groups
+        @rtype: C{Generator} of C{String}
+        """
+        try:
+            for item in self._iterReply(GLSCommands.CO_GROUP):
+                yield parseGroupLine(item)
+        except Exception, e:
+            if isinstance(e, GLSException.GLSException):
+                raise e
+            raise GLSException.GLSException("Could not request groups from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def iterPositions(self):
+        """
+        Requests positions of others from the server and delivers them one by one as they arrive.
+        
+        In contrast to L{requestPositions}, no lines are collected before processing; each position is parsed as soon as
+        its line has been received. See L{_iterReply} for the rules for consuming the generator.
+        
+        @return: Generator for the positions of others; each item is made up by the name of the "other" and its position
+        @rtype: C{Generator} of C{Tuple} of C{String} and L{PythonGLS.Position}
+        """
+        try:
+            for item in self._iterReply(GLSCommands.CO_POSITION):
+                yield parsePositionLine(item)
+        except Exception, e:
+            if isinstance(e, GLSException.GLSException):
+                raise e
+            raise GLSException.GLSException("Could not request positions of others from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def iterWaypoints(self):
+        """
+        Requests waypoints of others from the server and delivers them one by one as they arrive.
+        
+        See L{iterPositions} and L{_iterReply} for details.
+        
+        @return: Generator for the waypoints of others; each item is made up by the name of the "other" and the waypoint
+        @rtype: C{Generator} of C{Tuple} of C{String} and L{PythonGLS.Waypoint}
+        """
+        try:
+            for item in self._iterReply(GLSCommands.CO_WAYPOINT):
+                yield parseWaypointLine(item)
+        except Exception, e:
+            if isinstance(e, GLSException.GLSException):
+                raise e
+            raise GLSException.GLSException("Could not request waypoints of others from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+
+    def requestPositionsDelta(self, epsilon = 0.0, ttl = None):
+        """
+        Requests positions of others from the server and reports only the changes since the last call.
+        
+        The connection keeps the positions from the previous call (see L{PositionDelta.PositionSnapshot}). On the first call,
+        all members are reported as added.
+        
+        @param epsilon: Tolerance (in degrees) for changes of latitude and longitude, which are not reported as move
+        @type epsilon: C{float}
+        @param ttl: Time (in seconds) a member missing in the replies is kept before it is reported as removed (C{None} for reporting it immediately)
+        @type ttl: C{float}
+        @return: Members added, moved and removed since the last call
+        @rtype: L{PositionDelta.PositionDelta}
+        """
+        if self._snapshot is None:
+            self._snapshot = PositionSnapshot(epsilon, ttl)
+        else:
+            self._snapshot.setEpsilon(epsilon)
+            self._snapshot.setTtl(ttl)
+        return self._snapshot.update(self.iterPositions(), time.time())
+
+    def getPositionSnapshot(self):
+        """
+        GETTER
+        
+        @return: Positions of others from the last request for changes (C{None} if no changes have been requested yet)
+        @rtype: L{PositionDelta.PositionSnapshot}
+        """
+        return self._snapshot
+
+    def requestPositionTable(self):
+        """
+        Requests positions of others from the server and delivers them column by column.
         
+        No L{PythonGLS.Position} is created for the members; the lines of the reply are parsed directly into the columns
+        of the table (vectorized, if NumPy is installed). Use this for computations over all members of large groups.
         
+        @return: Positions of others
+        @rtype: L{PositionTable.PositionTable}
+        """
+        try:
+            return parsePositionLines(self._iterReply(GLSCommands.CO_POSITION))
+        except Exception, e:
+            if isinstance(e, GLSException.GLSException):
+                raise e
+            raise GLSException.GLSException("Could not request positions of others from server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
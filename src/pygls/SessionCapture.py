@@ -0,0 +1,485 @@
+"""
+Python library for GPS Location Sharing - capturing the data exchanged with the GLS Server and replaying it.
+
+A recorder is set on a connection (L{ServerConnection.ServerConnection.setRecorder}); from the next connection on,
+every chunk of data written to or received from the socket is written to the capture file together with the time it
+was sent or received. Example::
+
+    recorder = SessionRecorder("session.cap")
+    s = ServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    s.setRecorder(recorder)
+    s.requestPositions("OpenMoko")
+    s.closeConnection()
+    recorder.close()
+
+A capture is replayed without any server (L{SessionReplay}): the commands are taken from the capture and the received
+chunks are fed - in their original sizes - through the code of the client, which splits, checks and decodes the
+replies. Replaying takes place at the original timing or as fast as possible.
+
+Layout of a capture file: the header (L{MAGIC} and the time the recording was started as double) is followed by one
+record per event. Each record is made up by its kind (one character, see L{RECORD_CONNECT} and alike), the time since
+the start of the recording (in seconds, as double), the length of the data (unsigned int) and the data itself. All
+numbers are little endian.
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var MAGIC: First bytes of a capture file
+@type MAGIC: C{String}
+@var RECORD_CONNECT: Kind of record for connecting (data is the address of the server)
+@type RECORD_CONNECT: C{String}
+@var RECORD_SENT: Kind of record for data written to the server
+@type RECORD_SENT: C{String}
+@var RECORD_RECEIVED: Kind of record for data received from the server
+@type RECORD_RECEIVED: C{String}
+@var RECORD_CLOSE: Kind of record for closing the socket
+@type RECORD_CLOSE: C{String}
+"""
+import struct
+import socket
+import time
+import GLSException
+import GLSCommands
+from ServerConnection import ServerConnection
+
+MAGIC = "GLSCAP1\n"
+RECORD_CONNECT = "C"
+RECORD_SENT = "S"
+RECORD_RECEIVED = "R"
+RECORD_CLOSE = "X"
+
+_HEADER = struct.Struct("<d")
+_RECORD = struct.Struct("<cdI")
+
+class SessionRecorder:
+    """
+    Writes the data exchanged with the GLS server to a capture file.
+
+    A recorder is meant for one connection at a time; the records of several connections using the same recorder at the
+    same time would be mixed up.
+
+    @ivar _file: Capture file
+    @type _file: C{file}
+    @ivar _started: Time the recording was started
+    @type _started: C{float}
+    """
+
+    def __init__(self, fileName):
+        """
+        Constructor
+
+        Creates the capture file (an existing file is overwritten) and writes the header.
+
+        @param fileName: Name of the capture file
+        @type fileName: C{String}
+        """
+        self._started = time.time()
+        self._file = open(fileName, "wb")
+        self._file.write(MAGIC + _HEADER.pack(self._started))
+
+    def record(self, kind, data = ""):
+        """
+        Writes one record to the capture file.
+
+        @param kind: Kind of the record (L{RECORD_CONNECT}, L{RECORD_SENT}, L{RECORD_RECEIVED} or L{RECORD_CLOSE})
+        @type kind: C{String}
+        @param data: Data of the record
+        @type data: C{String}
+        """
+        if self._file is None:
+            return
+        self._file.write(_RECORD.pack(kind, time.time() - self._started, len(data)))
+        self._file.write(data)
+
+    def wrapSocket(self, sock):
+        """
+        Wraps a socket, so everything sent and received on it is recorded.
+
+        @param sock: Socket to be wrapped
+        @type sock: L{socket.socket}
+        @return: Wrapped socket
+        @rtype: L{RecordingSocket}
+        """
+        return RecordingSocket(sock, self)
+
+    def flush(self):
+        """
+        Writes the records buffered so far to the disk.
+        """
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """
+        Closes the capture file; further records are dropped.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RecordingSocket:
+    """
+    Socket passing all calls to a real socket and recording the data sent and received.
+
+    Only the calls used by L{ServerConnection.ServerConnection} are recorded; all other attributes are taken from the
+    real socket. Data peeked at (C{MSG_PEEK}) is not recorded, as it is received again afterwards.
+
+    @ivar _socket: Real socket
+    @type _socket: L{socket.socket}
+    @ivar _recorder: Recorder for the data
+    @type _recorder: L{SessionRecorder}
+    """
+
+    def __init__(self, sock, recorder):
+        """
+        Constructor
+
+        @param sock: Real socket
+        @type sock: L{socket.socket}
+        @param recorder: Recorder for the data
+        @type recorder: L{SessionRecorder}
+        """
+        self._socket = sock
+        self._recorder = recorder
+
+    def connect(self, address):
+        """
+        Connects the real socket and records the address.
+
+        @param address: Host name and port of the server
+        @type address: C{Tuple} of C{String} and C{int}
+        """
+        self._socket.connect(address)
+        self._recorder.record(RECORD_CONNECT, "%s:%s" %(address[0], address[1]))
+
+    def sendall(self, data):
+        """
+        Records the data and sends it on the real socket.
+
+        @param data: Data to be sent
+        @type data: C{String}
+        """
+        self._recorder.record(RECORD_SENT, data)
+        return self._socket.sendall(data)
+
+    def recv_into(self, buffer, nbytes = 0, flags = 0):
+        """
+        Receives into the buffer from the real socket and records the data received.
+
+        @param buffer: Buffer to receive into
+        @type buffer: C{memoryview}
+        @param nbytes: Maximum number of bytes to receive (0 for the size of the buffer)
+        @type nbytes: C{int}
+        @param flags: Flags for receiving (see C{socket.recv})
+        @type flags: C{int}
+        @return: Number of bytes received (0 if the connection has been closed by the server)
+        @rtype: C{int}
+        """
+        count = self._socket.recv_into(buffer, nbytes, flags)
+        if not flags & socket.MSG_PEEK:
+            self._recorder.record(RECORD_RECEIVED, buffer[:count].tobytes())
+        return count
+
+    def recv(self, bufsize, flags = 0):
+        """
+        Receives from the real socket and records the data received.
+
+        @param bufsize: Maximum number of bytes to receive
+        @type bufsize: C{int}
+        @param flags: Flags for receiving (see C{socket.recv})
+        @type flags: C{int}
+        @return: Data received (empty if the connection has been closed by the server)
+        @rtype: C{String}
+        """
+        data = self._socket.recv(bufsize, flags)
+        if not flags & socket.MSG_PEEK:
+            self._recorder.record(RECORD_RECEIVED, data)
+        return data
+
+    def close(self):
+        """
+        Closes the real socket, records the closing and writes the records buffered so far to the disk.
+        """
+        self._socket.close()
+        self._recorder.record(RECORD_CLOSE)
+        self._recorder.flush()
+
+    def __getattr__(self, name):
+        """
+        Supporting function to take all other attributes from the real socket.
+        """
+        return getattr(self._socket, name)
+
+
+def readCapture(fileName):
+    """
+    Reads all records of a capture file.
+
+    Raises an L{GLSException.GLSException} if the file is not a capture file. A record cut off at the end of the file
+    (for instance, if the recording program was killed) is skipped.
+
+    @param fileName: Name of the capture file
+    @type fileName: C{String}
+    @return: Time the recording was started and the records (each one as kind, time since the start and data)
+    @rtype: C{Tuple} of C{float} and C{List} of C{Tuple}
+    """
+    f = open(fileName, "rb")
+    try:
+        content = f.read()
+    finally:
+        f.close()
+    if not content.startswith(MAGIC) or len(content) < len(MAGIC) + _HEADER.size:
+        raise GLSException.GLSException("Invalid capture file.", GLSException.EC_VALIDATION_ERROR, "The file %s is not a capture of a GLS session." %(fileName))
+    started, = _HEADER.unpack_from(content, len(MAGIC))
+    records = []
+    offset = len(MAGIC) + _HEADER.size
+    while offset + _RECORD.size <= len(content):
+        kind, when, length = _RECORD.unpack_from(content, offset)
+        offset += _RECORD.size
+        if offset + length > len(content):
+            break
+        records.append((kind, when, content[offset:offset + length]))
+        offset += length
+    return started, records
+
+def _splitConnections(records):
+    """
+    Supporting function to split the records into one list per connection (each list starts with the connect record).
+    """
+    connections = []
+    for record in records:
+        if record[0] == RECORD_CONNECT:
+            connections.append([record])
+        elif connections:
+            connections[-1].append(record)
+    return connections
+
+
+class _ReplaySocket:
+    """
+    Socket delivering the received chunks of a capture instead of talking to a server; data sent is dropped.
+
+    @ivar _chunks: Received chunks not delivered yet (each one as time since the start of the recording and data)
+    @type _chunks: C{List} of C{Tuple}
+    @ivar _clock: Clock of the replay (C{None} for replaying as fast as possible)
+    @type _clock: L{_ReplayClock}
+    """
+
+    def __init__(self, chunks, clock):
+        """
+        Constructor
+
+        @param chunks: Received chunks of the connection (each one as time since the start of the recording and data); the list is consumed
+        @type chunks: C{List} of C{Tuple}
+        @param clock: Clock of the replay (C{None} for replaying as fast as possible)
+        @type clock: L{_ReplayClock}
+        """
+        self._chunks = chunks
+        self._clock = clock
+
+    def connect(self, address):
+        """
+        Does nothing; there is no server.
+
+        @param address: Host name and port of the server (ignored)
+        @type address: C{Tuple} of C{String} and C{int}
+        """
+        pass
+
+    def sendall(self, data):
+        """
+        Drops the data; the replies are taken from the capture.
+
+        @param data: Data to be sent (ignored)
+        @type data: C{String}
+        """
+        pass
+
+    def recv_into(self, buffer, nbytes = 0, flags = 0):
+        """
+        Delivers the next received chunk (or its beginning, if it does not fit); waits for its time first if a clock is given.
+
+        @param buffer: Buffer to receive into
+        @type buffer: C{memoryview}
+        @param nbytes: Maximum number of bytes to deliver (0 for the size of the buffer)
+        @type nbytes: C{int}
+        @param flags: Flags for receiving (ignored)
+        @type flags: C{int}
+        @return: Number of bytes delivered (0 if all chunks have been delivered, as if the server had closed the connection)
+        @rtype: C{int}
+        """
+        if not self._chunks:
+            return 0
+        when, data = self._chunks[0]
+        if self._clock is not None:
+            self._clock.waitFor(when)
+        if not nbytes:
+            nbytes = len(buffer)
+        if len(data) > nbytes:
+            self._chunks[0] = (when, data[nbytes:])
+            data = data[:nbytes]
+        else:
+            del self._chunks[0]
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        """
+        Drops the chunks not delivered yet.
+        """
+        self._chunks = []
+
+
+class _ReplayClock:
+    """
+    Clock for replaying at the original timing: maps the times of the recording onto the time of the replay.
+
+    @ivar _offset: Time of the replay minus time of the recording
+    @type _offset: C{float}
+    """
+
+    def __init__(self, recorded):
+        """
+        Constructor
+
+        @param recorded: Time (since the start of the recording) mapped onto now
+        @type recorded: C{float}
+        """
+        self._offset = time.time() - recorded
+
+    def waitFor(self, recorded):
+        """
+        Waits until the time of the replay corresponding to a time of the recording has come.
+
+        @param recorded: Time since the start of the recording
+        @type recorded: C{float}
+        """
+        delay = recorded + self._offset - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ReplayConnection(ServerConnection):
+    """
+    Connection to the GLS server, which talks to a capture instead of a server.
+    """
+
+    def __init__(self, chunks, clock):
+        ServerConnection.__init__(self, "replay", 0, "", "replay", "replay", "replay", None)
+        self._chunks = chunks
+        self._clock = clock
+
+    def _createSocket(self):
+        return _ReplaySocket(self._chunks, self._clock)
+
+
+class SessionReplay:
+    """
+    Replays a capture through the client without a server.
+
+    For each connection in the capture, a connection is set up, which receives the recorded chunks instead of talking to a
+    server. The commands of the capture are issued on this connection in their original batches (the handshake and
+    pipelined commands are written in one go, just as recorded); the replies are received, checked and - for requests of
+    positions, waypoints and groups - decoded the same way as by L{ServerConnection.ServerConnection.requestPositions}
+    and alike.
+
+    @ivar _records: Records of the capture (see L{readCapture})
+    @type _records: C{List} of C{Tuple}
+    @ivar _hooks: Hooks registered with the replayed connections (see L{ServerConnection.ServerConnection.addHook})
+    @type _hooks: C{List} of L{Instrumentation.ConnectionHook}
+    """
+
+    def __init__(self, fileName):
+        """
+        Constructor
+
+        @param fileName: Name of the capture file
+        @type fileName: C{String}
+        """
+        started, self._records = readCapture(fileName)
+        self._hooks = []
+
+    def addHook(self, hook):
+        """
+        Registers a hook with all connections replayed from now on (for instance an L{Instrumentation.ConnectionMetrics}).
+
+        @param hook: Hook to be called
+        @type hook: L{Instrumentation.ConnectionHook}
+        """
+        self._hooks.append(hook)
+
+    def getRecords(self):
+        """
+        GETTER
+
+        @return: Records of the capture (each one as kind, time since the start of the recording and data)
+        @rtype: C{List} of C{Tuple}
+        """
+        return self._records
+
+    def replay(self, realtime = 0):
+        """
+        Replays all connections of the capture one after another.
+
+        @param realtime: Replay at the original timing (1) or as fast as possible (0)
+        @type realtime: C{int}
+        @return: Figures of the replay: connections, commands, errors (replies C or E), positions, waypoints and groups decoded and the time needed (in seconds)
+        @rtype: C{Dict}
+        """
+        ret = {"connections": 0, "commands": 0, "errors": 0, "positions": 0, "waypoints": 0, "groups": 0}
+        started = time.time()
+        for records in _splitConnections(self._records):
+            self._replayConnection(records, realtime, ret)
+        ret["durationS"] = time.time() - started
+        return ret
+
+    def _replayConnection(self, records, realtime, ret):
+        """
+        Supporting function to replay the records of one connection.
+        """
+        clock = None
+        if realtime:
+            clock = _ReplayClock(records[0][1])
+        chunks = [(when, data) for kind, when, data in records if kind == RECORD_RECEIVED]
+        connection = _ReplayConnection(chunks, clock)
+        for hook in self._hooks:
+            connection.addHook(hook)
+        ret["connections"] += 1
+        for kind, when, data in records:
+            if kind != RECORD_SENT:
+                continue
+            if clock is not None:
+                clock.waitFor(when)
+            commands = data.split("\n")[:-1]
+            try:
+                if not connection._connected:
+                    commands = commands[3:]         # the handshake is written by the connection itself
+                    replies = connection._establishConnection(commands)
+                else:
+                    connection._writeCommands(commands)
+                    replies = connection._receiveReplies(commands)
+            except GLSException.GLSException:
+                ret["errors"] += 1
+                break
+            ret["commands"] += len(commands)
+            for i in range(len(commands)):
+                self._decode(connection, commands[i], replies[i], ret)
+        connection._dropConnection()
+
+    def _decode(self, connection, command, reply, ret):
+        """
+        Supporting function to decode one reply the same way as the requests of the connection do.
+        """
+        if isinstance(reply, GLSException.GLSException):
+            ret["errors"] += 1
+        elif command == GLSCommands.CO_POSITION:
+            ret["positions"] += len(connection._decodePositions(reply))
+        elif command == GLSCommands.CO_WAYPOINT:
+            ret["waypoints"] += len(connection._decodeWaypoints(reply))
+        elif command == GLSCommands.CO_GROUP:
+            ret["groups"] += len(connection._decodeGroups(reply))
@@ -0,0 +1,698 @@
+"""
+Python library for GPS Location Sharing - spatial index over positions and waypoints.
+
+An index keeps items (L{PythonGLS.Position} or L{PythonGLS.Waypoint}) by name and answers bounding box queries,
+radius queries and k nearest neighbour queries without looking at every item. Two implementations are available:
+
+    - L{GridIndex} puts the items into cells of a uniform grid (in degrees); updates of single items are cheap, hence
+      it suits indexes, which are updated item by item (for instance from L{ServerConnection.ServerConnection.requestPositionsDelta}).
+    - L{KDTreeIndex} keeps the items in a k-d tree over points on the unit sphere; it does not depend on a cell size
+      and copes with clustered and world wide groups alike. The tree is rebuilt on the first query after a change,
+      hence it suits indexes, which are refilled with complete replies.
+
+Both are filled from the results of L{ServerConnection.ServerConnection.requestPositions} and
+L{ServerConnection.ServerConnection.requestWaypoints} (see L{SpatialIndex.fill}). Distances are great circle
+distances in metres (see L{Geodesy}).
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var DEFAULT_CELL_SIZE: Default edge length (in degrees) of the cells of a L{GridIndex} (about 11 km in latitude)
+@type DEFAULT_CELL_SIZE: C{float}
+@var LEAF_SIZE: Maximum number of items in a leaf of a L{KDTreeIndex}
+@type LEAF_SIZE: C{int}
+@var SAMPLE_SIZE: Number of items sampled for choosing the split of a node of a L{KDTreeIndex}
+@type SAMPLE_SIZE: C{int}
+"""
+import math
+import heapq
+import operator
+import GLSException
+from Geodesy import distance, EARTH_RADIUS
+DEFAULT_CELL_SIZE = 0.1
+LEAF_SIZE = 8
+SAMPLE_SIZE = 128
+
+_KEYS = [operator.itemgetter(axis) for axis in range(3)]
+
+def _inBox(latitude, longitude, minLatitude, minLongitude, maxLatitude, maxLongitude):
+    """
+    Supporting function to check, whether a point is inside a bounding box.
+
+    A box with C{minLongitude > maxLongitude} crosses the 180th meridian.
+    """
+    if latitude < minLatitude or latitude > maxLatitude:
+        return 0
+    if minLongitude <= maxLongitude:
+        return minLongitude <= longitude <= maxLongitude
+    return longitude >= minLongitude or longitude <= maxLongitude
+
+def _radiusBox(latitude, longitude, radius):
+    """
+    Supporting function to compute the bounding box of all points within a given distance of a point.
+
+    @return: Minimum latitude, minimum longitude, maximum latitude and maximum longitude (longitudes are
+        -180 and 180 if the circle contains a pole)
+    @rtype: C{Tuple} of C{float}
+    """
+    angle = radius / EARTH_RADIUS
+    delta = math.degrees(angle)
+    minLatitude = latitude - delta
+    maxLatitude = latitude + delta
+    if minLatitude <= -90 or maxLatitude >= 90 or math.sin(angle) >= math.cos(math.radians(latitude)):
+        return max(minLatitude, -90.0), -180.0, min(maxLatitude, 90.0), 180.0
+    deltaLongitude = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+    minLongitude = longitude - deltaLongitude
+    maxLongitude = longitude + deltaLongitude
+    if minLongitude < -180:
+        minLongitude += 360
+    if maxLongitude > 180:
+        maxLongitude -= 360
+    return minLatitude, minLongitude, maxLatitude, maxLongitude
+
+
+class SpatialIndex:
+    """
+    Common part of all spatial indexes: the items by name.
+
+    Items are all objects providing C{getLatitude} and C{getLongitude} (for instance L{PythonGLS.Position} and
+    L{PythonGLS.Waypoint}).
+
+    @ivar _items: Indexed items by name
+    @type _items: C{Dict} of C{String} | L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._items = {}
+
+    def __len__(self):
+        """
+        Number of items in the index.
+        """
+        return len(self._items)
+
+    def __contains__(self, name):
+        """
+        Checks, whether an item with the given name is in the index.
+        """
+        return self._items.has_key(name)
+
+    def get(self, name):
+        """
+        Delivers the item with the given name.
+
+        @return: The item or C{None} if there is no item with this name
+        @rtype: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        return self._items.get(name)
+
+    def getItems(self):
+        """
+        GETTER
+
+        @return: Indexed items by name (must not be modified)
+        @rtype: C{Dict} of C{String} | L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        return self._items
+
+    def fill(self, items):
+        """
+        Replaces the content of the index.
+
+        @param items: New items; the result of L{ServerConnection.ServerConnection.requestPositions} or
+            L{ServerConnection.ServerConnection.requestWaypoints} or pairs of name and item
+        @type items: C{Dict} of C{String} | L{PythonGLS.Position} or C{Iterable} of C{Tuple}
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        self.clear()
+        for name, item in items:
+            self.update(name, item)
+
+    def applyDelta(self, delta):
+        """
+        Takes over the changes reported by L{ServerConnection.ServerConnection.requestPositionsDelta}.
+
+        @param delta: Members added, moved and removed
+        @type delta: L{PositionDelta.PositionDelta}
+        """
+        for name, position in delta.getAdded().items():
+            self.update(name, position)
+        for name, position in delta.getMoved().items():
+            self.update(name, position)
+        for name in delta.getRemoved():
+            self.remove(name)
+
+    def update(self, name, item):
+        """
+        Inserts an item or replaces the item with the same name.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        @param item: Position or waypoint
+        @type item: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        raise NotImplementedError()
+
+    def remove(self, name):
+        """
+        Removes the item with the given name; unknown names are ignored.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Removes all items.
+        """
+        raise NotImplementedError()
+
+    def queryBox(self, minLatitude, minLongitude, maxLatitude, maxLongitude):
+        """
+        Delivers all items inside a bounding box.
+
+        A box with C{minLongitude > maxLongitude} crosses the 180th meridian.
+
+        @return: Pairs of name and item (in no particular order)
+        @rtype: C{List} of C{Tuple} of C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        raise NotImplementedError()
+
+    def queryRadius(self, latitude, longitude, radius):
+        """
+        Delivers all items within a given distance of a point.
+
+        @param radius: Maximum distance in metres
+        @type radius: C{float}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        raise NotImplementedError()
+
+    def queryNearest(self, latitude, longitude, count = 1):
+        """
+        Delivers the items closest to a point.
+
+        @param count: Maximum number of items to deliver
+        @type count: C{int}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        raise NotImplementedError()
+
+
+class GridIndex(SpatialIndex):
+    """
+    Spatial index made up by a uniform grid of cells in degrees.
+
+    Only cells containing items are stored. The cell size should be in the order of the typical query radius; for
+    groups spread over the world, L{KDTreeIndex} is the better choice. The cell size is rounded down to the next
+    value dividing 180 degrees evenly.
+
+    @ivar _cellSize: Edge length of a cell in degrees
+    @type _cellSize: C{float}
+    @ivar _rows: Number of rows (latitude) of the grid
+    @type _rows: C{int}
+    @ivar _columns: Number of columns (longitude) of the grid
+    @type _columns: C{int}
+    @ivar _cells: Items by name for each non-empty cell
+    @type _cells: C{Dict} of C{Tuple} of C{int} | C{Dict} of C{String} | L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+    @ivar _cellOfName: Cell of each item
+    @type _cellOfName: C{Dict} of C{String} | C{Tuple} of C{int}
+    """
+
+    def __init__(self, cellSize = DEFAULT_CELL_SIZE):
+        """
+        Constructor
+
+        @param cellSize: Edge length of a cell in degrees
+        @type cellSize: C{float}
+        """
+        SpatialIndex.__init__(self)
+        if cellSize <= 0 or cellSize > 180:
+            raise GLSException.GLSException("Invalid cell size for spatial index.", GLSException.EC_UNKNOWN_ERROR, "The cell size must be greater than 0 and at most 180 degrees (%s given)." %(cellSize))
+        self._rows = int(math.ceil(180.0 / cellSize))
+        self._columns = 2 * self._rows
+        self._cellSize = 180.0 / self._rows
+        self._cells = {}
+        self._cellOfName = {}
+
+    def _row(self, latitude):
+        """
+        Supporting function to compute the row of a latitude.
+        """
+        return max(0, min(self._rows - 1, int((latitude + 90) / self._cellSize)))
+
+    def _column(self, longitude):
+        """
+        Supporting function to compute the column of a longitude.
+        """
+        return int(((longitude + 180) % 360) / self._cellSize) % self._columns
+
+    def update(self, name, item):
+        """
+        Inserts an item or replaces the item with the same name.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        @param item: Position or waypoint
+        @type item: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        cell = (self._row(item.getLatitude()), self._column(item.getLongitude()))
+        old = self._cellOfName.get(name)
+        if old is not None and old != cell:
+            self._removeFromCell(old, name)
+        content = self._cells.get(cell)
+        if content is None:
+            content = self._cells[cell] = {}
+        content[name] = item
+        self._cellOfName[name] = cell
+        self._items[name] = item
+
+    def _removeFromCell(self, cell, name):
+        """
+        Supporting function to remove an item from a cell (and the cell from the grid if it becomes empty).
+        """
+        content = self._cells[cell]
+        del content[name]
+        if not content:
+            del self._cells[cell]
+
+    def remove(self, name):
+        """
+        Removes the item with the given name; unknown names are ignored.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        """
+        cell = self._cellOfName.pop(name, None)
+        if cell is not None:
+            self._removeFromCell(cell, name)
+            del self._items[name]
+
+    def clear(self):
+        """
+        Removes all items.
+        """
+        self._items = {}
+        self._cells = {}
+        self._cellOfName = {}
+
+    def _columnRanges(self, minLongitude, maxLongitude):
+        """
+        Supporting function to compute the columns covering a range of longitudes.
+
+        @return: Ranges of columns (two ranges if the range crosses the 180th meridian)
+        @rtype: C{List} of C{Tuple} of C{int}
+        """
+        if minLongitude <= -180 and maxLongitude >= 180:
+            return [(0, self._columns - 1)]
+        first = self._column(minLongitude)
+        last = self._column(maxLongitude)
+        if maxLongitude >= 180:
+            last = self._columns - 1
+        if minLongitude <= maxLongitude and first <= last:
+            return [(first, last)]
+        return [(first, self._columns - 1), (0, last)]
+
+    def queryBox(self, minLatitude, minLongitude, maxLatitude, maxLongitude):
+        """
+        Delivers all items inside a bounding box.
+
+        A box with C{minLongitude > maxLongitude} crosses the 180th meridian.
+
+        @return: Pairs of name and item (in no particular order)
+        @rtype: C{List} of C{Tuple} of C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        firstRow = self._row(minLatitude)
+        lastRow = self._row(maxLatitude)
+        ranges = self._columnRanges(minLongitude, maxLongitude)
+        cellCount = (lastRow - firstRow + 1) * sum([last - first + 1 for first, last in ranges])
+        if cellCount > len(self._cells):
+            contents = self._cells.values()
+        else:
+            contents = []
+            cells = self._cells
+            for row in range(firstRow, lastRow + 1):
+                for first, last in ranges:
+                    for column in range(first, last + 1):
+                        content = cells.get((row, column))
+                        if content is not None:
+                            contents.append(content)
+        ret = []
+        for content in contents:
+            for name, item in content.iteritems():
+                if _inBox(item.getLatitude(), item.getLongitude(), minLatitude, minLongitude, maxLatitude, maxLongitude):
+                    ret.append((name, item))
+        return ret
+
+    def queryRadius(self, latitude, longitude, radius):
+        """
+        Delivers all items within a given distance of a point.
+
+        @param radius: Maximum distance in metres
+        @type radius: C{float}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        ret = []
+        for name, item in self.queryBox(*_radiusBox(latitude, longitude, radius)):
+            meters = distance(latitude, longitude, item.getLatitude(), item.getLongitude())
+            if meters <= radius:
+                ret.append((meters, name, item))
+        ret.sort()
+        return ret
+
+    def _bound(self, latitude, longitude, row, column, ring):
+        """
+        Supporting function to compute the minimum distance from a point to any cell outside a ring of cells.
+
+        @return: Distance in metres (C{None} if all cells are inside the ring)
+        @rtype: C{float}
+        """
+        size = self._cellSize
+        bounds = []
+        south = (row - ring) * size - 90
+        north = (row + ring + 1) * size - 90
+        if south > -90:
+            bounds.append(math.radians(latitude - south))
+        if north < 90:
+            bounds.append(math.radians(north - latitude))
+        if (2 * ring + 1) < self._columns:
+            west = (column - ring) * size - 180
+            east = (column + ring + 1) * size - 180
+            delta = math.radians(min(((longitude + 180) % 360 - 180) - west, east - ((longitude + 180) % 360 - 180), 90))
+            bounds.append(math.asin(min(1.0, math.cos(math.radians(latitude)) * math.sin(delta))))
+        if not bounds:
+            return None
+        return EARTH_RADIUS * min(bounds)
+
+    def queryNearest(self, latitude, longitude, count = 1):
+        """
+        Delivers the items closest to a point.
+
+        Rings of cells around the cell of the point are searched until the closest items found are closer than
+        any cell not searched yet. If more cells would be visited than there are non-empty cells, the remaining
+        non-empty cells are searched at once.
+
+        @param count: Maximum number of items to deliver
+        @type count: C{int}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        if count <= 0 or not self._items:
+            return []
+        cells = self._cells
+        row = self._row(latitude)
+        column = self._column(longitude)
+        best = []          # heap of the closest items found so far (negative distance first)
+        seen = {}
+        scanned = 0
+        ring = 0
+        while 1:
+            ringCells = []
+            for r in range(max(0, row - ring), min(self._rows - 1, row + ring) + 1):
+                if r == row - ring or r == row + ring:
+                    columns = range(column - ring, column + ring + 1)
+                else:
+                    columns = [column - ring, column + ring]
+                for c in columns:
+                    ringCells.append((r, c % self._columns))
+            scanned += len(ringCells)
+            if scanned > len(cells):
+                contents = [content for cell, content in cells.iteritems() if not seen.has_key(cell)]
+                last = 1
+            else:
+                contents = []
+                for cell in ringCells:
+                    if not seen.has_key(cell):
+                        seen[cell] = 1
+                        content = cells.get(cell)
+                        if content is not None:
+                            contents.append(content)
+                last = 0
+            for content in contents:
+                for name, item in content.iteritems():
+                    meters = distance(latitude, longitude, item.getLatitude(), item.getLongitude())
+                    if len(best) < count:
+                        heapq.heappush(best, (-meters, name, item))
+                    elif meters < -best[0][0]:
+                        heapq.heapreplace(best, (-meters, name, item))
+            if last:
+                break
+            bound = self._bound(latitude, longitude, row, column, ring)
+            if bound is None or (len(best) == count and -best[0][0] <= bound):
+                break
+            ring += 1
+        ret = [(-negative, name, item) for negative, name, item in best]
+        ret.sort()
+        return ret
+
+
+class KDTreeIndex(SpatialIndex):
+    """
+    Spatial index made up by a k-d tree over the points on the unit sphere.
+
+    Positions are converted into three dimensional unit vectors; the straight line (chord) distance between two
+    vectors grows with the great circle distance, hence radius and nearest neighbour queries can prune the tree
+    with simple comparisons. Changes only mark the tree as outdated; it is rebuilt on the next query.
+
+    @ivar _tree: Root node of the tree (C{None} if outdated); inner nodes are tuples of axis, split value, left and
+        right node, leaves are tuples of C{None} and a list of entries (x, y, z, name, item)
+    @type _tree: C{Tuple}
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        SpatialIndex.__init__(self)
+        self._tree = None
+
+    def update(self, name, item):
+        """
+        Inserts an item or replaces the item with the same name.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        @param item: Position or waypoint
+        @type item: L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        self._items[name] = item
+        self._tree = None
+
+    def remove(self, name):
+        """
+        Removes the item with the given name; unknown names are ignored.
+
+        @param name: Name of the member or the waypoint
+        @type name: C{String}
+        """
+        if self._items.pop(name, None) is not None:
+            self._tree = None
+
+    def clear(self):
+        """
+        Removes all items.
+        """
+        self._items = {}
+        self._tree = None
+
+    def _getTree(self):
+        """
+        Supporting function to deliver the tree (built if outdated).
+        """
+        if self._tree is None:
+            entries = []
+            for name, item in self._items.iteritems():
+                x, y, z = _toVector(item.getLatitude(), item.getLongitude())
+                entries.append((x, y, z, name, item))
+            self._tree = _buildTree(entries)
+        return self._tree
+
+    def queryBox(self, minLatitude, minLongitude, maxLatitude, maxLongitude):
+        """
+        Delivers all items inside a bounding box.
+
+        A box with C{minLongitude > maxLongitude} crosses the 180th meridian. The box is converted into the
+        bounding box of its points on the unit sphere for searching the tree.
+
+        @return: Pairs of name and item (in no particular order)
+        @rtype: C{List} of C{Tuple} of C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        if minLongitude > maxLongitude:
+            maxLongitude360 = maxLongitude + 360
+        else:
+            maxLongitude360 = maxLongitude
+        cosLatitude = _cosineRange(minLatitude, maxLatitude)
+        cosLongitude = _cosineRange(minLongitude, maxLongitude360)
+        sinLongitude = _cosineRange(minLongitude - 90, maxLongitude360 - 90)
+        low = [_productRange(cosLatitude, cosLongitude)[0], _productRange(cosLatitude, sinLongitude)[0], math.sin(math.radians(minLatitude))]
+        high = [_productRange(cosLatitude, cosLongitude)[1], _productRange(cosLatitude, sinLongitude)[1], math.sin(math.radians(maxLatitude))]
+        ret = []
+        stack = [self._getTree()]
+        while stack:
+            axis, split, left, right = _unpack(stack.pop())
+            if axis is None:
+                for entry in split:
+                    item = entry[4]
+                    if _inBox(item.getLatitude(), item.getLongitude(), minLatitude, minLongitude, maxLatitude, maxLongitude):
+                        ret.append((entry[3], item))
+                continue
+            if low[axis] <= split:
+                stack.append(left)
+            if high[axis] >= split:
+                stack.append(right)
+        return ret
+
+    def queryRadius(self, latitude, longitude, radius):
+        """
+        Delivers all items within a given distance of a point.
+
+        @param radius: Maximum distance in metres
+        @type radius: C{float}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        point = _toVector(latitude, longitude)
+        chord = 2 * math.sin(min(math.pi, radius / EARTH_RADIUS) / 2)
+        limit = chord * chord
+        ret = []
+        stack = [self._getTree()]
+        while stack:
+            axis, split, left, right = _unpack(stack.pop())
+            if axis is None:
+                for x, y, z, name, item in split:
+                    squared = (x - point[0]) ** 2 + (y - point[1]) ** 2 + (z - point[2]) ** 2
+                    if squared <= limit:
+                        ret.append((_chordToDistance(squared), name, item))
+                continue
+            diff = point[axis] - split
+            if diff <= chord:
+                stack.append(left)
+            if diff >= -chord:
+                stack.append(right)
+        ret.sort()
+        return ret
+
+    def queryNearest(self, latitude, longitude, count = 1):
+        """
+        Delivers the items closest to a point.
+
+        @param count: Maximum number of items to deliver
+        @type count: C{int}
+        @return: Distance (in metres), name and item for each item found, the closest one first
+        @rtype: C{List} of C{Tuple} of C{float}, C{String} and L{PythonGLS.Position} or L{PythonGLS.Waypoint}
+        """
+        if count <= 0 or not self._items:
+            return []
+        point = _toVector(latitude, longitude)
+        best = []          # heap of the closest items found so far (negative squared chord first)
+        stack = [(0.0, self._getTree())]
+        while stack:
+            minimum, node = stack.pop()
+            if len(best) == count and minimum > -best[0][0]:
+                continue
+            axis, split, left, right = _unpack(node)
+            if axis is None:
+                for x, y, z, name, item in split:
+                    squared = (x - point[0]) ** 2 + (y - point[1]) ** 2 + (z - point[2]) ** 2
+                    if len(best) < count:
+                        heapq.heappush(best, (-squared, name, item))
+                    elif squared < -best[0][0]:
+                        heapq.heapreplace(best, (-squared, name, item))
+                continue
+            diff = point[axis] - split
+            if diff < 0:
+                near, far = left, right
+            else:
+                near, far = right, left
+            stack.append((max(minimum, diff * diff), far))
+            stack.append((minimum, near))
+        ret = [(_chordToDistance(-negative), name, item) for negative, name, item in best]
+        ret.sort()
+        return ret
+
+
+def _toVector(latitude, longitude):
+    """
+    Supporting function to convert a position into a unit vector.
+    """
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+def _chordToDistance(squared):
+    """
+    Supporting function to convert a squared chord length on the unit sphere into a great circle distance.
+    """
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(squared) / 2))
+
+def _unpack(node):
+    """
+    Supporting function to deliver axis, split value, left and right node of a node (C{None}, entries, C{None} and
+    C{None} for a leaf).
+    """
+    if node[0] is None:
+        return None, node[1], None, None
+    return node
+
+def _buildTree(entries):
+    """
+    Supporting function to build a (sub) tree; each node is split at the median of the axis with the largest spread.
+
+    Axis and median are taken from an evenly spaced sample of the entries, hence the tree is built in about
+    O(n log n) without sorting the entries.
+    """
+    if len(entries) <= LEAF_SIZE:
+        return (None, entries)
+    sample = entries[::max(1, len(entries) // SAMPLE_SIZE)]
+    axis = 0
+    spread = -1.0
+    for candidate in range(3):
+        values = map(_KEYS[candidate], sample)
+        if max(values) - min(values) > spread:
+            axis, axisValues, spread = candidate, values, max(values) - min(values)
+    axisValues.sort()
+    split = axisValues[len(axisValues) // 2]
+    left = [entry for entry in entries if entry[axis] < split]
+    right = [entry for entry in entries if entry[axis] >= split]
+    if not left:
+        # many entries share the smallest value - these go to the left then
+        left = [entry for entry in entries if entry[axis] <= split]
+        right = [entry for entry in entries if entry[axis] > split]
+        if not right:
+            return (None, entries)
+    return (axis, split, _buildTree(left), _buildTree(right))
+
+def _cosineRange(minimum, maximum):
+    """
+    Supporting function to compute the range of the cosine over an interval of angles (in degrees).
+
+    @return: Minimum and maximum of the cosine
+    @rtype: C{Tuple} of C{float}
+    """
+    if maximum - minimum >= 360:
+        return -1.0, 1.0
+    values = [math.cos(math.radians(minimum)), math.cos(math.radians(maximum))]
+    multiple = math.ceil(minimum / 180.0) * 180
+    while multiple <= maximum:
+        values.append(round(math.cos(math.radians(multiple))))
+        multiple += 180
+    return min(values), max(values)
+
+def _productRange(first, second):
+    """
+    Supporting function to compute the range of the product of two values given by their ranges.
+    """
+    products = [first[0] * second[0], first[0] * second[1], first[1] * second[0], first[1] * second[1]]
+    return min(products), max(products)
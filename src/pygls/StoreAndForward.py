@@ -0,0 +1,426 @@
+"""
+Python library for GPS Location Sharing - offline tolerant sending of positions and waypoints.
+
+Positions and waypoints are written to a journal on disk first; a background thread sends them to the GLS
+server as soon as (and as long as) the server is reachable. Example::
+
+    s = ServerConnection("localhost", 47757, "2", "CathodioN", "test", "DummyDevice", "OpenMoko")
+    s.joinGroup("OpenMoko")
+    sender = StoreAndForward(s, "/var/lib/pygls/outgoing.journal")
+    sender.start()
+    sender.sendPosition(Position(52.538643, 13.421938, 1234.34, 89.63, 180))
+    ...
+    sender.stop()
+
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+
+@var JOURNAL_MAGIC: Identifier at the beginning of each journal file
+@type JOURNAL_MAGIC: C{String}
+@var HEADER_FORMAT: Layout of the journal header (magic, capacity, index of oldest record, number of records, number of evicted records)
+@type HEADER_FORMAT: C{String}
+@var RECORD_FORMAT: Layout of one record in the journal (kind, time, latitude, longitude, altitude, speed, bearing, name)
+@type RECORD_FORMAT: C{String}
+@var NAME_LENGTH: Maximum length (in bytes) of waypoint names in the journal; longer names are truncated
+@type NAME_LENGTH: C{int}
+@var HEADER_SIZE: Size of the journal header (in bytes)
+@type HEADER_SIZE: C{int}
+@var RECORD_SIZE: Size of one record in the journal (in bytes)
+@type RECORD_SIZE: C{int}
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import GLSException
+import GLSCommands
+from PythonGLS import Position, Waypoint
+
+JOURNAL_MAGIC = "GLSJ"
+NAME_LENGTH = 64
+HEADER_FORMAT = "<4sIIIQ"
+RECORD_FORMAT = "<c7xdddddd%ds" % NAME_LENGTH
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+class PositionJournal:
+    """
+    Journal of positions and waypoints on disk.
+
+    The journal is a ring of records with a fixed size in a memory mapped file. Appending a record is a copy into
+    the mapped memory; it survives a crash of the process (the operating system writes it back to disk). If the journal
+    is full, the oldest record is overwritten. Records are taken from the journal oldest first.
+
+    All methods may be called from several threads.
+
+    @ivar _fileName: Name of the journal file
+    @type _fileName: C{String}
+    @ivar _file: Open journal file
+    @type _file: C{file}
+    @ivar _map: Memory map of the journal file
+    @type _map: L{mmap.mmap}
+    @ivar _capacity: Maximum number of records in the journal
+    @type _capacity: C{int}
+    @ivar _head: Index of the oldest record in the ring
+    @type _head: C{int}
+    @ivar _count: Number of records in the journal
+    @type _count: C{int}
+    @ivar _evicted: Number of records overwritten because the journal was full (since the journal file was created)
+    @type _evicted: C{int}
+    @ivar _sequence: Sequence number of the oldest record (counting all records ever removed or overwritten since opening the journal)
+    @type _sequence: C{int}
+    @ivar _lock: Lock for protecting the state of the journal
+    @type _lock: L{threading.Lock}
+    """
+
+    def __init__(self, fileName, capacity = 10000):
+        """
+        Constructor
+
+        Opens the journal file - records remaining from an earlier run are kept. If the file does not exist, it is
+        created with the given capacity; otherwise, the capacity stored in the file is used.
+
+        @param fileName: Name of the journal file
+        @type fileName: C{String}
+        @param capacity: Maximum number of records in a new journal
+        @type capacity: C{int}
+        """
+        self._fileName = fileName
+        self._lock = threading.Lock()
+        if not os.path.exists(fileName) or os.path.getsize(fileName) < HEADER_SIZE:
+            f = open(fileName, "wb")
+            f.write(struct.pack(HEADER_FORMAT, JOURNAL_MAGIC, capacity, 0, 0, 0))
+            f.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+            f.close()
+        self._file = open(fileName, "r+b")
+        magic, self._capacity, self._head, self._count, self._evicted = struct.unpack(HEADER_FORMAT, self._file.read(HEADER_SIZE))
+        if magic != JOURNAL_MAGIC or os.path.getsize(fileName) < HEADER_SIZE + self._capacity * RECORD_SIZE:
+            self._file.close()
+            raise GLSException.GLSException("Invalid journal file.", GLSException.EC_UNKNOWN_ERROR, "The file %s is not a journal for positions and waypoints." %(fileName))
+        self._map = mmap.mmap(self._file.fileno(), HEADER_SIZE + self._capacity * RECORD_SIZE)
+        self._sequence = 0
+
+    def _writeHeader(self):
+        """
+        Writes the state of the ring into the header of the journal file.
+
+        Must be called with the lock held.
+        """
+        struct.pack_into(HEADER_FORMAT, self._map, 0, JOURNAL_MAGIC, self._capacity, self._head, self._count, self._evicted)
+
+    def _append(self, kind, timestamp, latitude, longitude, altitude, speed, bearing, name):
+        """
+        Appends one record to the journal; the oldest record is overwritten if the journal is full.
+        """
+        self._lock.acquire()
+        try:
+            if self._count == self._capacity:
+                self._head = (self._head + 1) % self._capacity
+                self._count -= 1
+                self._evicted += 1
+                self._sequence += 1
+            index = (self._head + self._count) % self._capacity
+            struct.pack_into(RECORD_FORMAT, self._map, HEADER_SIZE + index * RECORD_SIZE, kind, timestamp, latitude, longitude, altitude, speed, bearing, name)
+            self._count += 1
+            self._writeHeader()
+        finally:
+            self._lock.release()
+
+    def appendPosition(self, position, timestamp = None):
+        """
+        Appends a GPS position to the journal.
+
+        @param position: GPS position to be stored
+        @type position: L{PythonGLS.Position}
+        @param timestamp: Time of the position (default is now)
+        @type timestamp: C{float}
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._append(GLSCommands.CO_POSITION, timestamp, position.getLatitude(), position.getLongitude(), position.getAltitude(), position.getSpeed(), position.getBearing(), "")
+
+    def appendWaypoint(self, waypoint, timestamp = None):
+        """
+        Appends a waypoint to the journal.
+
+        Names longer than L{NAME_LENGTH} bytes are truncated.
+
+        @param waypoint: Waypoint to be stored
+        @type waypoint: L{PythonGLS.Waypoint}
+        @param timestamp: Time of the waypoint (default is now)
+        @type timestamp: C{float}
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        name = waypoint.getName()
+        if isinstance(name, unicode):
+            name = name.encode("utf-8")
+        self._append(GLSCommands.CO_WAYPOINT, timestamp, waypoint.getLatitude(), waypoint.getLongitude(), waypoint.getAltitude(), 0.0, 0.0, name[:NAME_LENGTH])
+
+    def peek(self, maxCount):
+        """
+        Reads the oldest records from the journal without removing them.
+
+        Besides the records, the sequence number of the first one is returned; it is needed for removing them
+        afterwards (see L{removeUpTo}) - records might have been overwritten in the meantime.
+
+        @param maxCount: Maximum number of records to read
+        @type maxCount: C{int}
+        @return: Sequence number of the first record and the records, oldest first; each one as tuple of time and position or waypoint
+        @rtype: C{Tuple} of C{int} and C{List} of C{Tuple} of C{float} and L{PythonGLS.Position} | L{PythonGLS.Waypoint}
+        """
+        self._lock.acquire()
+        try:
+            ret = []
+            for i in range(min(maxCount, self._count)):
+                index = (self._head + i) % self._capacity
+                kind, timestamp, latitude, longitude, altitude, speed, bearing, name = struct.unpack_from(RECORD_FORMAT, self._map, HEADER_SIZE + index * RECORD_SIZE)
+                if kind == GLSCommands.CO_WAYPOINT:
+                    ret.append((timestamp, Waypoint(latitude, longitude, altitude, name.rstrip("\0"))))
+                else:
+                    ret.append((timestamp, Position(latitude, longitude, altitude, speed, bearing)))
+            return self._sequence, ret
+        finally:
+            self._lock.release()
+
+    def removeUpTo(self, sequence):
+        """
+        Removes all records with a sequence number below the given one.
+
+        @param sequence: Sequence number of the first record to be kept
+        @type sequence: C{int}
+        """
+        self._lock.acquire()
+        try:
+            count = min(max(sequence - self._sequence, 0), self._count)
+            self._head = (self._head + count) % self._capacity
+            self._count -= count
+            self._sequence += count
+            self._writeHeader()
+        finally:
+            self._lock.release()
+
+    def sync(self):
+        """
+        Writes all changes of the journal to disk (blocking until done).
+        """
+        self._lock.acquire()
+        try:
+            self._map.flush()
+        finally:
+            self._lock.release()
+
+    def close(self):
+        """
+        Writes all changes to disk and closes the journal file.
+        """
+        self.sync()
+        self._map.close()
+        self._file.close()
+
+    def getCount(self):
+        """
+        GETTER
+
+        @return: Number of records in the journal
+        @rtype: C{int}
+        """
+        return self._count
+
+    def getCapacity(self):
+        """
+        GETTER
+        """
+        return self._capacity
+
+    def getEvicted(self):
+        """
+        GETTER
+
+        @return: Number of records overwritten because the journal was full
+        @rtype: C{int}
+        """
+        return self._evicted
+
+
+class StoreAndForward:
+    """
+    Sends positions and waypoints to the GLS server via a journal on disk.
+
+    L{sendPosition} and L{sendWaypoint} never fail because of the server - the items are stored in the journal and
+    sent by a background thread. The thread sends the journal in chunks (see
+    L{ServerConnection.ServerConnection.sendPositions}); if the server cannot be reached, it tries again after a while.
+    Items, which are rejected by the server (C or E), are dropped from the journal.
+
+    Once started, the connection is used by the background thread; it must not be used by others in the meantime.
+
+    @ivar _connection: Connection to the GLS server
+    @type _connection: L{ServerConnection.ServerConnection}
+    @ivar _journal: Journal for the items to be sent
+    @type _journal: L{PositionJournal}
+    @ivar _chunkSize: Maximum number of items written to the server at once
+    @type _chunkSize: C{int}
+    @ivar _retryInterval: Time (in seconds) to wait before trying again if the server could not be reached
+    @type _retryInterval: C{float}
+    @ivar _rejected: Number of items dropped because the server rejected them
+    @type _rejected: C{int}
+    @ivar _lastError: Last error when sending to the server (C{None} if the last attempt was sucessful)
+    @type _lastError: L{GLSException.GLSException}
+    @ivar _up: State of the background thread (1 while running)
+    @type _up: C{int}
+    @ivar _wakeup: Event for notifying the background thread about new items
+    @type _wakeup: L{threading.Event}
+    @ivar _thread: Background thread
+    @type _thread: L{threading.Thread}
+    """
+
+    def __init__(self, connection, fileName, capacity = 10000, chunkSize = 256, retryInterval = 10):
+        """
+        Constructor
+
+        Opens the journal; the background thread is not started here (see L{start}).
+
+        @param connection: Connection to the GLS server (group should be joined already)
+        @type connection: L{ServerConnection.ServerConnection}
+        @param fileName: Name of the journal file
+        @type fileName: C{String}
+        @param capacity: Maximum number of items in the journal (oldest items are dropped if exceeded)
+        @type capacity: C{int}
+        @param chunkSize: Maximum number of items written to the server at once
+        @type chunkSize: C{int}
+        @param retryInterval: Time (in seconds) to wait before trying again if the server could not be reached
+        @type retryInterval: C{float}
+        """
+        self._connection = connection
+        self._journal = PositionJournal(fileName, capacity)
+        self._chunkSize = chunkSize
+        self._retryInterval = retryInterval
+        self._rejected = 0
+        self._lastError = None
+        self._up = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def sendPosition(self, position, timestamp = None):
+        """
+        Stores a GPS position in the journal for sending it to the server.
+
+        @param position: GPS position to be sent to the server
+        @type position: L{PythonGLS.Position}
+        @param timestamp: Time of the position (default is now)
+        @type timestamp: C{float}
+        """
+        self._journal.appendPosition(position, timestamp)
+        self._wakeup.set()
+
+    def sendWaypoint(self, waypoint, timestamp = None):
+        """
+        Stores a waypoint in the journal for sending it to the server.
+
+        @param waypoint: Waypoint to be sent to the server
+        @type waypoint: L{PythonGLS.Waypoint}
+        @param timestamp: Time of the waypoint (default is now)
+        @type timestamp: C{float}
+        """
+        self._journal.appendWaypoint(waypoint, timestamp)
+        self._wakeup.set()
+
+    def flush(self):
+        """
+        Sends all items from the journal to the server.
+
+        Items are removed from the journal as soon as the server has answered for them. Raises an
+        L{GLSException.GLSException} if the connection fails; the items of the current chunk remain in the journal then
+        (and will be sent again - the server may receive them twice).
+
+        @return: Number of items accepted by the server
+        @rtype: C{int}
+        """
+        accepted = 0
+        while 1:
+            sequence, records = self._journal.peek(self._chunkSize)
+            if not records:
+                break
+            commands = []
+            for timestamp, item in records:
+                if isinstance(item, Waypoint):
+                    commands.append(self._connection._formatWaypoint(item))
+                else:
+                    commands.append(self._connection._formatPosition(item))
+            rejected = self._connection._sendBulk(commands)
+            self._journal.removeUpTo(sequence + len(records))
+            self._rejected += len(rejected)
+            accepted += len(records) - len(rejected)
+        self._journal.sync()
+        return accepted
+
+    def _run(self):
+        """
+        Main loop of the background thread: waits for new items and sends the journal.
+        """
+        while self._up:
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self._lastError = None
+                self._wakeup.wait()
+            except Exception, e:
+                if not isinstance(e, GLSException.GLSException):
+                    e = GLSException.GLSException("Could not send journal to server.", GLSException.EC_UNKNOWN_ERROR, "Underlaying error: " + str(e))
+                self._lastError = e
+                time.sleep(self._retryInterval)
+
+    def start(self):
+        """
+        Starts the background thread for sending the journal.
+        """
+        if self._up:
+            return
+        self._up = 1
+        self._thread = threading.Thread(target = self._run)
+        self._thread.setDaemon(1)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and closes the journal.
+
+        Items not sent yet remain in the journal file; they are sent after the next start.
+        """
+        if self._up:
+            self._up = 0
+            self._wakeup.set()
+            self._thread.join()
+        self._journal.close()
+
+    def getPending(self):
+        """
+        GETTER
+
+        @return: Number of items in the journal, which have not been sent yet
+        @rtype: C{int}
+        """
+        return self._journal.getCount()
+
+    def getRejected(self):
+        """
+        GETTER
+
+        @return: Number of items dropped because the server rejected them
+        @rtype: C{int}
+        """
+        return self._rejected
+
+    def getLastError(self):
+        """
+        GETTER
+
+        @return: Last error when sending to the server (C{None} if the last attempt was sucessful)
+        @rtype: L{GLSException.GLSException}
+        """
+        return self._lastError
@@ -0,0 +1,210 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Benchmark suite for the hot paths of the client: connecting (including handshake), sending single positions and
+bulks of positions, requesting positions and waypoints for growing groups and the memory needed for the replies.
+All measurements run against the local stand-in of the GLS server (L{pygls.LocalServer}) on the loopback
+interface; no real server is needed.
+
+The results are written as JSON, so runs may be compared over time::
+
+    python Benchmark.py [-o FILE] [-r REPEAT] [-s SIZES] [-q]
+
+Memory is measured with tracemalloc (peak of the allocations while requesting) if the module is available;
+otherwise, the size of the objects kept for the reply is summed up and the peak resident set size of the process is
+reported in addition.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+REPEAT = 20                                     # repetitions for latencies
+SENDS = 2000                                    # positions sent for the throughput measurements
+SIZES = [10, 100, 1000, 10000, 100000]          # group sizes for requesting positions and waypoints
+OUTPUT = None                                   # file for the results (None for standard output)
+
+from pygls.ServerConnection import ServerConnection
+from pygls.LocalServer import LocalServer
+from pygls.PythonGLS import Position
+from pygls import Geodesy
+import sys
+import time
+import json
+import getopt
+import platform
+import gc
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def _connect(server):
+    return ServerConnection("127.0.0.1", server.getPort(), "2", "Benchmark", "secret", "BenchmarkDevice", "OpenMoko")
+
+def _summarize(samples):
+    """
+    Statistics for a list of durations in seconds (delivered in milliseconds).
+    """
+    samples = sorted(samples)
+    count = len(samples)
+    return {"count": count,
+            "minMs": samples[0] * 1000,
+            "medianMs": samples[count // 2] * 1000,
+            "meanMs": sum(samples) / count * 1000,
+            "p95Ms": samples[min(count - 1, int(count * 0.95))] * 1000,
+            "maxMs": samples[-1] * 1000}
+
+def _retainedSize(reply):
+    """
+    Bytes kept for a reply (dictionary, names and items) as reported by C{sys.getsizeof}.
+    """
+    size = sys.getsizeof(reply)
+    for name, item in reply.iteritems():
+        size += sys.getsizeof(name) + sys.getsizeof(item)
+    return size
+
+def benchmarkHandshake(server):
+    samples = []
+    for i in range(REPEAT):
+        s = _connect(server)
+        start = time.time()
+        s.testConnection()
+        samples.append(time.time() - start)
+        s.closeConnection()
+    return _summarize(samples)
+
+def benchmarkSendPosition(server):
+    s = _connect(server)
+    s.joinGroup("OpenMoko")
+    positions = [Position(52.52 + i * 0.00001, 13.40, 34.5, 1.5, 180.0) for i in range(SENDS)]
+    samples = []
+    start = time.time()
+    for position in positions:
+        before = time.time()
+        s.sendPosition(position)
+        samples.append(time.time() - before)
+    duration = time.time() - start
+    s.closeConnection()
+    ret = _summarize(samples)
+    ret["positionsPerSecond"] = SENDS / duration
+    return ret
+
+def benchmarkSendPositions(server):
+    s = _connect(server)
+    s.joinGroup("OpenMoko")
+    positions = [Position(52.52 + i * 0.00001, 13.40, 34.5, 1.5, 180.0) for i in range(SENDS)]
+    samples = []
+    for i in range(max(1, REPEAT // 4)):
+        start = time.time()
+        s.sendPositions(positions)
+        samples.append(time.time() - start)
+    s.closeConnection()
+    ret = _summarize(samples)
+    ret["positions"] = SENDS
+    ret["positionsPerSecond"] = SENDS / min(samples)
+    return ret
+
+def _measureMemory(request):
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        reply = request()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"method": "tracemalloc", "peakBytes": peak, "retainedBytes": current, "items": len(reply)}
+    reply = request()
+    ret = {"method": "getsizeof", "retainedBytes": _retainedSize(reply), "items": len(reply)}
+    if resource is not None:
+        ret["maxRssKb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return ret
+
+def benchmarkRequests(size):
+    server = LocalServer(members = size, waypoints = 1)
+    server.start()
+    try:
+        s = _connect(server)
+        s.joinGroup("OpenMoko")
+        repeat = max(3, min(REPEAT, REPEAT * 1000 // size))
+        ret = {}
+        for label, request in [("requestPositions", s.requestPositions),
+                               ("requestWaypoints", s.requestWaypoints),
+                               ("requestPositionTable", s.requestPositionTable)]:
+            samples = []
+            for i in range(repeat):
+                start = time.time()
+                request()
+                samples.append(time.time() - start)
+            ret[label] = _summarize(samples)
+        ret["requestPositions"]["memory"] = _measureMemory(s.requestPositions)
+        ret["requestWaypoints"]["memory"] = _measureMemory(s.requestWaypoints)
+        s.closeConnection()
+        return ret
+    finally:
+        server.stop()
+
+def runBenchmark():
+    server = LocalServer(members = 10)
+    server.start()
+    try:
+        results = {"handshake": benchmarkHandshake(server),
+                   "sendPosition": benchmarkSendPosition(server),
+                   "sendPositions": benchmarkSendPositions(server)}
+    finally:
+        server.stop()
+    results["groups"] = {}
+    for size in SIZES:
+        results["groups"][str(size)] = benchmarkRequests(size)
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": Geodesy.numpy is not None,
+            "memoryMethod": tracemalloc is not None and "tracemalloc" or "getsizeof",
+            "parameters": {"repeat": REPEAT, "sends": SENDS, "sizes": SIZES},
+            "results": results}
+
+def _printHelp():
+    print "\nBenchmark suite for the GLS client; results are written as JSON."
+    print "Usage:"
+    print "\t%s -h \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-o FILE] [-r REPEAT] [-s SIZE,SIZE,...] [-q]" %(sys.argv[0])
+    print "\t\t\t\tRun all benchmarks (-q for a quick run with small groups only; -r and -s override it)"
+
+def _evaluateArgs():
+    global OUTPUT, REPEAT, SIZES, SENDS
+    optlist, args = getopt.getopt(sys.argv[1:], 'ho:r:s:q')
+    # the quick preset first - explicit options given with it take precedence
+    if ("-q", "") in optlist:
+        REPEAT = 5
+        SENDS = 200
+        SIZES = [10, 100, 1000]
+    for o, a in optlist:
+        if o == "-h":
+            _printHelp()
+            return 1
+        if o == "-o":
+            OUTPUT = a
+        if o == "-r":
+            REPEAT = int(a)
+        if o == "-s":
+            SIZES = [int(size) for size in a.split(",")]
+    return 0
+
+if __name__ == "__main__":
+    if not _evaluateArgs():
+        report = json.dumps(runBenchmark(), indent = 2, sort_keys = True)
+        if OUTPUT:
+            f = open(OUTPUT, "w")
+            f.write(report + "\n")
+            f.close()
+        else:
+            print report
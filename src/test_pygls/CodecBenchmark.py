@@ -0,0 +1,90 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Micro benchmark for the wire codec: cost per line for encoding "P" and "W" commands and for decoding lines of
+"P" and "W" replies with the generic float conversion (as up to version 0.1.3) in comparison to the schema aware
+codec. No server is needed.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+REPEAT = 5          # number of measurements (the best one is reported)
+NUMBER = 20000      # lines per measurement
+
+from pygls.PythonGLS import Position, Waypoint
+from pygls import GLSCodec
+import timeit
+
+POSITION = Position(52.520008123, 13.404954456, 34.567891, 12.345678, 271.234567)
+WAYPOINT = Waypoint(52.520008123, 13.404954456, 34.567891, "Alexanderplatz")
+POSITION_LINE = "Pmember00042,52.520008123,13.404954456,34.567891,12.345678,271.234567"
+WAYPOINT_LINE = "Wmember00042,52.520008123,13.404954456,34.567891,Alexanderplatz"
+
+def _legacyPack(floats, separator = ","):
+    ret = ""
+    for f in floats:
+        ret += str(f) + separator
+    return ret[:len(ret)-len(separator)]
+
+def _legacyExtract(st, separator = ","):
+    ret = []
+    for token in st.split(separator):
+        try:
+            ret.append(float(token))
+        except ValueError:
+            ret.append(token)
+    return ret
+
+def _legacyEncodePosition():
+    p = POSITION
+    return "P" + _legacyPack([p.getLatitude(), p.getLongitude(), p.getAltitude(), p.getSpeed(), p.getBearing()])
+
+def _legacyEncodeWaypoint():
+    w = WAYPOINT
+    return "W" + _legacyPack([w.getLatitude(), w.getLongitude(), w.getAltitude()]) + "," + w.getName()
+
+def _legacyDecodePosition():
+    tokens = _legacyExtract(POSITION_LINE[1:])
+    return tokens[0], Position(tokens[1], tokens[2], tokens[3], tokens[4], tokens[5])
+
+def _legacyDecodeWaypoint():
+    tokens = _legacyExtract(WAYPOINT_LINE[1:])
+    return tokens[0], Waypoint(tokens[1], tokens[2], tokens[3], tokens[4])
+
+def _codecEncodePosition():
+    return GLSCodec.defaultCodec.formatPosition(POSITION)
+
+def _codecEncodeWaypoint():
+    return GLSCodec.defaultCodec.formatWaypoint(WAYPOINT)
+
+def _codecDecodePosition():
+    return GLSCodec.parsePositionLine(POSITION_LINE)
+
+def _codecDecodeWaypoint():
+    return GLSCodec.parseWaypointLine(WAYPOINT_LINE)
+
+def _microsecondsPerLine(function):
+    timer = timeit.Timer(function)
+    return min(timer.repeat(REPEAT, NUMBER)) / NUMBER * 1000000
+
+def runBenchmark():
+    print "Cost per line in microseconds (best of %d runs with %d lines each)" %(REPEAT, NUMBER)
+    print "\t%-20s %10s %10s %10s" %("", "legacy", "codec", "speedup")
+    for label, legacy, codec in [("encode position", _legacyEncodePosition, _codecEncodePosition),
+                                 ("encode waypoint", _legacyEncodeWaypoint, _codecEncodeWaypoint),
+                                 ("decode position", _legacyDecodePosition, _codecDecodePosition),
+                                 ("decode waypoint", _legacyDecodeWaypoint, _codecDecodeWaypoint)]:
+        before = _microsecondsPerLine(legacy)
+        after = _microsecondsPerLine(codec)
+        print "\t%-20s %10.2f %10.2f %9.1fx" %(label, before, after, before / after)
+    print "Length of encoded lines in bytes"
+    print "\t%-20s %10d %10d" %("position", len(_legacyEncodePosition()), len(_codecEncodePosition()))
+    print "\t%-20s %10d %10d" %("waypoint", len(_legacyEncodeWaypoint()), len(_codecEncodeWaypoint()))
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -0,0 +1,71 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Simulation of the dead reckoning policy (L{pygls.DeadReckoning}): a device drives straight ahead, turns, stops now and
+then and reports one noisy fix per second. For several tolerances, the number of positions sent is compared to sending
+every fix, together with the error of the position the others see (with and without extrapolating the positions
+received). No server is needed.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+DURATION = 3600             # seconds simulated (one fix per second)
+NOISE = 3.0                 # standard deviation of the GPS error in metres
+TOLERANCES = [10.0, 25.0, 50.0, 100.0]
+MAX_SILENCE = 60.0
+
+from pygls.PythonGLS import Position
+from pygls.DeadReckoning import DeadReckoningPolicy
+from pygls import Geodesy
+from SimulatedTracks import iterTrack
+import itertools
+import random
+
+def simulateTrack():
+    """
+    True positions and noisy fixes (with speed in metres per second and bearing) for each second.
+    """
+    random.seed(1)
+    track = []
+    for second, (latitude, longitude, speed, bearing) in enumerate(itertools.islice(iterTrack(52.52, 13.40, 90.0), DURATION)):
+        noisy = Geodesy.destination(latitude, longitude, random.uniform(0, 360), abs(random.gauss(0, NOISE)))
+        fix = Position(noisy[0], noisy[1], 34.5, max(0.0, random.gauss(speed, 0.3)), (bearing + random.gauss(0, 2)) % 360)
+        track.append((second, latitude, longitude, fix))
+    return track
+
+def _p95(values):
+    values = sorted(values)
+    return values[int(len(values) * 0.95)]
+
+def simulate(track, tolerance):
+    sender = DeadReckoningPolicy(tolerance, MAX_SILENCE)
+    receiver = DeadReckoningPolicy(tolerance, MAX_SILENCE)       # only used for extrapolating the positions received
+    sent = 0
+    extrapolated = []
+    plain = []
+    last = None
+    for second, latitude, longitude, fix in track:
+        if sender.check(fix, second) is not None:
+            receiver.sent(fix, second)
+            last = fix
+            sent += 1
+        predicted = receiver.predict(second)
+        extrapolated.append(Geodesy.distance(predicted[0], predicted[1], latitude, longitude))
+        plain.append(Geodesy.distance(last.getLatitude(), last.getLongitude(), latitude, longitude))
+    return sent, _p95(extrapolated), max(extrapolated), _p95(plain)
+
+def runSimulation():
+    track = simulateTrack()
+    print "%d fixes (one per second), GPS noise %.1f m, maximum silence %d s" %(len(track), NOISE, MAX_SILENCE)
+    print "\t%-14s %8s %10s %18s %18s %18s" %("tolerance (m)", "sent", "reduction", "p95 error (m)", "max error (m)", "p95 not extrap. (m)")
+    for tolerance in TOLERANCES:
+        sent, p95, maximum, plain = simulate(track, tolerance)
+        print "\t%-14.1f %8d %9.1fx %18.1f %18.1f %18.1f" %(tolerance, sent, len(track) / float(sent), p95, maximum, plain)
+
+if __name__ == "__main__":
+    runSimulation()
@@ -0,0 +1,156 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Fake gpsd: a local server speaking the JSON protocol of gpsd (version 3) for trying out
+L{pygls.GPSDConnection.GPSDConnection} without a GPS device. After the client has sent ?WATCH, a TPV report of a dummy
+device walking around randomly is sent in each interval; now and then, reports without fix and with a poor estimated
+error are sent as well, so the filtering can be watched::
+
+    python FakeGPSD.py [-p PORT] [-i INTERVAL] [-n REPORTS] [-c]
+
+With -c, a client is started in addition, which prints the positions passed on by its filter.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+PORT = 2947
+INTERVAL = 1.0          # seconds between 2 reports
+REPORTS = None          # number of reports sent to each client (None for no limit)
+CLIENT = 0              # start a client printing the positions passed on
+SPEED = 0.0001          # degrees, the device moves at per report
+
+from pygls.GPSDConnection import GPSDConnection, FixFilter, MODE_3D
+from pygls import GLSException
+import socket
+import threading
+import random
+import time
+import json
+import getopt
+import sys
+
+class FakeGPSD:
+    """
+    Local server speaking the JSON protocol of gpsd; each client gets its own thread.
+    """
+
+    def __init__(self, port = PORT, interval = INTERVAL, reports = REPORTS, seed = 0):
+        self._interval = interval
+        self._reports = reports
+        self._random = random.Random(seed)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", port))
+        self._socket.listen(5)
+
+    def getPort(self):
+        return self._socket.getsockname()[1]
+
+    def start(self):
+        thread = threading.Thread(target = self.serveForever)
+        thread.setDaemon(1)
+        thread.start()
+
+    def serveForever(self):
+        while 1:
+            try:
+                client, address = self._socket.accept()
+            except socket.error:
+                return
+            thread = threading.Thread(target = self._serve, args = (client,))
+            thread.setDaemon(1)
+            thread.start()
+
+    def stop(self):
+        self._socket.close()
+
+    def _report(self, latitude, longitude, count):
+        report = {"class": "TPV", "device": "/dev/fake", "mode": 3, "time": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                  "lat": latitude, "lon": longitude, "alt": 34.5, "track": self._random.uniform(0, 360), "speed": 1.4,
+                  "epx": 5.0, "epy": 6.0}
+        if count % 10 == 9:
+            report = {"class": "TPV", "device": "/dev/fake", "mode": 1}
+        elif count % 10 == 5:
+            report["epx"] = report["epy"] = 150.0
+        return json.dumps(report)
+
+    def _serve(self, client):
+        try:
+            client.sendall('{"class":"VERSION","release":"3.17","rev":"fake","proto_major":3,"proto_minor":11}\r\n')
+            request = ""
+            while "?WATCH" not in request:
+                data = client.recv(1024)
+                if not data:
+                    return
+                request += data
+            client.sendall('{"class":"DEVICES","devices":[{"class":"DEVICE","path":"/dev/fake","activated":"now"}]}\r\n')
+            client.sendall('{"class":"WATCH","enable":true,"json":true}\r\n')
+            latitude, longitude = 52.52, 13.40
+            count = 0
+            while self._reports is None or count < self._reports:
+                latitude += self._random.uniform(-SPEED, SPEED)
+                longitude += self._random.uniform(-SPEED, SPEED)
+                line = self._report(latitude, longitude, count) + "\r\n"
+                # split lines now and then, so the client has to join them
+                cut = self._random.randrange(len(line))
+                client.sendall(line[:cut])
+                client.sendall(line[cut:])
+                count += 1
+                time.sleep(self._interval)
+        except socket.error:
+            pass
+        client.close()
+
+def runClient(port):
+    g = GPSDConnection("127.0.0.1", port, FixFilter(minMode = MODE_3D, maxError = 50.0, minDistance = 5.0, maxInterval = 10.0))
+    try:
+        for position in g.positions(timeout = max(5.0, INTERVAL * 5)):
+            print position, g.getStatistics()
+    except GLSException.GLSException, e:
+        print e
+    except KeyboardInterrupt:
+        pass
+    g.close()
+    print "Finished:", g.getStatistics()
+
+def _printHelp():
+    print "\nFake gpsd - sends TPV reports of a dummy device walking around randomly."
+    print "Usage:"
+    print "\t%s -h \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-p PORT] [-i INTERVAL] [-n REPORTS] [-c]" %(sys.argv[0])
+    print "\t\t\t\tServe (-c with a client printing the positions passed on)"
+
+def _evaluateArgs():
+    global PORT, INTERVAL, REPORTS, CLIENT
+    optlist, args = getopt.getopt(sys.argv[1:], 'hp:i:n:c')
+    for o, a in optlist:
+        if o == "-h":
+            _printHelp()
+            return 1
+        if o == "-p":
+            PORT = int(a)
+        if o == "-i":
+            INTERVAL = float(a)
+        if o == "-n":
+            REPORTS = int(a)
+        if o == "-c":
+            CLIENT = 1
+    return 0
+
+if __name__ == "__main__":
+    if not _evaluateArgs():
+        server = FakeGPSD(PORT, INTERVAL, REPORTS)
+        print "Fake gpsd listening on port %d" %(server.getPort())
+        if CLIENT:
+            server.start()
+            runClient(server.getPort())
+        else:
+            try:
+                server.serveForever()
+            except KeyboardInterrupt:
+                server.stop()
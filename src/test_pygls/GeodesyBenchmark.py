@@ -0,0 +1,52 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Benchmark for the geodesy helpers: time for the distances from one point to every member and for a distance matrix,
+computed pair by pair in comparison to the batch functions (vectorized if NumPy is installed). No server is needed.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+MEMBERS = 10000     # members for the one-to-many computation
+FLEET = 1000        # members for the many-to-many computation (FLEET x FLEET distances)
+REPEAT = 5          # number of measurements (the best one is reported)
+
+from pygls.PythonGLS import Position
+from pygls import Geodesy
+import random
+import time
+
+def _best(function):
+    times = []
+    for i in range(REPEAT):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times) * 1000
+
+def _pairwise(origin, members):
+    return [Geodesy.distance(origin.getLatitude(), origin.getLongitude(), m.getLatitude(), m.getLongitude()) for m in members]
+
+def _pairwiseMatrix(fleet):
+    return [_pairwise(origin, fleet) for origin in fleet]
+
+def runBenchmark():
+    random.seed(1)
+    members = [Position(random.gauss(52.52, 0.5), random.gauss(13.40, 0.8), 34.5, 1.5, 180.0) for i in range(MEMBERS)]
+    fleet = members[:FLEET]
+    me = members[0]
+    if Geodesy.numpy is not None:
+        print "Time in milliseconds (batches vectorized with NumPy)"
+    else:
+        print "Time in milliseconds (NumPy not installed - batches computed point by point)"
+    print "\t%-40s %10s %10s" %("", "pairwise", "batch")
+    print "\t%-40s %10.1f %10.1f" %("distance from me to %d members" %(MEMBERS), _best(lambda: _pairwise(me, members)), _best(lambda: Geodesy.distancesFrom(me, members)))
+    print "\t%-40s %10.1f %10.1f" %("distance matrix %d x %d" %(FLEET, FLEET), _best(lambda: _pairwiseMatrix(fleet)), _best(lambda: Geodesy.distanceMatrix(fleet, fleet)))
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -0,0 +1,307 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Load generator: many dummy gps devices (walkers) sending their positions to a GLS server and requesting the positions
+of the others. In contrast to DummyWalker.py (one walker per process), the walkers are spread across a number of
+worker processes; each worker runs all of its walkers concurrently as non-blocking sessions
+(L{pygls.AsyncServerConnection}) in one event loop. The loop waits with poll(), so a worker may run thousands of
+walkers; the limit of open files is raised as far as the hard limit allows (one socket per walker, plus one per walker
+for a local server).
+
+Walkers either walk around randomly (as DummyWalker.py does) or replay the track points of GPX files. At the end,
+latency percentiles for sending and requesting, errors by error code of L{pygls.GLSException} and the achieved
+throughput are reported.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+GROUP = "OpenMoko"
+SERVER = "localhost"
+PORT = 47757
+PROTOCOL_VERSION = "2"
+USER = "Walker"         # walkers log in as USER00000, USER00001, ...
+PASSWORD = "test"
+DEVICE = "DummyDevice"
+
+WALKERS = 100           # number of walkers
+WORKERS = 4             # number of worker processes
+DELAY = 5.0             # seconds between 2 updates of one walker
+DURATION = 60.0         # seconds of load
+REQUEST_EVERY = 5       # every n-th update, the walker requests the positions of the others as well (0 for never)
+SPEED = 0.001           # speed, the walkers are moving at (random walk)
+GPX_FILES = []          # tracks to be replayed (random walk if empty)
+LOCAL_MEMBERS = None    # start a local server with this number of simulated members instead of using SERVER / PORT
+OUTPUT = None           # file for the results as JSON (None for none)
+
+from pygls.AsyncServerConnection import AsyncServerConnection, loop
+from pygls.PythonGLS import Position
+from pygls import GLSException
+import resource
+import multiprocessing
+import xml.dom.minidom
+import heapq
+import random
+import time
+import json
+import getopt
+import sys
+
+def raiseFileLimit(count):
+    """
+    Raises the limit of open files of the process (up to the hard limit), so the given number of sockets may be opened.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < count:
+        if hard != resource.RLIM_INFINITY:
+            count = min(count, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (count, hard))
+
+def _errorNames():
+    names = {}
+    for name in dir(GLSException):
+        if name.startswith("EC_"):
+            names[getattr(GLSException, name)] = name
+    return names
+
+def _readTracks(fileNames):
+    """
+    Track points (latitude, longitude, altitude) of all tracks in the given GPX files.
+    """
+    tracks = []
+    for fileName in fileNames:
+        document = xml.dom.minidom.parse(fileName)
+        for track in document.getElementsByTagName("trkseg") or [document]:
+            points = []
+            for point in track.getElementsByTagName("trkpt"):
+                altitude = 0.0
+                elevations = point.getElementsByTagName("ele")
+                if elevations and elevations[0].firstChild is not None:
+                    altitude = float(elevations[0].firstChild.data)
+                points.append((float(point.getAttribute("lat")), float(point.getAttribute("lon")), altitude))
+            if points:
+                tracks.append(points)
+    return tracks
+
+
+class Walker:
+    """
+    One dummy gps device with its own session.
+    """
+
+    def __init__(self, index, map, tracks, server, port):
+        self.index = index
+        self.connection = AsyncServerConnection(server, port, PROTOCOL_VERSION, "%s%05d" %(USER, index), PASSWORD, DEVICE, GROUP, map)
+        self.updates = 0
+        if tracks:
+            self.track = tracks[index % len(tracks)]
+            self.step = random.randrange(len(self.track))
+        else:
+            self.track = None
+            self.position = Position(52.538643 + random.uniform(-100, 100) * SPEED, 13.421938 + random.uniform(-100, 100) * SPEED, 1234.34, 89.63, 180)
+
+    def nextPosition(self):
+        if self.track is not None:
+            latitude, longitude, altitude = self.track[self.step % len(self.track)]
+            self.step += 1
+            return Position(latitude, longitude, altitude, 0.0, 0.0)
+        self.position = Position(self.position.getLatitude() + random.uniform(-SPEED / 2, SPEED / 2), self.position.getLongitude() + random.uniform(-SPEED / 2, SPEED / 2), 1234.34, 89.63, 180)
+        return self.position
+
+
+class WorkerStatistics:
+    """
+    Measurements of one worker process.
+    """
+
+    def __init__(self):
+        self.sendLatencies = []
+        self.requestLatencies = []
+        self.errors = {}
+        self.sends = 0
+        self.requests = 0
+
+    def track(self, latencies):
+        """
+        Callbacks recording the latency of one command (started now) or its error code.
+        """
+        start = time.time()
+        def done(*args):
+            latencies.append(time.time() - start)
+        def failed(e):
+            code = e.getErrorCode()
+            self.errors[code] = self.errors.get(code, 0) + 1
+        return done, failed
+
+
+def runWorker(arguments):
+    """
+    Runs the walkers with the given indexes in one event loop until the duration is over.
+    """
+    indexes, tracks, server, port, seed = arguments
+    random.seed(seed)
+    raiseFileLimit(len(indexes) + 100)
+    map = {}
+    statistics = WorkerStatistics()
+    walkers = [Walker(index, map, tracks, server, port) for index in indexes]
+    start = time.time()
+    end = start + DURATION
+    due = [(start + random.uniform(0, DELAY), walker.index, walker) for walker in walkers]
+    heapq.heapify(due)
+    while due and due[0][0] < end:
+        now = time.time()
+        while due and due[0][0] <= now:
+            when, index, walker = heapq.heappop(due)
+            if not walker.updates:
+                # connecting is spread over the first interval as well (instead of all walkers at once)
+                walker.connection.joinGroup(GROUP, None, statistics.track([])[1])
+            callback, errback = statistics.track(statistics.sendLatencies)
+            walker.connection.sendPosition(walker.nextPosition(), callback, errback)
+            statistics.sends += 1
+            walker.updates += 1
+            if REQUEST_EVERY and walker.updates % REQUEST_EVERY == 0:
+                callback, errback = statistics.track(statistics.requestLatencies)
+                walker.connection.requestPositions(callback, errback)
+                statistics.requests += 1
+            heapq.heappush(due, (when + DELAY, index, walker))
+        if map:
+            loop(timeout = max(0.0, min(0.05, due[0][0] - time.time())), map = map, count = 1)
+        else:
+            time.sleep(max(0.0, min(0.05, due[0][0] - time.time())))
+    for walker in walkers:
+        walker.connection.closeConnection()
+    closing = time.time() + 5
+    while map and time.time() < closing:
+        loop(timeout = 0.05, map = map, count = 1)
+    return statistics.__dict__
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {"count": 0}
+    ret = {"count": len(samples), "maxMs": samples[-1] * 1000}
+    for p in (50, 90, 95, 99):
+        ret["p%dMs" %(p)] = samples[min(len(samples) - 1, int(len(samples) * p / 100.0))] * 1000
+    return ret
+
+def runLoad():
+    tracks = _readTracks(GPX_FILES)
+    workers = max(1, min(WORKERS, WALKERS))
+    jobs = [(range(i, WALKERS, workers), tracks, SERVER, PORT, random.random()) for i in range(workers)]
+    pool = multiprocessing.Pool(workers)
+    start = time.time()
+    try:
+        results = pool.map(runWorker, jobs)
+    finally:
+        pool.close()
+        pool.join()
+    duration = time.time() - start
+    sendLatencies = []
+    requestLatencies = []
+    errors = {}
+    sends = requests = 0
+    names = _errorNames()
+    for result in results:
+        sendLatencies.extend(result["sendLatencies"])
+        requestLatencies.extend(result["requestLatencies"])
+        sends += result["sends"]
+        requests += result["requests"]
+        for code, count in result["errors"].items():
+            name = names.get(code, str(code))
+            errors[name] = errors.get(name, 0) + count
+    return {"walkers": WALKERS, "workers": workers, "durationS": duration,
+            "send": _percentiles(sendLatencies), "request": _percentiles(requestLatencies),
+            "sendsIssued": sends, "requestsIssued": requests,
+            "sendsPerSecond": len(sendLatencies) / duration, "requestsPerSecond": len(requestLatencies) / duration,
+            "errors": errors}
+
+def _printReport(report):
+    print "%d walkers in %d worker processes for %.1f seconds" %(report["walkers"], report["workers"], report["durationS"])
+    print "\t%-10s %8s %10s %10s %10s %10s %10s" %("", "count", "p50 (ms)", "p90 (ms)", "p95 (ms)", "p99 (ms)", "max (ms)")
+    for label in ("send", "request"):
+        stats = report[label]
+        if stats["count"]:
+            print "\t%-10s %8d %10.2f %10.2f %10.2f %10.2f %10.2f" %(label, stats["count"], stats["p50Ms"], stats["p90Ms"], stats["p95Ms"], stats["p99Ms"], stats["maxMs"])
+        else:
+            print "\t%-10s %8d" %(label, 0)
+    print "Throughput: %.1f positions sent / s, %.1f requests / s" %(report["sendsPerSecond"], report["requestsPerSecond"])
+    print "Not answered: %d sends, %d requests" %(report["sendsIssued"] - report["send"]["count"], report["requestsIssued"] - report["request"]["count"])
+    if report["errors"]:
+        print "Errors:"
+        for name, count in sorted(report["errors"].items()):
+            print "\t%-30s %8d" %(name, count)
+    else:
+        print "Errors: none"
+
+def _printHelp():
+    print "\nLoad generator - many walkers sending positions to a GLS server."
+    print "Usage:"
+    print "\t%s --help \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-g GROUP] [-u USERNAME PREFIX] [-s SECRET PASSWORD] [-h HOSTNAME] [-p PORT]" %(sys.argv[0])
+    print "\t\t[-n WALKERS] [-w WORKER PROCESSES] [-d DELAY BETWEEN UPDATES (s)] [-t DURATION (s)]"
+    print "\t\t[-r REQUEST EVERY N-TH UPDATE] [-v SPEED] [-x GPX FILE]... [-l LOCAL SERVER MEMBERS] [-o JSON FILE]"
+    print "\tEach worker process holds one socket per walker (the local server one per walker in total); the limit of"
+    print "\topen files (ulimit -n) is raised up to its hard limit if needed."
+
+def _evaluateArgs():
+    global GROUP, USER, PASSWORD, SERVER, PORT, WALKERS, WORKERS, DELAY, DURATION, REQUEST_EVERY, SPEED, LOCAL_MEMBERS, OUTPUT
+    optlist, args = getopt.getopt(sys.argv[1:], 'g:u:s:h:p:n:w:d:t:r:v:x:l:o:', ['help'])
+    for o, a in optlist:
+        if o == "--help":
+            _printHelp()
+            return 1
+        if o == "-g":
+            GROUP = a
+        if o == "-u":
+            USER = a
+        if o == "-s":
+            PASSWORD = a
+            if PASSWORD == "None":
+                PASSWORD = None
+        if o == "-h":
+            SERVER = a
+        if o == "-p":
+            PORT = int(a)
+        if o == "-n":
+            WALKERS = int(a)
+        if o == "-w":
+            WORKERS = int(a)
+        if o == "-d":
+            DELAY = float(a)
+        if o == "-t":
+            DURATION = float(a)
+        if o == "-r":
+            REQUEST_EVERY = int(a)
+        if o == "-v":
+            SPEED = float(a)
+        if o == "-x":
+            GPX_FILES.append(a)
+        if o == "-l":
+            LOCAL_MEMBERS = int(a)
+        if o == "-o":
+            OUTPUT = a
+    return 0
+
+if __name__ == "__main__":
+    if not _evaluateArgs():
+        server = None
+        if LOCAL_MEMBERS is not None:
+            from pygls.LocalServer import LocalServer
+            raiseFileLimit(WALKERS + 100)
+            server = LocalServer(members = LOCAL_MEMBERS, groups = [GROUP])
+            server.start()
+            SERVER, PORT = server.getHost(), server.getPort()
+        try:
+            report = runLoad()
+        finally:
+            if server is not None:
+                server.stop()
+        _printReport(report)
+        if OUTPUT:
+            f = open(OUTPUT, "w")
+            f.write(json.dumps(report, indent = 2, sort_keys = True) + "\n")
+            f.close()
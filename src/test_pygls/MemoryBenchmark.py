@@ -0,0 +1,86 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Memory benchmark for positions of others: bytes per member for plain classes with names copied for each reply (as up
+to version 0.1.3) in comparison to the slotted value types with interned names. No server is needed - the replies
+are generated locally.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+MEMBERS = 10000     # members in the group
+POLLS = 10          # replies kept in memory at the same time (for instance history of a member)
+
+from pygls.PythonGLS import Position, internName
+import sys
+import gc
+
+class LegacyPosition:
+    """
+    GPS Position as implemented up to version 0.1.3 (plain class with a dictionary per instance).
+    """
+    def __init__(self, latitude, longitude, altitude, speed, bearing):
+        self._latitude = latitude
+        self._longitude = longitude
+        self._altitude = altitude
+        self._speed = speed
+        self._bearing = bearing
+
+def _generateReply():
+    lines = []
+    for i in range(MEMBERS):
+        lines.append("Pmember%05d,%f,%f,%f,%f,%f" %(i, 52.5 + i * 0.0001, 13.4 + i * 0.0001, 34.5, 1.5, 180.0))
+    lines.append("F")
+    return lines
+
+def _parse(lines, positionClass, intern):
+    ret = {}
+    for line in lines:
+        if line[0] != "F":
+            tokens = line[1:].split(",")
+            name = tokens[0]
+            if intern:
+                name = internName(name)
+            ret[name] = positionClass(float(tokens[1]), float(tokens[2]), float(tokens[3]), float(tokens[4]), float(tokens[5]))
+    return ret
+
+def _sizeOf(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def _measure(positionClass, intern):
+    gc.collect()
+    lines = _generateReply()
+    replies = []
+    for i in range(POLLS):
+        replies.append(_parse(lines, positionClass, intern))
+    seen = {}
+    objects = 0
+    names = 0
+    for reply in replies:
+        for name, position in reply.items():
+            if not seen.has_key(id(name)):
+                seen[id(name)] = 1
+                names += sys.getsizeof(name)
+            objects += _sizeOf(position)
+    count = float(MEMBERS * POLLS)
+    return objects / count, names / count
+
+def runBenchmark():
+    print "Memory per member (%d members, %d replies kept)" %(MEMBERS, POLLS)
+    print "\t%-40s %10s %10s %10s" %("", "object", "name", "total")
+    before = _measure(LegacyPosition, 0)
+    after = _measure(Position, 1)
+    for label, (objects, names) in [("plain class, names not shared", before), ("slotted class, interned names", after)]:
+        print "\t%-40s %10.1f %10.1f %10.1f" %(label, objects, names, objects + names)
+    print "\tSaving: %.1f bytes per member (%.0f%%)" %(sum(before) - sum(after), 100.0 * (sum(before) - sum(after)) / sum(before))
+
+if __name__ == "__main__":
+    runBenchmark()
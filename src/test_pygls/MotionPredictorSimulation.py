@@ -0,0 +1,103 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Simulation of extrapolating the positions of others between two requests (L{pygls.MotionPredictor}): the members of a
+group drive straight ahead, turn and stop now and then; the map is redrawn once per second. For several poll intervals,
+the error of the positions shown (and the largest jump of a marker between two frames) is compared for showing the
+positions as received and for extrapolating them. Finally, the time for extrapolating a large group in one batch is
+measured. No server is needed.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+DURATION = 1800             # seconds simulated (one frame per second)
+MEMBERS = 20
+INTERVALS = [10, 30, 50]    # seconds between two polls
+HORIZON = 45.0
+BLEND_TIME = 2.0
+BATCH_MEMBERS = 1000        # members for measuring the batch extrapolation
+BATCH_ROUNDS = 100
+
+from pygls.PythonGLS import Position
+from pygls.MotionPredictor import MotionPredictor
+from pygls import Geodesy
+from SimulatedTracks import iterTrack
+import itertools
+import random
+import time
+
+def simulateTracks():
+    """
+    Position (with speed in metres per second and bearing) of each member for each second.
+    """
+    random.seed(1)
+    tracks = {}
+    for member in range(MEMBERS):
+        latitude, longitude = 52.52 + random.uniform(-0.05, 0.05), 13.40 + random.uniform(-0.05, 0.05)
+        track = iterTrack(latitude, longitude, random.uniform(0, 360))
+        tracks["member%02d" %(member)] = [Position(latitude, longitude, 34.5, speed, bearing) for latitude, longitude, speed, bearing in itertools.islice(track, DURATION)]
+    return tracks
+
+def _p95(values):
+    values = sorted(values)
+    return values[int(len(values) * 0.95)]
+
+def simulate(tracks, interval, extrapolate):
+    predictor = MotionPredictor(HORIZON, BLEND_TIME)
+    shown = {}
+    errors = []
+    jumps = []
+    for second in range(DURATION):
+        if second % interval == 0:
+            received = {}
+            for name, track in tracks.items():
+                received[name] = track[second]
+            predictor.update(received, second)
+        if extrapolate:
+            frame = predictor.predict(second)
+        else:
+            frame = predictor.getFixes()
+        for name, position in frame.items():
+            actual = tracks[name][second]
+            errors.append(Geodesy.distance(position.getLatitude(), position.getLongitude(), actual.getLatitude(), actual.getLongitude()))
+            if shown.has_key(name):
+                last = shown[name]
+                jumps.append(Geodesy.distance(position.getLatitude(), position.getLongitude(), last.getLatitude(), last.getLongitude()))
+        shown = frame
+    return _p95(errors), max(jumps)
+
+def measureBatch():
+    predictor = MotionPredictor(HORIZON, BLEND_TIME)
+    received = {}
+    for i in range(BATCH_MEMBERS):
+        received["member%04d" %(i)] = Position(52.52 + i * 0.0001, 13.40, 34.5, 13.0, i % 360)
+    predictor.update(received, 0.0)
+    start = time.time()
+    for i in range(BATCH_ROUNDS):
+        predictor.predictColumns(i * 0.1)
+    columns = (time.time() - start) / BATCH_ROUNDS
+    start = time.time()
+    for i in range(BATCH_ROUNDS):
+        predictor.predict(i * 0.1)
+    positions = (time.time() - start) / BATCH_ROUNDS
+    return columns, positions
+
+def runSimulation():
+    tracks = simulateTracks()
+    print "%d members, %d seconds (one frame per second), horizon %d s, blend time %.1f s" %(MEMBERS, DURATION, HORIZON, BLEND_TIME)
+    print "\t%-14s %14s %18s %18s" %("interval (s)", "", "p95 error (m)", "max jump (m)")
+    for interval in INTERVALS:
+        plain = simulate(tracks, interval, 0)
+        extrapolated = simulate(tracks, interval, 1)
+        print "\t%-14d %14s %18.1f %18.1f" %(interval, "as received", plain[0], plain[1])
+        print "\t%-14s %14s %18.1f %18.1f" %("", "extrapolated", extrapolated[0], extrapolated[1])
+    columns, positions = measureBatch()
+    print "Extrapolating %d members: %.2f ms per frame (columns), %.2f ms per frame (positions)" %(BATCH_MEMBERS, columns * 1000, positions * 1000)
+
+if __name__ == "__main__":
+    runSimulation()
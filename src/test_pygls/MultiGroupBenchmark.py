@@ -0,0 +1,147 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Benchmark for watching several groups: refreshing the positions of all groups one after another with one session
+(joining and requesting per group) is compared to refreshing them concurrently with L{pygls.MultiGroupMonitor}.
+A local server (L{pygls.LocalServer}) serves the groups; a proxy in front of it delays all data by the given latency,
+so the round trips of a real network are simulated::
+
+    python MultiGroupBenchmark.py [-g GROUPS] [-l LATENCY] [-w WORKERS] [-r ROUNDS]
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+PROTOCOL_VERSION = "2"
+USER = "Dispatch"
+DEVICE = "DummyDevice"
+
+GROUPS = 20             # number of groups watched
+MEMBERS = 10            # members per group
+LATENCY = 50.0          # milliseconds each direction is delayed by (round trip is twice as long)
+WORKERS = 20            # maximum number of worker threads of the monitor
+ROUNDS = 5              # refreshes measured for each way
+
+from pygls.LocalServer import LocalServer
+from pygls.ServerConnection import ServerConnection
+from pygls.MultiGroupMonitor import MultiGroupMonitor
+import socket
+import threading
+import time
+import getopt
+import sys
+
+class LatencyProxy:
+    """
+    Forwards connections to a server; data is passed on in each direction after the latency has passed.
+    """
+
+    def __init__(self, host, port, latency):
+        self._target = (host, port)
+        self._latency = latency
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen(64)
+        thread = threading.Thread(target = self._accept)
+        thread.setDaemon(1)
+        thread.start()
+
+    def getPort(self):
+        return self._socket.getsockname()[1]
+
+    def _accept(self):
+        while 1:
+            client, address = self._socket.accept()
+            server = socket.create_connection(self._target)
+            for source, target in ((client, server), (server, client)):
+                thread = threading.Thread(target = self._forward, args = (source, target))
+                thread.setDaemon(1)
+                thread.start()
+
+    def _forward(self, source, target):
+        try:
+            while 1:
+                data = source.recv(65536)
+                if not data:
+                    break
+                time.sleep(self._latency)
+                target.sendall(data)
+        except socket.error:
+            pass
+        try:
+            target.shutdown(socket.SHUT_WR)
+        except socket.error:
+            pass
+
+def refreshSequentially(session, groupNames):
+    positions = {}
+    for groupName in groupNames:
+        for name, position in session.requestPositions(groupName).items():
+            positions[(groupName, name)] = position
+    return positions
+
+def runBenchmark():
+    groupNames = ["Group%02d" %(i) for i in range(GROUPS)]
+    server = LocalServer(members = MEMBERS, groups = groupNames)
+    server.start()
+    proxy = LatencyProxy(server.getHost(), server.getPort(), LATENCY / 1000.0)
+    print "%d groups with %d members, latency %.0f ms each way, %d workers" %(GROUPS, MEMBERS, LATENCY, WORKERS)
+
+    session = ServerConnection("127.0.0.1", proxy.getPort(), PROTOCOL_VERSION, USER, None, DEVICE, groupNames[0])
+    monitor = MultiGroupMonitor("127.0.0.1", proxy.getPort(), PROTOCOL_VERSION, USER, None, DEVICE, groupNames, WORKERS)
+    # first refresh establishes the sessions
+    refreshSequentially(session, groupNames)
+    monitor.refresh()
+
+    start = time.time()
+    for i in range(ROUNDS):
+        sequential = refreshSequentially(session, groupNames)
+    sequentialTime = (time.time() - start) / ROUNDS
+
+    start = time.time()
+    for i in range(ROUNDS):
+        errors = monitor.refresh()
+    concurrentTime = (time.time() - start) / ROUNDS
+    failed = [groupName for groupName, error in errors.items() if error is not None]
+    concurrent = monitor.getPositions()
+
+    print "\tsequential (one session):    %8.1f ms per refresh, %d positions" %(sequentialTime * 1000, len(sequential))
+    print "\tconcurrent (MultiGroupMonitor): %5.1f ms per refresh, %d positions, %d groups failed" %(concurrentTime * 1000, len(concurrent), len(failed))
+    print "\tspeedup: %.1fx" %(sequentialTime / concurrentTime)
+    freshness = monitor.getFreshness().values()
+    print "\tfreshness of the groups within %.1f ms" %((max(freshness) - min(freshness)) * 1000)
+    session.closeConnection()
+    monitor.close()
+    server.stop()
+
+def _printHelp():
+    print "\nBenchmark for watching several groups - sequential compared to concurrent refreshes."
+    print "Usage:"
+    print "\t%s -h \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-g GROUPS] [-l LATENCY] [-w WORKERS] [-r ROUNDS]" %(sys.argv[0])
+    print "\t\t\t\tRun the benchmark (latency in milliseconds each way)"
+
+def _evaluateArgs():
+    global GROUPS, LATENCY, WORKERS, ROUNDS
+    optlist, args = getopt.getopt(sys.argv[1:], 'hg:l:w:r:')
+    for o, a in optlist:
+        if o == "-h":
+            _printHelp()
+            return 1
+        if o == "-g":
+            GROUPS = int(a)
+        if o == "-l":
+            LATENCY = float(a)
+        if o == "-w":
+            WORKERS = int(a)
+        if o == "-r":
+            ROUNDS = int(a)
+    return 0
+
+if __name__ == "__main__":
+    if not _evaluateArgs():
+        runBenchmark()
@@ -0,0 +1,94 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Simulation of the adaptive poll scheduler (L{pygls.PollScheduler}): the members of a group drive around during the day,
+turn and stop now and then, and are parked over night; the map shows the area around the start. The number of polls
+per hour and the error of the (extrapolated) positions shown for members moving on the map are compared for polling at a
+fixed interval and for the adaptive scheduler. No server is needed.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+DURATION = 24 * 3600        # seconds simulated
+DAY = (7 * 3600, 19 * 3600) # members drive between these seconds of the day
+MEMBERS = 10
+MIN_INTERVAL = 5.0
+MAX_INTERVAL = 60.0
+BASE_INTERVAL = 30.0
+FIXED_INTERVALS = [10.0, 30.0]
+VIEWPORT = (52.50, 13.37, 52.54, 13.43)     # south, west, north, east
+FRAME = 5                   # seconds between two frames checked for the error
+
+from pygls.PythonGLS import Position
+from pygls.PollScheduler import PollScheduler
+from pygls.MotionPredictor import MotionPredictor
+from pygls import Geodesy
+from SimulatedTracks import iterTrack
+import itertools
+import random
+
+def simulateTracks():
+    """
+    Position (with speed in metres per second and bearing) of each member for each second.
+    """
+    random.seed(1)
+    tracks = {}
+    for member in range(MEMBERS):
+        latitude, longitude = 52.52 + random.uniform(-0.02, 0.02), 13.40 + random.uniform(-0.03, 0.03)
+        track = iterTrack(latitude, longitude, random.uniform(0, 360), [8.0, 13.0, 25.0], 0.3, (300, 1800), DAY)
+        tracks["member%02d" %(member)] = [Position(latitude, longitude, 34.5, speed, bearing) for latitude, longitude, speed, bearing in itertools.islice(track, DURATION)]
+    return tracks
+
+def _p95(values):
+    values = sorted(values)
+    return values[int(len(values) * 0.95)]
+
+def _onMap(position):
+    south, west, north, east = VIEWPORT
+    return south <= position.getLatitude() <= north and west <= position.getLongitude() <= east
+
+def simulate(tracks, scheduler):
+    """
+    Polls as chosen by the scheduler (or at a fixed interval, if the scheduler is a number).
+    """
+    predictor = MotionPredictor(MAX_INTERVAL * 1.5)
+    polls = 0
+    nextPoll = 0.0
+    errors = []
+    for second in range(DURATION):
+        if second >= nextPoll:
+            received = {}
+            for name, track in tracks.items():
+                received[name] = track[second]
+            predictor.update(received, second)
+            polls += 1
+            if isinstance(scheduler, PollScheduler):
+                nextPoll = scheduler.succeeded(received, second, VIEWPORT)
+            else:
+                nextPoll = second + scheduler
+        if second % FRAME == 0:
+            for name, position in predictor.predict(second).items():
+                actual = tracks[name][second]
+                if actual.getSpeed() > 0 and _onMap(actual):
+                    errors.append(Geodesy.distance(position.getLatitude(), position.getLongitude(), actual.getLatitude(), actual.getLongitude()))
+    return polls * 3600.0 / DURATION, _p95(errors)
+
+def runSimulation():
+    tracks = simulateTracks()
+    print "%d members, %d hours (driving from %d to %d o'clock), positions extrapolated between polls" %(MEMBERS, DURATION / 3600, DAY[0] / 3600, DAY[1] / 3600)
+    print "\t%-34s %16s %28s" %("polling", "polls per hour", "p95 error moving on map (m)")
+    for interval in FIXED_INTERVALS:
+        pollsPerHour, p95 = simulate(tracks, interval)
+        print "\t%-34s %16.1f %28.1f" %("fixed interval of %d s" %(interval), pollsPerHour, p95)
+    scheduler = PollScheduler(MIN_INTERVAL, MAX_INTERVAL, BASE_INTERVAL, seed = 1)
+    pollsPerHour, p95 = simulate(tracks, scheduler)
+    print "\t%-34s %16.1f %28.1f" %("adaptive (%d to %d s, base %d s)" %(MIN_INTERVAL, MAX_INTERVAL, BASE_INTERVAL), pollsPerHour, p95)
+    print "\t%s" %(scheduler.getStatistics(DURATION))
+
+if __name__ == "__main__":
+    runSimulation()
@@ -0,0 +1,302 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Regression tests for the library against a local server (L{pygls.LocalServer}); no GLS server is needed::
+
+    python RegressionTests.py [-t TEST]
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+PROTOCOL_VERSION = "2"
+GROUP = "OpenMoko"
+DEVICE = "DummyDevice"
+MANY_SESSIONS = 1500     # well above the 1024 sockets select() can handle
+
+from pygls.LocalServer import LocalServer
+from pygls.ServerConnection import ServerConnection
+from pygls.StoreAndForward import StoreAndForward
+from pygls.PythonGLS import Position
+from pygls.PositionDelta import PositionSnapshot
+from pygls.AsyncServerConnection import AsyncServerConnection, loop as asyncLoop
+from pygls.DeadReckoning import DeadReckoningSender
+from pygls.MultiGroupMonitor import MultiGroupMonitor
+from pygls import GLSException
+from LoadGenerator import raiseFileLimit
+import socket
+import time
+import tempfile
+import shutil
+import os
+import getopt
+import sys
+
+def testStoreAndForwardReconnect():
+    """
+    Fixes journaled while the server is down are delivered to the group after reconnecting.
+    """
+    server = LocalServer(members = 0)
+    server.start()
+    directory = tempfile.mkdtemp()
+    try:
+        s = ServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Sender", None, DEVICE, GROUP)
+        s.joinGroup(GROUP)
+        sender = StoreAndForward(s, os.path.join(directory, "outgoing.journal"))
+        server.stop()
+        for i in range(5):
+            sender.sendPosition(Position(52.52 + i * 0.001, 13.40, 34.5, 10.0, 90.0))
+        server.start()
+        try:
+            sender.flush()
+        except GLSException.GLSException, e:
+            assert e.getErrorCode() == GLSException.EC_CONNECTION_LOST, e
+            assert sender.getPending() == 5, sender.getPending()
+            sender.flush()
+        assert sender.getPending() == 0, sender.getPending()
+        assert sender.getRejected() == 0, sender.getRejected()
+        assert s.getJoinedGroup() == GROUP
+
+        watcher = ServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Watcher", None, DEVICE, GROUP)
+        positions = watcher.requestPositions(GROUP)
+        assert "Sender" in positions, positions
+        assert abs(positions["Sender"].getLatitude() - 52.524) < 1e-6, positions["Sender"]
+        watcher.closeConnection()
+        s.closeConnection()
+        sender.stop()
+    finally:
+        server.stop()
+        shutil.rmtree(directory)
+
+def _brokenReply(positions, count):
+    for name, position in positions[:count]:
+        yield name, position
+    raise GLSException.GLSException("Connection closed by server.", GLSException.EC_CONNECTION_LOST)
+
+def testSnapshotBrokenReply():
+    """
+    A reply failing in the middle leaves the snapshot unchanged; the next complete reply reports all changes.
+    """
+    snapshot = PositionSnapshot()
+    before = [("a", Position(52.50, 13.40, 0, 0, 0)), ("b", Position(52.51, 13.41, 0, 0, 0))]
+    snapshot.update(before, 100.0)
+    after = [("a", Position(52.60, 13.40, 0, 0, 0)), ("c", Position(52.52, 13.42, 0, 0, 0)), ("b", Position(52.61, 13.41, 0, 0, 0))]
+    try:
+        snapshot.update(_brokenReply(after, 2), 200.0)
+        assert 0, "error in reply not raised"
+    except GLSException.GLSException, e:
+        assert e.getErrorCode() == GLSException.EC_CONNECTION_LOST, e
+    assert snapshot.getPositions() == dict(before), snapshot.getPositions()
+    assert snapshot.getReceived() == {"a": 100.0, "b": 100.0}, snapshot.getReceived()
+
+    delta = snapshot.update(after, 300.0)
+    assert delta.getAdded().keys() == ["c"], delta
+    assert sorted(delta.getMoved().keys()) == ["a", "b"], delta
+    assert delta.getRemoved() == [], delta
+    assert snapshot.getPositions() == dict(after), snapshot.getPositions()
+
+def testDeadReckoningAsyncFailure():
+    """
+    A position rejected on an asynchronous connection resets the policy and is passed on to the errback of the caller.
+    """
+    server = LocalServer(members = 0)
+    server.start()
+    try:
+        socketMap = {}
+        connection = AsyncServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Sender", None, DEVICE, GROUP, socketMap)
+        sender = DeadReckoningSender(connection)
+        errors = []
+        # no group joined - the server rejects the position
+        assert sender.sendPosition(Position(52.52, 13.40, 34.5, 10.0, 90.0), errback = errors.append) == 1
+        assert sender.getPolicy().predict(time.time()) is not None
+        deadline = time.time() + 5
+        while not errors and time.time() < deadline:
+            asyncLoop(timeout = 0.05, map = socketMap, count = 1)
+        assert len(errors) == 1, errors
+        assert isinstance(errors[0], GLSException.GLSException), errors
+        assert sender.getPolicy().predict(time.time()) is None
+        connection.close()
+    finally:
+        server.stop()
+
+def testDeadReckoningSyncFailure():
+    """
+    A position rejected on a blocking connection raises the error and resets the policy; no callbacks are passed on.
+    """
+    server = LocalServer(members = 0)
+    server.start()
+    try:
+        connection = ServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Sender", None, DEVICE, "NoSuchGroup")
+        sender = DeadReckoningSender(connection)
+        try:
+            sender.sendPosition(Position(52.52, 13.40, 34.5, 10.0, 90.0))
+            assert 0, "error not raised"
+        except GLSException.GLSException:
+            pass
+        assert sender.getPolicy().predict(time.time()) is None
+        connection.closeConnection()
+    finally:
+        server.stop()
+
+def _stalledServer():
+    """
+    Listening socket, which accepts connections (in the backlog) but never answers.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    return listener
+
+def testMultiGroupMonitorStalledServer():
+    """
+    A stalled server makes the refresh fail with a lost connection after the timeout of the sessions.
+    """
+    listener = _stalledServer()
+    monitor = MultiGroupMonitor("127.0.0.1", listener.getsockname()[1], PROTOCOL_VERSION, "Watcher", None, DEVICE, [GROUP], timeout = 0.5)
+    try:
+        started = time.time()
+        errors = monitor.refresh(timeout = 5.0)
+        assert time.time() - started < 2.0, time.time() - started
+        assert errors[GROUP].getErrorCode() == GLSException.EC_CONNECTION_LOST, errors
+    finally:
+        monitor.close()
+        listener.close()
+
+def testMultiGroupMonitorBusyGroup():
+    """
+    A group still being refreshed is not queued again, and closing does not wait for the stalled session.
+    """
+    listener = _stalledServer()
+    monitor = MultiGroupMonitor("127.0.0.1", listener.getsockname()[1], PROTOCOL_VERSION, "Watcher", None, DEVICE, [GROUP], timeout = None)
+    try:
+        assert monitor.refresh(timeout = 0.2) == {}
+        assert monitor.refresh(timeout = 0.2) == {}
+        assert len(monitor._running[GROUP]) == 2, monitor._running
+        assert monitor._tasks.qsize() == 0, monitor._tasks.qsize()
+    finally:
+        started = time.time()
+        monitor.close()
+        listener.close()
+    assert time.time() - started < 2.0, time.time() - started
+    # the worker reports the failed refresh to both waiting refreshes
+    while monitor._running and time.time() - started < 2.0:
+        time.sleep(0.01)
+    assert monitor._running == {}, monitor._running
+
+def testLocalServerManyClients():
+    """
+    The local server keeps serving far more clients than select() could handle.
+    """
+    raiseFileLimit(2 * MANY_SESSIONS + 100)
+    server = LocalServer(members = 1)
+    server.start()
+    sessions = []
+    try:
+        for i in range(MANY_SESSIONS):
+            s = ServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Client%04d" %(i), None, DEVICE, GROUP)
+            s.joinGroup(GROUP)
+            sessions.append(s)
+        assert server.getClientCount() == MANY_SESSIONS, server.getClientCount()
+        for s in sessions:
+            s.requestPositions()
+        assert server.isRunning() and server.getError() is None, server.getError()
+    finally:
+        for s in sessions:
+            s.closeConnection()
+        server.stop()
+
+def testAsyncManySessions():
+    """
+    Far more asynchronous sessions than select() could handle share one loop.
+    """
+    raiseFileLimit(2 * MANY_SESSIONS + 100)
+    server = LocalServer(members = 1)
+    server.start()
+    socketMap = {}
+    groups = []
+    errors = []
+    try:
+        for i in range(MANY_SESSIONS):
+            c = AsyncServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Client%04d" %(i), None, DEVICE, GROUP, socketMap)
+            c.requestGroups(groups.append, errors.append)
+        deadline = time.time() + 60
+        while len(groups) + len(errors) < MANY_SESSIONS and time.time() < deadline:
+            asyncLoop(timeout = 0.05, map = socketMap, count = 1)
+        assert errors == [], errors[:1]
+        assert len(groups) == MANY_SESSIONS, len(groups)
+        for c in socketMap.values():
+            c.closeConnection()
+        asyncLoop(timeout = 0.05, map = socketMap)
+    finally:
+        server.stop()
+
+class _FailingDispatcher:
+    def readable(self):
+        raise RuntimeError("loop broken")
+
+    def close(self):
+        pass
+
+def testLocalServerDied():
+    """
+    A failing loop is reported by the server instead of only printed by its thread; the server may be started again.
+    """
+    server = LocalServer()
+    server.start()
+    try:
+        server._map[-1] = _FailingDispatcher()
+        deadline = time.time() + 5
+        while server.isRunning() and time.time() < deadline:
+            time.sleep(0.01)
+        assert not server.isRunning()
+        assert server.getError().getErrorCode() == GLSException.EC_UNKNOWN_ERROR, server.getError()
+        server.start()
+        assert server.isRunning() and server.getError() is None, server.getError()
+        s = ServerConnection(server.getHost(), server.getPort(), PROTOCOL_VERSION, "Client", None, DEVICE, GROUP)
+        s.requestPositions(GROUP)
+        s.closeConnection()
+    finally:
+        server.stop()
+
+TESTS = [testStoreAndForwardReconnect, testSnapshotBrokenReply, testDeadReckoningAsyncFailure, testDeadReckoningSyncFailure,
+         testMultiGroupMonitorStalledServer, testMultiGroupMonitorBusyGroup, testLocalServerManyClients, testLocalServerDied,
+         testAsyncManySessions]
+
+def runTests(names = None):
+    failed = 0
+    for test in TESTS:
+        if names and test.__name__ not in names:
+            continue
+        try:
+            test()
+            print "\t%-50s ok" %(test.__name__)
+        except Exception, e:
+            failed += 1
+            print "\t%-50s FAILED: %s" %(test.__name__, repr(e))
+    return failed
+
+def _printHelp():
+    print "\nRegression tests against a local server."
+    print "Usage:"
+    print "\t%s -h \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-t TEST] \tRun all tests (or only the given ones)" %(sys.argv[0])
+
+def _evaluateArgs():
+    optlist, args = getopt.getopt(sys.argv[1:], 'ht:')
+    names = []
+    for o, a in optlist:
+        if o == "-h":
+            _printHelp()
+            return None
+        if o == "-t":
+            names.append(a)
+    return names
+
+if __name__ == "__main__":
+    names = _evaluateArgs()
+    if names is not None:
+        sys.exit(runTests(names))
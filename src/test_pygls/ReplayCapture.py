@@ -0,0 +1,110 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Replays a capture of a GLS session (see L{pygls.SessionCapture}) through the client - no server is needed. Use it for
+reproducing a misbehaving server or for profiling the parsing of real replies::
+
+    python ReplayCapture.py [-r] [-n REPEAT] [-p] [-m] FILE
+
+A capture for trying it out may be recorded against the local stand-in of the GLS server (L{pygls.LocalServer})::
+
+    python ReplayCapture.py -c MEMBERS FILE
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+REALTIME = 0        # replay at the original timing (1) or as fast as possible (0)
+REPEAT = 1          # number of replays
+PROFILE = 0         # profile the replays and print the most expensive functions
+METRICS = 0         # print the figures collected by pygls.Instrumentation.ConnectionMetrics
+CAPTURE = None      # record a capture against a local server with this number of members instead of replaying
+
+from pygls.SessionCapture import SessionRecorder, SessionReplay
+from pygls.Instrumentation import ConnectionMetrics
+import sys
+import json
+import getopt
+
+def capture(fileName, members):
+    from pygls.ServerConnection import ServerConnection
+    from pygls.LocalServer import LocalServer
+    from pygls.PythonGLS import Position
+    server = LocalServer(members = members)
+    server.start()
+    try:
+        recorder = SessionRecorder(fileName)
+        s = ServerConnection("127.0.0.1", server.getPort(), "2", "Recorder", "secret", "RecorderDevice", "OpenMoko")
+        s.setRecorder(recorder)
+        s.requestGroups()
+        s.requestPositions("OpenMoko")
+        s.sendPosition(Position(52.52, 13.40, 34.5, 1.5, 180.0))
+        s.requestWaypoints()
+        s.requestPositions()
+        s.closeConnection()
+        recorder.close()
+    finally:
+        server.stop()
+    print "Capture with %d members written to %s" %(members, fileName)
+
+def replay(fileName):
+    replayer = SessionReplay(fileName)
+    metrics = ConnectionMetrics()
+    if METRICS:
+        replayer.addHook(metrics)
+    for i in range(REPEAT):
+        result = replayer.replay(REALTIME)
+        print "Replay %d: %d connections, %d commands, %d errors, %d positions, %d waypoints, %d groups in %.2f ms" %(i + 1,
+            result["connections"], result["commands"], result["errors"], result["positions"], result["waypoints"],
+            result["groups"], result["durationS"] * 1000)
+    if METRICS:
+        print json.dumps(metrics.snapshot(), indent = 2, sort_keys = True)
+
+def _printHelp():
+    print "\nReplays a capture of a GLS session through the client."
+    print "Usage:"
+    print "\t%s -h \t\tPrint this help" %(sys.argv[0])
+    print "\t%s [-r] [-n REPEAT] [-p] [-m] FILE" %(sys.argv[0])
+    print "\t\t\t\tReplay (-r at the original timing, -p with profiling, -m with metrics)"
+    print "\t%s -c MEMBERS FILE" %(sys.argv[0])
+    print "\t\t\t\tRecord a capture against a local server with the given number of members"
+
+def _evaluateArgs():
+    global REALTIME, REPEAT, PROFILE, METRICS, CAPTURE
+    optlist, args = getopt.getopt(sys.argv[1:], 'hrn:pmc:')
+    for o, a in optlist:
+        if o == "-h":
+            _printHelp()
+            return None
+        if o == "-r":
+            REALTIME = 1
+        if o == "-n":
+            REPEAT = int(a)
+        if o == "-p":
+            PROFILE = 1
+        if o == "-m":
+            METRICS = 1
+        if o == "-c":
+            CAPTURE = int(a)
+    if len(args) != 1:
+        _printHelp()
+        return None
+    return args[0]
+
+if __name__ == "__main__":
+    fileName = _evaluateArgs()
+    if fileName:
+        if CAPTURE is not None:
+            capture(fileName, CAPTURE)
+        elif PROFILE:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            profiler.runcall(replay, fileName)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        else:
+            replay(fileName)
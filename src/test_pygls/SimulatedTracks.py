@@ -0,0 +1,50 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Tracks of simulated vehicles for the simulations (DeadReckoningSimulation.py, MotionPredictorSimulation.py and
+PollSchedulerSimulation.py): a vehicle drives straight ahead at one of a few speeds for a while, turns, drives on and
+parks now and then; optionally, it only drives during the day. Random numbers are taken from the module C{random}, so
+seeding it makes the tracks repeatable.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+SPEEDS = [8.0, 13.0, 25.0, 33.0]    # metres per second the vehicles drive at
+TURNS = [-90, 90, -30, 30, 180]     # degrees the vehicles turn by at the start of each drive
+DRIVE_LENGTH = (20, 180)            # seconds of one drive (straight ahead)
+NIGHT_LENGTH = 600                  # seconds of one stop over night
+
+from pygls import Geodesy
+import random
+
+def iterTrack(latitude, longitude, bearing, speeds = SPEEDS, parkProbability = 0.15, parkLength = (60, 300), day = None):
+    """
+    Position (latitude, longitude, speed in metres per second and bearing) of a vehicle for each second (without end).
+
+    @param latitude: Latitude of the start
+    @param longitude: Longitude of the start
+    @param bearing: Bearing at the start (the vehicle turns before its first drive)
+    @param speeds: Speeds (in metres per second) each drive is done at (one chosen randomly)
+    @param parkProbability: Probability of parking instead of driving at the end of a drive or stop
+    @param parkLength: Shortest and longest time (in seconds) the vehicle parks
+    @param day: Seconds (since the start) the vehicle drives between (C{None} for driving all the time); the time is taken modulo one day
+    @return: Generator for the positions; take the first ones with C{itertools.islice}, which does not draw random numbers beyond them
+    """
+    second = 0
+    while 1:
+        if day is not None and not day[0] <= second % (24 * 3600) < day[1]:
+            length, speed = NIGHT_LENGTH, 0.0
+        elif random.random() < parkProbability:
+            length, speed = random.randint(parkLength[0], parkLength[1]), 0.0
+        else:
+            length, speed = random.randint(DRIVE_LENGTH[0], DRIVE_LENGTH[1]), random.choice(speeds)
+            bearing = (bearing + random.choice(TURNS)) % 360
+        for i in range(length):
+            latitude, longitude = Geodesy.destination(latitude, longitude, bearing, speed)
+            yield latitude, longitude, speed, bearing
+            second += 1
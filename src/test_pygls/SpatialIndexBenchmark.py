@@ -0,0 +1,72 @@
+"""
+Test program for
+Python library for GPS Location Sharing.
+http://www.assembla.com/wiki/show/dZdDzazrmr3k7AabIlDkbG
+
+Benchmark for the spatial indexes: time for filling the index and cost per bounding box, radius and nearest
+neighbour query in comparison to a linear scan over all members. No server is needed - the positions are
+generated locally around one city.
+
+@author: Michael Pilgermann
+@contact: mailto:michael.pilgermann@gmx.de
+@contact: http://www.kichkasch.de
+@license: GPL (General Public License)
+"""
+
+MEMBERS = 100000    # members in the group
+QUERIES = 200       # queries per kind
+RADIUS = 1000       # radius for radius queries (metres)
+NEIGHBOURS = 10     # number of items for nearest neighbour queries
+BOX = 0.01          # edge length of the bounding box queries (degrees)
+
+from pygls.PythonGLS import Position
+from pygls.SpatialIndex import GridIndex, KDTreeIndex, _inBox
+from pygls.Geodesy import distance
+import random
+import time
+
+def _generatePositions():
+    positions = {}
+    for i in range(MEMBERS):
+        positions["member%06d" %(i)] = Position(random.gauss(52.52, 0.1), random.gauss(13.40, 0.15), 34.5, 1.5, 180.0)
+    return positions
+
+def _linearBox(positions, point):
+    return [(name, p) for name, p in positions.iteritems() if _inBox(p.getLatitude(), p.getLongitude(), point[0], point[1], point[0] + BOX, point[1] + BOX)]
+
+def _linearRadius(positions, point):
+    return [name for name, p in positions.iteritems() if distance(point[0], point[1], p.getLatitude(), p.getLongitude()) <= RADIUS]
+
+def _linearNearest(positions, point):
+    distances = [(distance(point[0], point[1], p.getLatitude(), p.getLongitude()), name) for name, p in positions.iteritems()]
+    distances.sort()
+    return distances[:NEIGHBOURS]
+
+def _millisecondsPerQuery(function, points):
+    start = time.time()
+    for point in points:
+        function(point)
+    return (time.time() - start) / len(points) * 1000
+
+def runBenchmark():
+    random.seed(1)
+    positions = _generatePositions()
+    points = [(random.gauss(52.52, 0.1), random.gauss(13.40, 0.15)) for i in range(QUERIES)]
+    print "Cost per query in milliseconds (%d members, %d queries each)" %(MEMBERS, QUERIES)
+    print "\t%-20s %10s %10s %10s %10s" %("", "fill", "box", "radius", "nearest")
+    linear = [_millisecondsPerQuery(lambda point: _linearBox(positions, point), points[:10]),
+              _millisecondsPerQuery(lambda point: _linearRadius(positions, point), points[:10]),
+              _millisecondsPerQuery(lambda point: _linearNearest(positions, point), points[:10])]
+    print "\t%-20s %10s %10.3f %10.3f %10.3f" %(("linear scan", "-") + tuple(linear))
+    for label, index in [("grid index", GridIndex(0.01)), ("k-d tree index", KDTreeIndex())]:
+        start = time.time()
+        index.fill(positions)
+        index.queryNearest(points[0][0], points[0][1])
+        fill = (time.time() - start) * 1000
+        print "\t%-20s %10.1f %10.3f %10.3f %10.3f" %(label, fill,
+            _millisecondsPerQuery(lambda point: index.queryBox(point[0], point[1], point[0] + BOX, point[1] + BOX), points),
+            _millisecondsPerQuery(lambda point: index.queryRadius(point[0], point[1], RADIUS), points),
+            _millisecondsPerQuery(lambda point: index.queryNearest(point[0], point[1], NEIGHBOURS), points))
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -167,8 +167,10 @@ class MapWidget(gtk.Widget, pyrouteModule):
     
     #check if new pos is different than current
     oldpos = self.get('ownpos');
-    if ((oldpos['valid']) and (oldpos['lon'] == newpos['lon']) and (oldpos['lat'] == oldpos['lat'])):
+# change michael pilgermann
+    if ((oldpos['valid']) and (oldpos['lon'] == newpos['lon']) and (oldpos['lat'] == newpos['lat'])):
         return
+# end change michael pilgermann
 
     # TODO: if we set ownpos and then get a GPS signal, we should decide
     # here what to do
@@ -200,10 +202,12 @@ class MapWidget(gtk.Widget, pyrouteModule):
     outsideMap = (x < border or y < border or x > (1-border) or y > (1-border))
     
     # If map is locked to our position, then recentre it
+# change michael pilgermann
+    # redrawn by the timer (see update) - together with redraws requested by the gls module in the same frame
     if(self.get('centred')):
-      self.centreOnOwnPos()
-    else:
-      self.forceRedraw()
+      self.modules['projection'].recentre(pos['lat'], pos['lon'])
+    self.set("needRedraw", True)
+# end change michael pilgermann
   
   def centreOnOwnPos(self):
     """Try to centre the map on our position"""
@@ -13,13 +13,30 @@ and this way to the conntection to the GPS Location Sharing server (GLS).
 @TYPE FILENAME_GLSSETTINGS: C{String}
 @VAR PROTOCOL_VERSION: Version of GLS Protocol to be used for communication with GLS server
 @TYPE PROTOCOL_VERSION: C{String}
+@VAR BACKOFF_MIN: Time (in seconds) to wait before reconnecting after the first failed request
+@TYPE BACKOFF_MIN: C{float}
+@VAR BACKOFF_MAX: Maximum time (in seconds) to wait before reconnecting after failed requests
+@TYPE BACKOFF_MAX: C{float}
+@VAR BLEND_TIME: Time (in seconds) for fading an extrapolated position into a new fix from the server
+@TYPE BLEND_TIME: C{float}
+@VAR REPORT_INTERVAL: Time (in seconds) between two reports of the number of polls
+@TYPE REPORT_INTERVAL: C{float}
+@VAR SOCKET_TIMEOUT: Default time (in seconds) to wait for the server before the session is given up
+@TYPE SOCKET_TIMEOUT: C{float}
 """
 FILENAME_GLSSETTINGS = "Setup/glssettings.txt"
 PROTOCOL_VERSION = "2"
+BACKOFF_MIN = 5
+BACKOFF_MAX = 300
+BLEND_TIME = 2.0
+REPORT_INTERVAL = 3600
+SOCKET_TIMEOUT = 30
 
 from  poi_base import *
 from pygls.ServerConnection import ServerConnection
 from pygls.PythonGLS import Position, Waypoint
+from pygls.MotionPredictor import MotionPredictor
+from pygls.PollScheduler import PollScheduler
 import pygls.GLSException
 import thread
 import time
@@ -47,6 +64,11 @@ class pyglsPoiModule(poiModule):
     def _loadSettings(self):
         """
         Loads all settings for the GLS module from a configuration file.
+        
+        The settings "extrapolate" (seconds between two redraws with extrapolated positions; 0 for showing the positions
+        as received), "horizon" (maximum time in seconds a position is extrapolated for) as well as "mindelay" and
+        "maxdelay" (shortest and longest time in seconds between two polls; "delay" is used while the others move) and
+        "timeout" (time in seconds to wait for the server before the session is given up) are optional.
         """
         config = ConfigParser.ConfigParser()
         try:
@@ -59,6 +81,21 @@ class pyglsPoiModule(poiModule):
             self._device =  config.get("pygls", "device")
             self._delay =  int(config.get("pygls", "delay"))
             self._forceRedraw = int(config.get("pygls", "forceredraw"))
+            self._extrapolate = 0
+            self._horizon = self._delay * 1.5
+            if config.has_option("pygls", "extrapolate"):
+                self._extrapolate = float(config.get("pygls", "extrapolate"))
+            if config.has_option("pygls", "horizon"):
+                self._horizon = float(config.get("pygls", "horizon"))
+            self._minDelay = min(5, self._delay)
+            self._maxDelay = self._delay * 2
+            if config.has_option("pygls", "mindelay"):
+                self._minDelay = float(config.get("pygls", "mindelay"))
+            if config.has_option("pygls", "maxdelay"):
+                self._maxDelay = float(config.get("pygls", "maxdelay"))
+            self._timeout = SOCKET_TIMEOUT
+            if config.has_option("pygls", "timeout"):
+                self._timeout = float(config.get("pygls", "timeout"))
             if self._password.strip == "" or self._password == "None":
                 self._password = None
         except:
@@ -77,8 +114,15 @@ class pyglsPoiModule(poiModule):
         if self._loadSettings() != 0:
             return -1
 
-        self._s = ServerConnection(self._servername, self._port, PROTOCOL_VERSION, self._username , self._password, self._device , self._groupname)
+        self._s = ServerConnection(self._servername, self._port, PROTOCOL_VERSION, self._username , self._password, self._device , self._groupname, self._timeout)
+        self._scheduler = PollScheduler(self._minDelay, self._maxDelay, self._delay, backoffMin = BACKOFF_MIN, backoffMax = BACKOFF_MAX)
+        self._scheduler.start(time.time())
+        self._nextReport = time.time() + REPORT_INTERVAL
+        self._predictor = MotionPredictor(self._horizon, BLEND_TIME)
         self._group = poiGroup(self._groupname)
+        self._screenPositions = None
+        self._updates = 0
+        self._redraws = 0
         self.groups.append(self._group)
         thread.start_new_thread(self._updatePositionsPeriodically, () )
         self._up = 1
@@ -87,30 +131,158 @@ class pyglsPoiModule(poiModule):
     def _updatePositionsPeriodically(self):
         """"
         Initiates a pull of gps positions from the server periodically.
+        
+        The time of each pull is chosen by the poll scheduler (see L{PollScheduler}) from the movement of the others,
+        the visible part of the map and failed pulls. If extrapolating is switched on, the positions are moved on between
+        two pulls (see L{_showPredictedPositions}).
         """
         while self._up:
-            self._loadPositionsFromServer()
-            if self._forceRedraw:
-                self._parent.forceRedraw()
-            time.sleep(self._delay)
+            if self._scheduler.isDue(time.time()):
+                posOthers = self._loadPositionsFromServer()
+                if posOthers is not None:
+                    self._scheduler.succeeded(posOthers, time.time(), self._getViewport(), self._isMapVisible())
+                    if self._extrapolate:
+                        self._predictor.update(posOthers, time.time())
+                        self._showPredictedPositions()
+                    else:
+                        self._showPositions(posOthers)
+                self._reportPolls()
+            elif self._extrapolate and len(self._predictor):
+                self._showPredictedPositions()
+            wait = self._scheduler.getNextPoll() - time.time()
+            if self._extrapolate and len(self._predictor):
+                wait = min(wait, self._extrapolate)
+            time.sleep(max(0, wait))
+        self._s.closeConnection()
+
+    def _getViewport(self):
+        """
+        Determines the visible part of the map.
+        
+        @return: Southern latitude, western longitude, northern latitude and eastern longitude (C{None} if unknown)
+        @rtype: C{Tuple} of C{float}
+        """
+        try:
+            projection = self._parent.modules['projection']
+            if not projection.isValid():
+                return None
+            north, west = projection.xy2ll(0, 0)
+            south, east = projection.xy2ll(self._parent.rect.width, self._parent.rect.height)
+        except (AttributeError, KeyError):
+            return None
+        return south, west, north, east
+
+    def _isMapVisible(self):
+        """
+        Checks, whether the map is visible (not covered by a menu).
+        """
+        try:
+            return not self._parent.modules['overlay'].fullscreen()
+        except (AttributeError, KeyError):
+            return 1
+
+    def _reportPolls(self):
+        """
+        Prints the number of polls per hour once in a while (see L{REPORT_INTERVAL}).
+        """
+        now = time.time()
+        if now < self._nextReport:
+            return
+        self._nextReport = now + REPORT_INTERVAL
+        statistics = self._scheduler.getStatistics(now)
+        print "GLS: %.1f polls per hour (%.1f at a fixed delay of %d seconds), %d failed; %d of %d updates redrawn" %(statistics["pollsPerHour"], statistics["basePollsPerHour"], self._delay, statistics["failures"], self._redraws, self._updates)
+
+    def _showPredictedPositions(self):
+        """
+        Replaces the points of interest by the positions of the others extrapolated to now (see L{MotionPredictor}).
+        """
+        self._showPositions(self._predictor.predict(time.time()))
+
+    def _showPositions(self, positions):
+        """
+        Replaces the points of interest by the given positions of the others.
+        
+        The new list of points of interest is built completely in the poll thread and swapped in at once; the GUI thread
+        keeps drawing the old list until then. A redraw is only requested if the members or their positions on the screen
+        have changed (see L{_requestRedraw}).
+        
+        @param positions: Positions of the others; the key is the name of the member
+        @type positions: C{Dict} of C{String} | L{Position}
+        """
+        items = []
+        for pos, position in positions.items():
+            item = poi(position.getLatitude(), position.getLongitude())
+            item.title = "GLS:%s (OpenMoko)" %(pos)
+            items.append(item)
+        self._group.items = items
+        self._updates += 1
+        screenPositions = self._getScreenPositions(items)
+        if screenPositions != self._screenPositions:
+            self._screenPositions = screenPositions
+            self._requestRedraw()
+
+    def _getScreenPositions(self, items):
+        """
+        Determines, where the given points of interest are drawn on the screen.
+        
+        @return: Title and pixel coordinates of each point of interest on the screen, sorted (title, latitude and longitude of all points of interest if the projection is not available)
+        @rtype: C{List} of C{Tuple}
+        """
+        ret = []
+        try:
+            projection = self._parent.modules['projection']
+            if projection.isValid():
+                for item in items:
+                    x, y = projection.ll2xy(item.lat, item.lon)
+                    if projection.onscreen(x, y):
+                        ret.append((item.title, int(x), int(y)))
+                ret.sort()
+                return ret
+        except (AttributeError, KeyError):
+            pass
+        ret = [(item.title, item.lat, item.lon) for item in items]
+        ret.sort()
+        return ret
+
+    def _requestRedraw(self):
+        """
+        Asks the map to redraw itself (if redrawing is switched on in the settings).
+        
+        The map is not redrawn from the poll thread; only the "needRedraw" flag is set, which the map checks in its timer
+        on the GUI thread. This way, several requests within one frame result in a single redraw.
+        """
+        if not self._forceRedraw:
+            return
+        try:
+            self._parent.set("needRedraw", True)
+            self._redraws += 1
+        except (AttributeError, KeyError):
+            pass
 
     def _loadPositionsFromServer(self):
         """
         Performs a single download of all available positions on the server.
+        
+        The session with the server is kept open between two downloads; the group is only joined if the session
+        has not joined it yet (joining and requesting is done in one round trip then). Otherwise, the positions are
+        parsed while the reply is still coming in. The points of interest are not touched here (see L{_showPositions}),
+        so they are kept if the server cannot be reached; the poll scheduler delays the next attempt then (see
+        L{PollScheduler.failed}).
+        
+        @return: Positions of the others (C{None} if the server could not be reached)
+        @rtype: C{Dict} of C{String} | L{Position}
         """
 ##        print "pyglsModule: Loading GLS positions from GLS server."
-        # clear last positions
-        del self._group.items[:]
-        
         try:
-            self._s.joinGroup(self._groupname)
-            posOthers = self._s.requestPositions()
-            self._s.closeConnection()
-            for pos in posOthers.keys():
-##                print "\t" + pos + ":" + str(posOthers[pos])
-                item = poi(posOthers[pos].getLatitude(), posOthers[pos].getLongitude())
-                item.title = "GLS:%s (OpenMoko)" %(pos)
-                self._group.items.append(item)
+            if self._s.isAlive() and self._s.getJoinedGroup() == self._groupname:
+                positions = self._s.iterPositions()
+            else:
+                positions = self._s.requestPositions(self._groupname).items()
+            posOthers = {}
+            for pos, position in positions:
+##                print "\t" + pos + ":" + str(position)
+                posOthers[pos] = position
             return posOthers
         except pygls.GLSException.GLSException, e:
             print "Connection error: " + e.getMsg() + "\n\t" + e.getLongMsg()
+            self._scheduler.failed(time.time())